@@ -1,8 +1,8 @@
 from facefusion import state_manager
-from facefusion.filesystem import is_image, is_video, list_directory
+from facefusion.filesystem import is_image, is_video
 from facefusion.jobs import job_store
 from facefusion.normalizer import normalize_fps, normalize_padding
-from facefusion.processors.core import get_processors_modules
+from facefusion.processors.core import apply_processors_args
 from facefusion.typing import Args
 from facefusion.vision import create_image_resolutions, create_video_resolutions, detect_image_resolution, \
     detect_video_fps, detect_video_resolution, pack_resolution
@@ -48,7 +48,11 @@ def apply_args(args: Args, apply_state_item: bool) -> None:
     cmd('face_detector_model', args.get('face_detector_model'))
     cmd('face_detector_size', args.get('face_detector_size'))
     cmd('face_detector_angles', args.get('face_detector_angles'))
+    cmd('face_detector_angle_strategy', args.get('face_detector_angle_strategy'))
     cmd('face_detector_score', args.get('face_detector_score'))
+    cmd('face_tracker_interval', args.get('face_tracker_interval'))
+    cmd('face_tracker_score', args.get('face_tracker_score'))
+    cmd('face_tracker_identity_interval', args.get('face_tracker_identity_interval'))
     # face landmarker
     cmd('face_landmarker_model', args.get('face_landmarker_model'))
     cmd('face_landmarker_score', args.get('face_landmarker_score'))
@@ -97,10 +101,9 @@ def apply_args(args: Args, apply_state_item: bool) -> None:
         cmd('output_video_fps', output_video_fps)
     cmd('skip_audio', args.get('skip_audio'))
     # processors
-    available_processors = list_directory('facefusion/processors/modules')
     cmd('processors', args.get('processors'))
-    for processor_module in get_processors_modules(available_processors):
-        processor_module.apply_args(args, cmd)
+    cmd('processor_pipeline', args.get('processor_pipeline'))
+    apply_processors_args(args, cmd)
     # uis
     cmd('open_browser', args.get('open_browser'))
     cmd('ui_layouts', args.get('ui_layouts'))
@@ -110,9 +113,25 @@ def apply_args(args: Args, apply_state_item: bool) -> None:
     cmd('execution_providers', args.get('execution_providers'))
     cmd('execution_thread_count', args.get('execution_thread_count'))
     cmd('execution_queue_count', args.get('execution_queue_count'))
+    cmd('execution_batch_size', args.get('execution_batch_size'))
+    cmd('execution_batch_wait', args.get('execution_batch_wait'))
+    cmd('execution_backend', args.get('execution_backend'))
+    cmd('execution_model_concurrency', args.get('execution_model_concurrency'))
+    cmd('execution_provider_concurrency', args.get('execution_provider_concurrency'))
+    cmd('execution_session_count', args.get('execution_session_count'))
+    cmd('execution_session_families', args.get('execution_session_families'))
+    cmd('execution_session_family_options', args.get('execution_session_family_options'))
+    cmd('execution_session_intra_threads', args.get('execution_session_intra_threads'))
+    cmd('execution_session_inter_threads', args.get('execution_session_inter_threads'))
+    cmd('execution_session_optimization', args.get('execution_session_optimization'))
+    cmd('execution_session_mode', args.get('execution_session_mode'))
+    cmd('execution_session_skip_arena', args.get('execution_session_skip_arena'))
+    cmd('execution_session_keep_optimized', args.get('execution_session_keep_optimized'))
     # memory
     cmd('video_memory_strategy', args.get('video_memory_strategy'))
     cmd('system_memory_limit', args.get('system_memory_limit'))
+    cmd('face_store_fingerprint', args.get('face_store_fingerprint'))
+    cmd('face_store_memory_limit', args.get('face_store_memory_limit'))
     # misc
     cmd('skip_download', args.get('skip_download'))
     cmd('log_level', args.get('log_level'))
@@ -129,7 +148,8 @@ def apply_globals(globals_dict: dict, init: bool = True) -> None:
         # paths
         'jobs_path', 'source_paths', 'target_path', 'output_path',
         # face detector
-        'face_detector_model', 'face_detector_size', 'face_detector_angles', 'face_detector_score',
+        'face_detector_model', 'face_detector_size', 'face_detector_angles', 'face_detector_angle_strategy',
+        'face_detector_score', 'face_tracker_interval', 'face_tracker_score', 'face_tracker_identity_interval',
         # face landmarker
         'face_landmarker_model', 'face_landmarker_score',
         # face selector
@@ -145,13 +165,18 @@ def apply_globals(globals_dict: dict, init: bool = True) -> None:
         'output_video_encoder', 'output_video_preset', 'output_video_quality',
         'output_video_resolution', 'output_video_fps', 'skip_audio',
         # processors
-        'processors',
+        'processors', 'processor_pipeline',
         # uis
         'open_browser', 'ui_layouts', 'ui_workflow',
         # execution
         'execution_device_id', 'execution_providers', 'execution_thread_count', 'execution_queue_count',
+        'execution_batch_size', 'execution_batch_wait', 'execution_backend', 'execution_model_concurrency',
+        'execution_provider_concurrency', 'execution_session_count', 'execution_session_families',
+        'execution_session_family_options',
+        'execution_session_intra_threads', 'execution_session_inter_threads', 'execution_session_optimization',
+        'execution_session_mode', 'execution_session_skip_arena', 'execution_session_keep_optimized',
         # memory
-        'video_memory_strategy', 'system_memory_limit',
+        'video_memory_strategy', 'system_memory_limit', 'face_store_fingerprint', 'face_store_memory_limit',
         # misc
         'skip_download', 'log_level',
         # jobs
@@ -2,11 +2,19 @@ import logging
 from typing import List, Sequence
 
 from facefusion.common_helper import create_float_range, create_int_range
-from facefusion.typing import Angle, ExecutionProviderSet, FaceDetectorSet, FaceLandmarkerModel, FaceMaskRegion, \
-    FaceMaskType, FaceSelectorMode, FaceSelectorOrder, Gender, JobStatus, LogLevelSet, OutputAudioEncoder, \
-    OutputVideoEncoder, OutputVideoPreset, Race, Score, TempFrameFormat, UiWorkflow, VideoMemoryStrategy
+from facefusion.typing import Angle, ExecutionBackend, ExecutionProviderSet, ExecutionSessionMode, \
+    ExecutionSessionOptimization, FaceDetectorAngleStrategy, FaceDetectorSet, FaceLandmarkerModel, FaceMaskRegion, \
+    FaceMaskType, FaceSelectorMode, FaceSelectorOrder, FaceStoreFingerprint, Gender, JobStatus, LogLevelSet, OutputAudioEncoder, \
+    OutputVideoEncoder, OutputVideoPreset, ProcessorPipeline, Race, Score, TempFrameFormat, UiWorkflow, \
+    VideoMemoryStrategy
 
 video_memory_strategies: List[VideoMemoryStrategy] = ['strict', 'moderate', 'tolerant']
+processor_pipelines: List[ProcessorPipeline] = ['sequential', 'fused', 'streaming']
+face_store_fingerprints: List[FaceStoreFingerprint] = ['sha1', 'strided']
+face_detector_angle_strategies: List[FaceDetectorAngleStrategy] = ['all', 'adaptive']
+execution_backends: List[ExecutionBackend] = ['thread', 'process']
+execution_session_optimizations: List[ExecutionSessionOptimization] = ['disable', 'basic', 'extended', 'all']
+execution_session_modes: List[ExecutionSessionMode] = ['sequential', 'parallel']
 
 face_detector_set: FaceDetectorSet = \
     {
@@ -58,9 +66,18 @@ job_statuses: List[JobStatus] = ['drafted', 'queued', 'completed', 'failed']
 
 execution_thread_count_range: Sequence[int] = create_int_range(1, 32, 1)
 execution_queue_count_range: Sequence[int] = create_int_range(1, 4, 1)
+execution_batch_size_range: Sequence[int] = create_int_range(1, 32, 1)
+execution_batch_wait_range: Sequence[int] = create_int_range(0, 100, 1)
+execution_model_concurrency_range: Sequence[int] = create_int_range(0, 32, 1)
+execution_session_count_range: Sequence[int] = create_int_range(1, 16, 1)
+execution_session_threads_range: Sequence[int] = create_int_range(0, 32, 1)
 system_memory_limit_range: Sequence[int] = create_int_range(0, 128, 4)
+face_store_memory_limit_range: Sequence[int] = create_int_range(0, 4096, 128)
 face_detector_angles: Sequence[Angle] = create_int_range(0, 270, 90)
 face_detector_score_range: Sequence[Score] = create_float_range(0.0, 1.0, 0.05)
+face_tracker_interval_range: Sequence[int] = create_int_range(0, 60, 1)
+face_tracker_score_range: Sequence[Score] = create_float_range(0.0, 1.0, 0.05)
+face_tracker_identity_interval_range: Sequence[int] = create_int_range(0, 120, 1)
 face_landmarker_score_range: Sequence[Score] = create_float_range(0.0, 1.0, 0.05)
 face_mask_blur_range: Sequence[float] = create_float_range(0.0, 1.0, 0.05)
 face_mask_padding_range: Sequence[int] = create_int_range(0, 100, 1)
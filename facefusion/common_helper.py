@@ -1,5 +1,5 @@
 import platform
-from typing import Any, Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence
 
 
 def is_linux() -> bool:
@@ -64,6 +64,16 @@ def cast_float(value: Any) -> Optional[Any]:
         return None
 
 
+def parse_key_values(key_values: Optional[List[str]]) -> Dict[str, str]:
+    key_value_set = {}
+
+    for key_value in key_values or []:
+        if '=' in key_value:
+            key, value = key_value.split('=', 1)
+            key_value_set[key.strip()] = value.strip()
+    return key_value_set
+
+
 def get_first(__list__: Any) -> Any:
     return next(iter(__list__), None)
 
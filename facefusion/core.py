@@ -12,19 +12,22 @@ from facefusion.content_analyser import analyse_image, analyse_video
 from facefusion.download import conditional_download_hashes, conditional_download_sources
 from facefusion.exit_helper import conditional_exit, hard_exit
 from facefusion.face_analyser import get_average_face, get_many_faces, get_one_face
+from facefusion.face_detector import clear_face_detector_angle_memory
 from facefusion.face_selector import sort_and_filter_faces
-from facefusion.face_store import append_reference_face, clear_reference_faces, get_reference_faces
+from facefusion.face_store import append_reference_face, clear_reference_faces, clear_static_frame_faces, \
+    get_reference_faces
+from facefusion.face_tracker import clear_face_tracker
 from facefusion.ffmpeg import copy_image, extract_frames, finalize_image, merge_video, replace_audio, restore_audio
 from facefusion.filesystem import filter_audio_paths, is_image, is_video, list_directory, resolve_relative_path
 from facefusion.jobs import job_helper, job_manager, job_runner
 from facefusion.jobs.job_list import compose_job_list
 from facefusion.memory import limit_system_memory
-from facefusion.processors.core import get_processors_modules
-from facefusion.processors.modules import style_changer
+from facefusion.processors.core import fused_process_video, get_fused_processors_modules, get_processors_modules, \
+    load_processor_module, stream_process_video
 from facefusion.statistics import conditional_log_statistics
 from facefusion.temp_helper import clear_temp_directory, create_temp_directory, get_temp_file_path, \
     get_temp_frame_paths, move_temp_file
-from facefusion.typing import Args, ErrorCode, Face
+from facefusion.typing import Args, ErrorCode, Face, Fps
 from facefusion.vision import get_video_frame, pack_resolution, read_image, read_static_images, \
     restrict_image_resolution, restrict_video_fps, restrict_video_resolution, unpack_resolution
 
@@ -106,7 +109,7 @@ def common_pre_check() -> bool:
             face_landmarker,
             face_masker,
             face_recognizer,
-            style_changer,
+            load_processor_module('style_changer'),
             voice_extractor
         ]
 
@@ -199,23 +202,26 @@ def force_download() -> ErrorCode:
             face_landmarker,
             face_recognizer,
             face_masker,
-            style_changer,
+            load_processor_module('style_changer'),
             voice_extractor
         ]
     processor_modules = get_processors_modules(available_processors)
+    model_hashes = {}
+    model_sources = {}
 
+    # the models of all modules are collected to download them concurrently
     for module in common_modules + processor_modules:
         if hasattr(module, 'MODEL_SET'):
             for model in module.MODEL_SET.values():
-                model_hashes = model.get('hashes')
-                model_sources = model.get('sources')
-
-                if model_hashes and model_sources:
-                    if not conditional_download_hashes(download_directory_path,
-                                                       model_hashes) or not conditional_download_sources(
-                        download_directory_path, model_sources):
-                        return 1
-
+                if model.get('hashes') and model.get('sources'):
+                    for model_hash in model.get('hashes').values():
+                        model_hashes[model_hash.get('path')] = model_hash
+                    for model_source in model.get('sources').values():
+                        model_sources[model_source.get('path')] = model_source
+
+    if not conditional_download_hashes(download_directory_path, model_hashes) or not conditional_download_sources(
+            download_directory_path, model_sources):
+        return 1
     return 0
 
 
@@ -411,24 +417,8 @@ def process_image(start_time: float) -> ErrorCode:
     return 0
 
 
-def process_video(start_time: float) -> ErrorCode:
-    if analyse_video(state_manager.get_item('target_path'), state_manager.get_item('trim_frame_start'),
-                     state_manager.get_item('trim_frame_end')):
-        return 3
-    # clear temp
-    logger.debug(wording.get('clearing_temp'), __name__)
-    clear_temp_directory(state_manager.get_item('target_path'))
-    # create temp
-    logger.debug(wording.get('creating_temp'), __name__)
-    create_temp_directory(state_manager.get_item('target_path'))
+def extract_process_merge_video(start_time: float, temp_video_resolution: str, temp_video_fps: Fps) -> ErrorCode:
     # extract frames
-    print(f"Starting process manager")
-    process_manager.start()
-    temp_video_resolution = pack_resolution(restrict_video_resolution(state_manager.get_item('target_path'),
-                                                                      unpack_resolution(state_manager.get_item(
-                                                                          'output_video_resolution'))))
-    temp_video_fps = restrict_video_fps(state_manager.get_item('target_path'),
-                                        state_manager.get_item('output_video_fps'))
     logger.info(wording.get('extracting_frames').format(resolution=temp_video_resolution, fps=temp_video_fps), __name__)
     if extract_frames(state_manager.get_item('target_path'), temp_video_resolution, temp_video_fps):
         logger.debug(wording.get('extracting_frames_succeed'), __name__)
@@ -442,13 +432,20 @@ def process_video(start_time: float) -> ErrorCode:
     # process frames
     temp_frame_paths = get_temp_frame_paths(state_manager.get_item('target_path'))
     if temp_frame_paths:
-        for processor_module in get_processors_modules(state_manager.get_item('processors')):
-            print(f"Processing {processor_module.__name__}")
-            logger.info(wording.get('processing'), processor_module.__name__)
-            processor_module.process_video(state_manager.get_item('source_paths'), state_manager.get_item('source_paths_2'), temp_frame_paths)
-            print(f"Post processing {processor_module.__name__}")
-            processor_module.post_process()
-            print(f"Post processing {processor_module.__name__} done in {time() - start_time} seconds")
+        if state_manager.get_item('processor_pipeline') == 'fused':
+            processor_modules = get_fused_processors_modules(state_manager.get_item('processors'))
+            logger.info(wording.get('processing'), __name__)
+            fused_process_video(processor_modules, temp_frame_paths)
+            for processor_module in processor_modules:
+                processor_module.post_process()
+        else:
+            for processor_module in get_processors_modules(state_manager.get_item('processors')):
+                print(f"Processing {processor_module.__name__}")
+                logger.info(wording.get('processing'), processor_module.__name__)
+                processor_module.process_video(state_manager.get_item('source_paths'), state_manager.get_item('source_paths_2'), temp_frame_paths)
+                print(f"Post processing {processor_module.__name__}")
+                processor_module.post_process()
+                print(f"Post processing {processor_module.__name__} done in {time() - start_time} seconds")
         if is_process_stopping():
             return 4
     else:
@@ -471,6 +468,57 @@ def process_video(start_time: float) -> ErrorCode:
         print(f"Merging video failed")
         process_manager.end()
         return 1
+    return 0
+
+
+def stream_video(temp_video_resolution: str, temp_video_fps: Fps) -> ErrorCode:
+    processor_modules = get_fused_processors_modules(state_manager.get_item('processors'))
+    logger.info(wording.get('streaming_frames').format(resolution=temp_video_resolution, fps=temp_video_fps), __name__)
+    if stream_process_video(processor_modules, state_manager.get_item('target_path'), temp_video_resolution,
+                            temp_video_fps, state_manager.get_item('output_video_resolution'),
+                            state_manager.get_item('output_video_fps')):
+        logger.debug(wording.get('streaming_frames_succeed'), __name__)
+    else:
+        if is_process_stopping():
+            process_manager.end()
+            return 4
+        logger.error(wording.get('streaming_frames_failed'), __name__)
+        process_manager.end()
+        return 1
+    for processor_module in processor_modules:
+        processor_module.post_process()
+    return 0
+
+
+def process_video(start_time: float) -> ErrorCode:
+    if analyse_video(state_manager.get_item('target_path'), state_manager.get_item('trim_frame_start'),
+                     state_manager.get_item('trim_frame_end')):
+        return 3
+    # clear temp
+    logger.debug(wording.get('clearing_temp'), __name__)
+    clear_temp_directory(state_manager.get_item('target_path'))
+    # create temp
+    logger.debug(wording.get('creating_temp'), __name__)
+    create_temp_directory(state_manager.get_item('target_path'))
+    # process video
+    print(f"Starting process manager")
+    process_manager.start()
+    temp_video_resolution = pack_resolution(restrict_video_resolution(state_manager.get_item('target_path'),
+                                                                      unpack_resolution(state_manager.get_item(
+                                                                          'output_video_resolution'))))
+    temp_video_fps = restrict_video_fps(state_manager.get_item('target_path'),
+                                        state_manager.get_item('output_video_fps'))
+    clear_static_frame_faces()
+    clear_face_tracker()
+    clear_face_detector_angle_memory()
+    if state_manager.get_item('processor_pipeline') == 'streaming':
+        error_code = stream_video(temp_video_resolution, temp_video_fps)
+    else:
+        error_code = extract_process_merge_video(start_time, temp_video_resolution, temp_video_fps)
+    # the face tracker is cleared as the next video starts, its statistics are logged once the video is done
+    clear_static_frame_faces()
+    if error_code:
+        return error_code
     # handle audio
     if state_manager.get_item('skip_audio'):
         logger.info(wording.get('skipping_audio'), __name__)
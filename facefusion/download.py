@@ -1,21 +1,25 @@
+import http.client
 import os
-import shutil
 import string
-import subprocess
+import threading
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 from urllib.parse import urlparse
 
 import unicodedata
 from tqdm import tqdm
-from yt_dlp import YoutubeDL
 
 from facefusion import wording, process_manager, state_manager, logger
 from facefusion.filesystem import is_file, TEMP_DIRECTORY_PATH, get_file_size, remove_file
 from facefusion.hash_helper import validate_hash
 from facefusion.typing import DownloadSet
 
+DOWNLOAD_WORKER_TOTAL = 4
+DOWNLOAD_RETRY_TOTAL = 3
+DOWNLOAD_CHUNK_SIZE = 1024 ** 2
+
 
 def get_video_filename(title: str) -> str:
     title = title.strip()
@@ -36,6 +40,9 @@ def get_video_filename(title: str) -> str:
 
 
 def download_video(target_url: str) -> str:
+    # yt_dlp loads all of its extractors and is only needed for url targets
+    from yt_dlp import YoutubeDL
+
     try:
         # Step 1: Fetch video info
         ydl_opts_info = {
@@ -80,36 +87,84 @@ def download_video(target_url: str) -> str:
         return ""
 
 
-def conditional_download(download_directory_path: str, urls: List[str]) -> None:
+def conditional_download(download_directory_path: str, urls: List[str]) -> List[str]:
+    download_paths = {}
+    failed_urls = []
+
     for url in urls:
         download_file_name = os.path.basename(urlparse(url).path)
         download_file_path = os.path.join(download_directory_path, download_file_name)
-        initial_size = get_file_size(download_file_path)
-        download_size = get_download_size(url)
 
-        if initial_size < download_size:
-            with tqdm(total=download_size, initial=initial_size, desc=wording.get('downloading'), unit='B',
-                      unit_scale=True, unit_divisor=1024, ascii=' =',
-                      disable=state_manager.get_item('log_level') in ['warn', 'error']) as progress:
-                subprocess.Popen(
-                    [shutil.which('curl'), '--create-dirs', '--silent', '--insecure', '--location', '--continue-at',
-                     '-', '--output', download_file_path, url])
-                current_size = initial_size
-
-                progress.set_postfix(file=download_file_name)
-                while current_size < download_size:
-                    if is_file(download_file_path):
-                        current_size = get_file_size(download_file_path)
-                        progress.update(current_size - progress.n)
+        if get_file_size(download_file_path) < get_download_size(url):
+            download_paths[url] = download_file_path
+
+    if download_paths:
+        initial_size = sum(get_file_size(download_file_path) for download_file_path in download_paths.values())
+        download_size = sum(get_download_size(url) for url in download_paths.keys())
+        progress_lock = threading.Lock()
+
+        with tqdm(total=download_size, initial=initial_size, desc=wording.get('downloading'), unit='B',
+                  unit_scale=True, unit_divisor=1024, ascii=' =',
+                  disable=state_manager.get_item('log_level') in ['warn', 'error']) as progress:
+            def update_progress(chunk_size: int) -> None:
+                with progress_lock:
+                    progress.update(chunk_size)
+
+            # the progress is pushed by the downloads instead of polling the file sizes
+            with ThreadPoolExecutor(max_workers=min(len(download_paths), DOWNLOAD_WORKER_TOTAL)) as executor:
+                download_futures = \
+                    {
+                        url: executor.submit(download_file, url, download_file_path, update_progress)
+                        for url, download_file_path in download_paths.items()
+                    }
+
+                for url, download_future in download_futures.items():
+                    try:
+                        if not download_future.result():
+                            failed_urls.append(url)
+                    except Exception as exception:
+                        logger.debug(str(exception), __name__)
+                        failed_urls.append(url)
+
+    for failed_url in failed_urls:
+        logger.error(wording.get('downloading_failed').format(url=failed_url), __name__)
+    return failed_urls
+
+
+def download_file(url: str, download_file_path: str, update_progress: Callable[[int], None]) -> bool:
+    download_size = get_download_size(url)
+
+    for _ in range(DOWNLOAD_RETRY_TOTAL):
+        initial_size = get_file_size(download_file_path)
+        if initial_size >= download_size:
+            return True
+        # certificates are verified unlike the former curl --insecure, get_download_size always required valid tls
+        try:
+            download_request = urllib.request.Request(url, headers={'Range': 'bytes=' + str(initial_size) + '-'})
+            with urllib.request.urlopen(download_request, timeout=10) as response:
+                download_mode = 'ab'
+
+                # servers without range support send the full content
+                if response.status != 206:
+                    download_mode = 'wb'
+                    update_progress(-initial_size)
+                os.makedirs(os.path.dirname(download_file_path) or '.', exist_ok=True)
+                with open(download_file_path, download_mode) as download_file:
+                    for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK_SIZE), b''):
+                        download_file.write(chunk)
+                        update_progress(len(chunk))
+        except (OSError, http.client.HTTPException) as exception:
+            logger.debug(str(exception), __name__)
+    return get_file_size(download_file_path) == download_size
 
 
 @lru_cache(maxsize=None)
 def get_download_size(url: str) -> int:
     try:
-        response = urllib.request.urlopen(url, timeout=10)
+        response = urllib.request.urlopen(urllib.request.Request(url, method='HEAD'), timeout=10)
         content_length = response.headers.get('Content-Length')
         return int(content_length)
-    except (OSError, TypeError, ValueError):
+    except (OSError, http.client.HTTPException, TypeError, ValueError):
         return 0
 
 
@@ -125,10 +180,9 @@ def conditional_download_hashes(download_directory_path: str, hashes: DownloadSe
     if not state_manager.get_item('skip_download'):
         _, invalid_hash_paths = validate_hash_paths(hash_paths)
         if invalid_hash_paths:
-            for index in hashes:
-                if hashes.get(index).get('path') in invalid_hash_paths:
-                    invalid_hash_url = hashes.get(index).get('url')
-                    conditional_download(download_directory_path, [invalid_hash_url])
+            invalid_hash_urls = [hashes.get(index).get('url') for index in hashes if
+                                 hashes.get(index).get('path') in invalid_hash_paths]
+            conditional_download(download_directory_path, invalid_hash_urls)
     valid_hash_paths, invalid_hash_paths = validate_hash_paths(hash_paths)
     for valid_hash_path in valid_hash_paths:
         valid_hash_file_name, _ = os.path.splitext(os.path.basename(valid_hash_path))
@@ -148,10 +202,9 @@ def conditional_download_sources(download_directory_path: str, sources: Download
     if not state_manager.get_item('skip_download'):
         _, invalid_source_paths = validate_source_paths(source_paths)
         if invalid_source_paths:
-            for index in sources:
-                if sources.get(index).get('path') in invalid_source_paths:
-                    invalid_source_url = sources.get(index).get('url')
-                    conditional_download(download_directory_path, [invalid_source_url])
+            invalid_source_urls = [sources.get(index).get('url') for index in sources if
+                                   sources.get(index).get('path') in invalid_source_paths]
+            conditional_download(download_directory_path, invalid_source_urls)
     valid_source_paths, invalid_source_paths = validate_source_paths(source_paths)
     for valid_source_path in valid_source_paths:
         valid_source_file_name, _ = os.path.splitext(os.path.basename(valid_source_path))
@@ -185,8 +238,12 @@ def validate_source_paths(source_paths: List[str]) -> Tuple[List[str], List[str]
     valid_source_paths = []
     invalid_source_paths = []
 
-    for source_path in source_paths:
-        if validate_hash(source_path):
+    # the sources are hashed concurrently as crc32 releases the gil for large chunks
+    with ThreadPoolExecutor() as executor:
+        source_validations = list(executor.map(validate_hash, source_paths))
+
+    for source_path, source_validation in zip(source_paths, source_validations):
+        if source_validation:
             valid_source_paths.append(source_path)
         else:
             invalid_source_paths.append(source_path)
@@ -4,13 +4,16 @@ import numpy
 
 from facefusion import state_manager
 from facefusion.common_helper import get_first
-from facefusion.face_classifier import classify_face
-from facefusion.face_detector import detect_faces, detect_rotated_faces
+from facefusion.face_classifier import classify_faces
+from facefusion.face_detector import detect_faces_by_angles
 from facefusion.face_helper import apply_nms, convert_to_face_landmark_5, estimate_face_angle, get_nms_threshold
-from facefusion.face_landmarker import detect_face_landmarks, estimate_face_landmark_68_5
-from facefusion.face_recognizer import calc_embedding
-from facefusion.face_store import get_static_faces, set_static_faces
-from facefusion.typing import BoundingBox, Face, FaceLandmark5, FaceLandmarkSet, FaceScoreSet, Score, VisionFrame
+from facefusion.face_landmarker import detect_many_face_landmarks, estimate_many_face_landmarks_68_5
+from facefusion.face_recognizer import calc_embeddings
+from facefusion.face_store import get_static_faces, get_static_frame_faces, set_static_faces, set_static_frame_faces
+from facefusion.face_tracker import find_face_tracker_anchor, find_face_tracker_identities, scope_face_tracker, \
+    set_face_tracker_anchor, set_face_tracker_identity, track_faces
+from facefusion.typing import BoundingBoxes, Face, FaceLandmarks5, FaceLandmarkSet, FaceScores, FaceScoreSet, \
+    VisionFrame
 from facefusion.vision import read_static_images
 
 AVG_FACE_1: Optional[Face] = None
@@ -19,53 +22,86 @@ SOURCE_FRAMES_1: Optional[List[str]] = None
 SOURCE_FRAMES_2: Optional[List[str]] = None
 
 
-def create_faces(vision_frame: VisionFrame, bounding_boxes: List[BoundingBox], face_scores: List[Score],
-                 face_landmarks_5: List[FaceLandmark5]) -> List[Face]:
+def create_faces(vision_frame: VisionFrame, bounding_boxes: BoundingBoxes, face_scores: FaceScores,
+                 face_landmarks_5: FaceLandmarks5, frame_number: Optional[int] = None) -> List[Face]:
     faces = []
+    face_tracker_identity_interval = state_manager.get_item('face_tracker_identity_interval')
+    is_face_tracker_identity = isinstance(frame_number, int) and bool(face_tracker_identity_interval) and \
+        face_tracker_identity_interval > 1
     nms_threshold = get_nms_threshold(state_manager.get_item('face_detector_model'),
                                       state_manager.get_item('face_detector_angles'))
     keep_indices = apply_nms(bounding_boxes, face_scores, state_manager.get_item('face_detector_score'), nms_threshold)
-
-    for index in keep_indices:
-        bounding_box = bounding_boxes[index]
-        face_score = face_scores[index]
-        face_landmark_5 = face_landmarks_5[index]
-        face_landmark_5_68 = face_landmark_5
-        face_landmark_68_5 = estimate_face_landmark_68_5(face_landmark_5_68)
-        face_landmark_68 = face_landmark_68_5
-        face_landmark_score_68 = 0.0
-        face_angle = estimate_face_angle(face_landmark_68_5)
-
-        if state_manager.get_item('face_landmarker_score') > 0:
-            face_landmark_68, face_landmark_score_68 = detect_face_landmarks(vision_frame, bounding_box, face_angle)
+    keep_indices = numpy.array(keep_indices, dtype=int).ravel()
+
+    if keep_indices.size == 0:
+        return faces
+    bounding_boxes = bounding_boxes[keep_indices]
+    face_scores = face_scores[keep_indices]
+    face_landmarks_5 = list(face_landmarks_5[keep_indices])
+    face_landmarks_5_68 = list(face_landmarks_5)
+    face_landmarks_68_5 = estimate_many_face_landmarks_68_5(face_landmarks_5_68)
+    face_landmarks_68 = list(face_landmarks_68_5)
+    face_landmark_scores_68 = [0.0] * len(keep_indices)
+    face_angles = [estimate_face_angle(face_landmark_68_5) for face_landmark_68_5 in face_landmarks_68_5]
+
+    # every model runs once on the stacked crops of all faces instead of once per face
+    if state_manager.get_item('face_landmarker_score') > 0:
+        face_landmarks_68, face_landmark_scores_68 = detect_many_face_landmarks(vision_frame, list(bounding_boxes),
+                                                                                face_angles)
+    for index, face_landmark_score_68 in enumerate(face_landmark_scores_68):
         if face_landmark_score_68 > state_manager.get_item('face_landmarker_score'):
-            face_landmark_5_68 = convert_to_face_landmark_5(face_landmark_68)
-
+            face_landmarks_5_68[index] = convert_to_face_landmark_5(face_landmarks_68[index])
+
+    face_identities = [None] * len(keep_indices)
+
+    if is_face_tracker_identity:
+        face_identities = find_face_tracker_identities(frame_number, list(bounding_boxes), face_landmarks_5_68,
+                                                       face_tracker_identity_interval)
+    embed_indices = [index for index, face_identity in enumerate(face_identities) if not face_identity]
+
+    if embed_indices:
+        embed_face_landmarks_5 = [face_landmarks_5_68[index] for index in embed_indices]
+        embeddings, normed_embeddings = calc_embeddings(vision_frame, embed_face_landmarks_5)
+        face_classifications = classify_faces(vision_frame, embed_face_landmarks_5)
+
+        for index, embedding, normed_embedding, (gender, age, race) in zip(embed_indices, embeddings,
+                                                                           normed_embeddings, face_classifications):
+            face_identities[index] = \
+                {
+                    'embedding': embedding,
+                    'normed_embedding': normed_embedding,
+                    'gender': gender,
+                    'age': age,
+                    'race': race
+                }
+
+    for index, face_identity in enumerate(face_identities):
         face_landmark_set: FaceLandmarkSet = \
             {
-                '5': face_landmark_5,
-                '5/68': face_landmark_5_68,
-                '68': face_landmark_68,
-                '68/5': face_landmark_68_5
+                '5': face_landmarks_5[index],
+                '5/68': face_landmarks_5_68[index],
+                '68': face_landmarks_68[index],
+                '68/5': face_landmarks_68_5[index]
             }
         face_score_set: FaceScoreSet = \
             {
-                'detector': face_score,
-                'landmarker': face_landmark_score_68
+                'detector': face_scores[index],
+                'landmarker': face_landmark_scores_68[index]
             }
-        embedding, normed_embedding = calc_embedding(vision_frame, face_landmark_set.get('5/68'))
-        gender, age, race = classify_face(vision_frame, face_landmark_set.get('5/68'))
-        faces.append(Face(
-            bounding_box=bounding_box,
+        face = Face(
+            bounding_box=bounding_boxes[index],
             score_set=face_score_set,
             landmark_set=face_landmark_set,
-            angle=face_angle,
-            embedding=embedding,
-            normed_embedding=normed_embedding,
-            gender=gender,
-            age=age,
-            race=race
-        ))
+            angle=face_angles[index],
+            embedding=face_identity.get('embedding'),
+            normed_embedding=face_identity.get('normed_embedding'),
+            gender=face_identity.get('gender'),
+            age=face_identity.get('age'),
+            race=face_identity.get('race')
+        )
+        if is_face_tracker_identity and index in embed_indices:
+            set_face_tracker_identity(frame_number, face)
+        faces.append(face)
     return faces
 
 
@@ -101,7 +137,7 @@ def get_average_face(faces: List[Face]) -> Optional[Face]:
     return None
 
 
-def get_many_faces(vision_frames: List[VisionFrame]) -> List[Face]:
+def get_many_faces(vision_frames: List[VisionFrame], frame_number: Optional[int] = None) -> List[Face]:
     many_faces: List[Face] = []
 
     for vision_frame in vision_frames:
@@ -110,23 +146,12 @@ def get_many_faces(vision_frames: List[VisionFrame]) -> List[Face]:
             if static_faces:
                 many_faces.extend(static_faces)
             else:
-                all_bounding_boxes = []
-                all_face_scores = []
-                all_face_landmarks_5 = []
-
-                for face_detector_angle in state_manager.get_item('face_detector_angles'):
-                    if face_detector_angle == 0:
-                        bounding_boxes, face_scores, face_landmarks_5 = detect_faces(vision_frame)
-                    else:
-                        bounding_boxes, face_scores, face_landmarks_5 = detect_rotated_faces(vision_frame,
-                                                                                             face_detector_angle)
-                    all_bounding_boxes.extend(bounding_boxes)
-                    all_face_scores.extend(face_scores)
-                    all_face_landmarks_5.extend(face_landmarks_5)
-
-                if all_bounding_boxes and all_face_scores and all_face_landmarks_5 and state_manager.get_item(
-                        'face_detector_score') > 0:
-                    faces = create_faces(vision_frame, all_bounding_boxes, all_face_scores, all_face_landmarks_5)
+                target_path = state_manager.get_item('target_path') if isinstance(frame_number, int) else None
+                bounding_boxes, face_scores, face_landmarks_5 = detect_faces_by_angles(vision_frame, target_path)
+
+                # the detections of all models and angles go through a single nms
+                if face_scores.size and state_manager.get_item('face_detector_score') > 0:
+                    faces = create_faces(vision_frame, bounding_boxes, face_scores, face_landmarks_5, frame_number)
 
                     if faces:
                         many_faces.extend(faces)
@@ -134,6 +159,54 @@ def get_many_faces(vision_frames: List[VisionFrame]) -> List[Face]:
     return many_faces
 
 
+def get_frame_faces(vision_frame: VisionFrame, frame_number: Optional[int]) -> List[Face]:
+    if not isinstance(frame_number, int) or frame_number < 0:
+        return get_many_faces([vision_frame])
+    frame_faces = get_static_frame_faces(frame_number)
+
+    if frame_faces is None:
+        faces = get_tracked_faces(vision_frame, frame_number)
+        set_static_frame_faces(frame_number, vision_frame, faces)
+        return faces
+    frame_height, frame_width = frame_faces.get('frame_size')
+    vision_frame_height, vision_frame_width = vision_frame.shape[:2]
+    if (frame_height, frame_width) == (vision_frame_height, vision_frame_width):
+        return frame_faces.get('faces')
+    return [scale_face(face, vision_frame_width / frame_width, vision_frame_height / frame_height) for face in
+            frame_faces.get('faces')]
+
+
+def get_tracked_faces(vision_frame: VisionFrame, frame_number: int) -> List[Face]:
+    face_tracker_interval = state_manager.get_item('face_tracker_interval')
+    scope_face_tracker(state_manager.get_item('target_path'))
+
+    if face_tracker_interval and face_tracker_interval > 1:
+        face_tracker_anchor = find_face_tracker_anchor(frame_number, face_tracker_interval)
+
+        # the faces of the anchor are moved along the optical flow, a lost face triggers a new detection
+        if face_tracker_anchor:
+            faces = track_faces(face_tracker_anchor, vision_frame, state_manager.get_item('face_tracker_score'))
+            if faces is not None:
+                return faces
+        faces = get_many_faces([vision_frame], frame_number)
+        set_face_tracker_anchor(frame_number, vision_frame, faces)
+        return faces
+    return get_many_faces([vision_frame], frame_number)
+
+
+def scale_face(face: Face, scale_x: float, scale_y: float) -> Face:
+    scale = numpy.array([scale_x, scale_y])
+    bounding_box = face.bounding_box * numpy.tile(scale, 2)
+    face_landmark_set: FaceLandmarkSet = \
+        {
+            '5': face.landmark_set.get('5') * scale,
+            '5/68': face.landmark_set.get('5/68') * scale,
+            '68': face.landmark_set.get('68') * scale,
+            '68/5': face.landmark_set.get('68/5') * scale
+        }
+    return face._replace(bounding_box=bounding_box, landmark_set=face_landmark_set)
+
+
 def get_avg_faces():
     global AVG_FACE_1, AVG_FACE_2, SOURCE_FRAMES_1, SOURCE_FRAMES_2
     source_paths = state_manager.get_item('source_paths')
@@ -2,10 +2,11 @@ from typing import List, Tuple
 
 import numpy
 
-from facefusion import inference_manager
+from facefusion import inference_manager, state_manager
 from facefusion.download import conditional_download_hashes, conditional_download_sources
 from facefusion.face_helper import warp_face_by_face_landmark_5
 from facefusion.filesystem import resolve_relative_path
+from facefusion.inference_batcher import detect_batch_size, run_stacked_inference
 from facefusion.thread_helper import conditional_thread_semaphore
 from facefusion.typing import Age, FaceLandmark5, Gender, InferencePool, ModelOptions, ModelSet, Race, VisionFrame
 
@@ -60,33 +61,45 @@ def pre_check() -> bool:
 
 
 def classify_face(temp_vision_frame: VisionFrame, face_landmark_5: FaceLandmark5) -> Tuple[Gender, Age, Race]:
+    return classify_faces(temp_vision_frame, [face_landmark_5])[0]
+
+
+def classify_faces(temp_vision_frame: VisionFrame, face_landmarks_5: List[FaceLandmark5]) -> List[
+    Tuple[Gender, Age, Race]]:
     model_template = get_model_options().get('template')
     model_size = get_model_options().get('size')
     model_mean = get_model_options().get('mean')
     model_standard_deviation = get_model_options().get('standard_deviation')
-    crop_vision_frame, _ = warp_face_by_face_landmark_5(temp_vision_frame, face_landmark_5, model_template, model_size)
-    crop_vision_frame = crop_vision_frame.astype(numpy.float32)[:, :, ::-1] / 255
-    crop_vision_frame -= model_mean
-    crop_vision_frame /= model_standard_deviation
-    crop_vision_frame = crop_vision_frame.transpose(2, 0, 1)
-    crop_vision_frame = numpy.expand_dims(crop_vision_frame, axis=0)
-    gender_id, age_id, race_id = forward(crop_vision_frame)
-    gender = categorize_gender(gender_id[0])
-    age = categorize_age(age_id[0])
-    race = categorize_race(race_id[0])
-    return gender, age, race
+    crop_vision_frames = []
+
+    for face_landmark_5 in face_landmarks_5:
+        crop_vision_frame, _ = warp_face_by_face_landmark_5(temp_vision_frame, face_landmark_5, model_template,
+                                                            model_size)
+        crop_vision_frame = crop_vision_frame.astype(numpy.float32)[:, :, ::-1] / 255
+        crop_vision_frame -= model_mean
+        crop_vision_frame /= model_standard_deviation
+        crop_vision_frame = crop_vision_frame.transpose(2, 0, 1)
+        crop_vision_frames.append(crop_vision_frame)
+    gender_ids, age_ids, race_ids = forward_faces(numpy.stack(crop_vision_frames))
+    return [(categorize_gender(gender_id), categorize_age(age_id), categorize_race(race_id)) for
+            gender_id, age_id, race_id in zip(gender_ids, age_ids, race_ids)]
 
 
 def forward(crop_vision_frame: VisionFrame) -> Tuple[List[int], List[int], List[int]]:
+    return forward_faces(crop_vision_frame)
+
+
+def forward_faces(crop_vision_frames: VisionFrame) -> Tuple[List[int], List[int], List[int]]:
     face_classifier = get_inference_pool().get('face_classifier')
+    face_classifier_batch_size = detect_batch_size(face_classifier, state_manager.get_item('execution_providers'))
 
     with conditional_thread_semaphore():
-        race_id, gender_id, age_id = face_classifier.run(None,
-                                                         {
-                                                             'input': crop_vision_frame
-                                                         })
+        race_ids, gender_ids, age_ids = run_stacked_inference(face_classifier,
+                                                              {
+                                                                  'input': crop_vision_frames
+                                                              }, {}, face_classifier_batch_size)
 
-    return gender_id, age_id, race_id
+    return gender_ids, age_ids, race_ids
 
 
 def categorize_gender(gender_id: int) -> Gender:
@@ -1,16 +1,18 @@
-from typing import List, Tuple
+import threading
+from typing import Dict, List, Optional, Tuple
 
 import cv2
 import numpy
 
 from facefusion import inference_manager, state_manager
 from facefusion.download import conditional_download_hashes, conditional_download_sources
-from facefusion.face_helper import create_rotated_matrix_and_size, create_static_anchors, distance_to_bounding_box, \
-    distance_to_face_landmark_5, normalize_bounding_box, transform_bounding_box, transform_points
+from facefusion.face_helper import apply_nms, create_rotated_matrix_and_size, create_static_anchors, \
+    distance_to_bounding_box, distance_to_face_landmark_5, get_nms_threshold, normalize_bounding_boxes, \
+    transform_bounding_boxes, transform_points
 from facefusion.filesystem import resolve_relative_path
-from facefusion.thread_helper import thread_semaphore
-from facefusion.typing import Angle, BoundingBox, Detection, DownloadSet, FaceLandmark5, InferencePool, ModelSet, Score, \
-    VisionFrame
+from facefusion.thread_helper import inference_semaphore
+from facefusion.typing import Angle, BoundingBoxes, Detection, DownloadSet, FaceDetectorAngleMemory, \
+    FaceDetectorStatistics, FaceLandmarks5, FaceScores, InferencePool, ModelSet, VisionFrame
 from facefusion.vision import resize_frame_resolution, unpack_resolution
 
 MODEL_SET: ModelSet = \
@@ -74,6 +76,21 @@ MODEL_SET: ModelSet = \
             }
     }
 
+FACE_DETECTOR_ANGLE_SCORE = 0.7
+FACE_DETECTOR_LOCK: threading.Lock = threading.Lock()
+FACE_DETECTOR_ANGLE_MEMORY: FaceDetectorAngleMemory = \
+    {
+        'angle': 0,
+        'face_total': 1
+    }
+FACE_DETECTOR_ANGLE_MEMORIES: Dict[str, FaceDetectorAngleMemory] = {}
+FACE_DETECTOR_STATISTICS: FaceDetectorStatistics = \
+    {
+        'face_detector_angle_passes': {},
+        'face_detector_angle_hits': {},
+        'face_detector_angle_skips': 0
+    }
+
 
 def get_inference_pool() -> InferencePool:
     _, model_sources = collect_model_downloads()
@@ -110,139 +127,206 @@ def pre_check() -> bool:
         download_directory_path, model_sources)
 
 
-def detect_faces(vision_frame: VisionFrame) -> Tuple[List[BoundingBox], List[Score], List[FaceLandmark5]]:
-    all_bounding_boxes: List[BoundingBox] = []
-    all_face_scores: List[Score] = []
-    all_face_landmarks_5: List[FaceLandmark5] = []
+def get_face_detector_statistics() -> FaceDetectorStatistics:
+    return FACE_DETECTOR_STATISTICS
+
+
+def detect_faces_by_angles(vision_frame: VisionFrame, target_path: Optional[str] = None) -> Tuple[
+    BoundingBoxes, FaceScores, FaceLandmarks5]:
+    all_bounding_boxes: List[BoundingBoxes] = []
+    all_face_scores: List[FaceScores] = []
+    all_face_landmarks_5: List[FaceLandmarks5] = []
+    face_detector_angles = state_manager.get_item('face_detector_angles')
+    is_adaptive = state_manager.get_item('face_detector_angle_strategy') == 'adaptive'
+    face_detector_angle_score = max(FACE_DETECTOR_ANGLE_SCORE, state_manager.get_item('face_detector_score'))
+    face_totals = {}
+
+    # the angles of one target must never reorder the angles of another target or a source image
+    with FACE_DETECTOR_LOCK:
+        face_detector_angle_memory = FACE_DETECTOR_ANGLE_MEMORIES.get(target_path, FACE_DETECTOR_ANGLE_MEMORY).copy()
+
+    if is_adaptive:
+        face_detector_angles = sort_face_detector_angles(face_detector_angles, face_detector_angle_memory.get('angle'))
+
+    for index, face_detector_angle in enumerate(face_detector_angles):
+        if face_detector_angle == 0:
+            bounding_boxes, face_scores, face_landmarks_5 = detect_faces(vision_frame)
+        else:
+            bounding_boxes, face_scores, face_landmarks_5 = detect_rotated_faces(vision_frame, face_detector_angle)
+        all_bounding_boxes.append(bounding_boxes)
+        all_face_scores.append(face_scores)
+        all_face_landmarks_5.append(face_landmarks_5)
+        face_totals = count_face_totals(face_detector_angles[:index + 1], all_bounding_boxes, all_face_scores,
+                                        face_detector_angle_score)
+
+        # the remaining angles are skipped once as many confident faces as in the last frame are found
+        if is_adaptive and sum(face_totals.values()) >= face_detector_angle_memory.get('face_total'):
+            with FACE_DETECTOR_LOCK:
+                FACE_DETECTOR_STATISTICS['face_detector_angle_skips'] += len(face_detector_angles) - index - 1
+            break
+
+    for face_detector_angle, face_total in face_totals.items():
+        count_face_detector_angle(face_detector_angle, face_total)
+    if is_adaptive and target_path:
+        remember_face_detector_angle(target_path, face_totals)
+    return concat_detections(all_bounding_boxes, all_face_scores, all_face_landmarks_5)
+
+
+def count_face_totals(face_detector_angles: List[Angle], all_bounding_boxes: List[BoundingBoxes],
+                      all_face_scores: List[FaceScores], face_detector_angle_score: float) -> Dict[Angle, int]:
+    face_totals = {face_detector_angle: 0 for face_detector_angle in face_detector_angles}
+    bounding_boxes = numpy.concatenate([numpy.empty((0, 4))] + all_bounding_boxes)
+    face_scores = numpy.concatenate([numpy.empty(0)] + all_face_scores)
+
+    if face_scores.size:
+        face_angles = numpy.concatenate([numpy.full(len(face_scores), face_detector_angle) for face_detector_angle,
+                                         face_scores in zip(face_detector_angles, all_face_scores)])
+        nms_threshold = get_nms_threshold(state_manager.get_item('face_detector_model'),
+                                          state_manager.get_item('face_detector_angles'))
+        keep_indices = apply_nms(bounding_boxes, face_scores, face_detector_angle_score, nms_threshold)
+        keep_indices = numpy.array(keep_indices, dtype=int).ravel()
+
+        # a face found at several angles survives the nms once and counts for the angle with the best score
+        for face_angle in face_angles[keep_indices]:
+            face_totals[int(face_angle)] += 1
+    return face_totals
+
+
+def sort_face_detector_angles(face_detector_angles: List[Angle], face_detector_angle: Angle) -> List[Angle]:
+    if face_detector_angle in face_detector_angles:
+        return [face_detector_angle] + [angle for angle in face_detector_angles if angle != face_detector_angle]
+    return face_detector_angles
+
+
+def remember_face_detector_angle(target_path: str, face_totals: Dict[Angle, int]) -> None:
+    face_detector_angle = max(face_totals, key=face_totals.get)
+
+    with FACE_DETECTOR_LOCK:
+        face_detector_angle_memory = FACE_DETECTOR_ANGLE_MEMORIES.setdefault(target_path,
+                                                                              FACE_DETECTOR_ANGLE_MEMORY.copy())
+        if face_totals.get(face_detector_angle):
+            face_detector_angle_memory['angle'] = face_detector_angle
+        face_detector_angle_memory['face_total'] = max(sum(face_totals.values()), 1)
+
+
+def clear_face_detector_angle_memory() -> None:
+    with FACE_DETECTOR_LOCK:
+        FACE_DETECTOR_ANGLE_MEMORIES.clear()
+
+
+def count_face_detector_angle(face_detector_angle: Angle, face_total: int) -> None:
+    with FACE_DETECTOR_LOCK:
+        face_detector_angle_passes = FACE_DETECTOR_STATISTICS.get('face_detector_angle_passes')
+        face_detector_angle_hits = FACE_DETECTOR_STATISTICS.get('face_detector_angle_hits')
+        face_detector_angle_passes[face_detector_angle] = face_detector_angle_passes.get(face_detector_angle, 0) + 1
+        if face_total:
+            face_detector_angle_hits[face_detector_angle] = face_detector_angle_hits.get(face_detector_angle, 0) + 1
+
+
+def detect_faces(vision_frame: VisionFrame) -> Tuple[BoundingBoxes, FaceScores, FaceLandmarks5]:
+    all_bounding_boxes: List[BoundingBoxes] = []
+    all_face_scores: List[FaceScores] = []
+    all_face_landmarks_5: List[FaceLandmarks5] = []
 
     if state_manager.get_item('face_detector_model') in ['many', 'retinaface']:
         bounding_boxes, face_scores, face_landmarks_5 = detect_with_retinaface(vision_frame, state_manager.get_item(
             'face_detector_size'))
-        all_bounding_boxes.extend(bounding_boxes)
-        all_face_scores.extend(face_scores)
-        all_face_landmarks_5.extend(face_landmarks_5)
+        all_bounding_boxes.append(bounding_boxes)
+        all_face_scores.append(face_scores)
+        all_face_landmarks_5.append(face_landmarks_5)
 
     if state_manager.get_item('face_detector_model') in ['many', 'scrfd']:
         bounding_boxes, face_scores, face_landmarks_5 = detect_with_scrfd(vision_frame,
                                                                           state_manager.get_item('face_detector_size'))
-        all_bounding_boxes.extend(bounding_boxes)
-        all_face_scores.extend(face_scores)
-        all_face_landmarks_5.extend(face_landmarks_5)
+        all_bounding_boxes.append(bounding_boxes)
+        all_face_scores.append(face_scores)
+        all_face_landmarks_5.append(face_landmarks_5)
 
     if state_manager.get_item('face_detector_model') in ['many', 'yoloface']:
         bounding_boxes, face_scores, face_landmarks_5 = detect_with_yoloface(vision_frame, state_manager.get_item(
             'face_detector_size'))
-        all_bounding_boxes.extend(bounding_boxes)
-        all_face_scores.extend(face_scores)
-        all_face_landmarks_5.extend(face_landmarks_5)
+        all_bounding_boxes.append(bounding_boxes)
+        all_face_scores.append(face_scores)
+        all_face_landmarks_5.append(face_landmarks_5)
 
-    all_bounding_boxes = [normalize_bounding_box(all_bounding_box) for all_bounding_box in all_bounding_boxes]
-    return all_bounding_boxes, all_face_scores, all_face_landmarks_5
+    bounding_boxes, face_scores, face_landmarks_5 = concat_detections(all_bounding_boxes, all_face_scores,
+                                                                      all_face_landmarks_5)
+    return normalize_bounding_boxes(bounding_boxes), face_scores, face_landmarks_5
 
 
-def detect_rotated_faces(vision_frame: VisionFrame, angle: Angle) -> Tuple[
-    List[BoundingBox], List[Score], List[FaceLandmark5]]:
+def detect_rotated_faces(vision_frame: VisionFrame, angle: Angle) -> Tuple[BoundingBoxes, FaceScores, FaceLandmarks5]:
     rotated_matrix, rotated_size = create_rotated_matrix_and_size(angle, vision_frame.shape[:2][::-1])
     rotated_vision_frame = cv2.warpAffine(vision_frame, rotated_matrix, rotated_size)
     rotated_inverse_matrix = cv2.invertAffineTransform(rotated_matrix)
     bounding_boxes, face_scores, face_landmarks_5 = detect_faces(rotated_vision_frame)
-    bounding_boxes = [transform_bounding_box(bounding_box, rotated_inverse_matrix) for bounding_box in bounding_boxes]
-    face_landmarks_5 = [transform_points(face_landmark_5, rotated_inverse_matrix) for face_landmark_5 in
-                        face_landmarks_5]
+    bounding_boxes = transform_bounding_boxes(bounding_boxes, rotated_inverse_matrix)
+    face_landmarks_5 = transform_points(face_landmarks_5, rotated_inverse_matrix).reshape(-1, 5, 2)
+    return bounding_boxes, face_scores, face_landmarks_5
+
+
+def concat_detections(all_bounding_boxes: List[BoundingBoxes], all_face_scores: List[FaceScores],
+                      all_face_landmarks_5: List[FaceLandmarks5]) -> Tuple[BoundingBoxes, FaceScores, FaceLandmarks5]:
+    bounding_boxes = numpy.concatenate([numpy.empty((0, 4))] + all_bounding_boxes)
+    face_scores = numpy.concatenate([numpy.empty(0)] + all_face_scores)
+    face_landmarks_5 = numpy.concatenate([numpy.empty((0, 5, 2))] + all_face_landmarks_5)
     return bounding_boxes, face_scores, face_landmarks_5
 
 
 def detect_with_retinaface(vision_frame: VisionFrame, face_detector_size: str) -> Tuple[
-    List[BoundingBox], List[Score], List[FaceLandmark5]]:
-    bounding_boxes = []
-    face_scores = []
-    face_landmarks_5 = []
-    feature_strides = [8, 16, 32]
-    feature_map_channel = 3
-    anchor_total = 2
+    BoundingBoxes, FaceScores, FaceLandmarks5]:
     face_detector_width, face_detector_height = unpack_resolution(face_detector_size)
     temp_vision_frame = resize_frame_resolution(vision_frame, (face_detector_width, face_detector_height))
     ratio_height = vision_frame.shape[0] / temp_vision_frame.shape[0]
     ratio_width = vision_frame.shape[1] / temp_vision_frame.shape[1]
     detect_vision_frame = prepare_detect_frame(temp_vision_frame, face_detector_size)
     detection = forward_with_retinaface(detect_vision_frame)
-
-    for index, feature_stride in enumerate(feature_strides):
-        keep_indices = numpy.where(detection[index] >= state_manager.get_item('face_detector_score'))[0]
-
-        if numpy.any(keep_indices):
-            stride_height = face_detector_height // feature_stride
-            stride_width = face_detector_width // feature_stride
-            anchors = create_static_anchors(feature_stride, anchor_total, stride_height, stride_width)
-            bounding_box_raw = detection[index + feature_map_channel] * feature_stride
-            face_landmark_5_raw = detection[index + feature_map_channel * 2] * feature_stride
-
-            for bounding_box in distance_to_bounding_box(anchors, bounding_box_raw)[keep_indices]:
-                bounding_boxes.append(numpy.array(
-                    [
-                        bounding_box[0] * ratio_width,
-                        bounding_box[1] * ratio_height,
-                        bounding_box[2] * ratio_width,
-                        bounding_box[3] * ratio_height,
-                    ]))
-
-            for score in detection[index][keep_indices]:
-                face_scores.append(score[0])
-
-            for face_landmark_5 in distance_to_face_landmark_5(anchors, face_landmark_5_raw)[keep_indices]:
-                face_landmarks_5.append(face_landmark_5 * [ratio_width, ratio_height])
-
-    return bounding_boxes, face_scores, face_landmarks_5
+    return decode_anchor_detection(detection, face_detector_size, ratio_width, ratio_height)
 
 
 def detect_with_scrfd(vision_frame: VisionFrame, face_detector_size: str) -> Tuple[
-    List[BoundingBox], List[Score], List[FaceLandmark5]]:
-    bounding_boxes = []
-    face_scores = []
-    face_landmarks_5 = []
-    feature_strides = [8, 16, 32]
-    feature_map_channel = 3
-    anchor_total = 2
+    BoundingBoxes, FaceScores, FaceLandmarks5]:
     face_detector_width, face_detector_height = unpack_resolution(face_detector_size)
     temp_vision_frame = resize_frame_resolution(vision_frame, (face_detector_width, face_detector_height))
     ratio_height = vision_frame.shape[0] / temp_vision_frame.shape[0]
     ratio_width = vision_frame.shape[1] / temp_vision_frame.shape[1]
     detect_vision_frame = prepare_detect_frame(temp_vision_frame, face_detector_size)
     detection = forward_with_scrfd(detect_vision_frame)
+    return decode_anchor_detection(detection, face_detector_size, ratio_width, ratio_height)
+
+
+def decode_anchor_detection(detection: Detection, face_detector_size: str, ratio_width: float,
+                            ratio_height: float) -> Tuple[BoundingBoxes, FaceScores, FaceLandmarks5]:
+    all_bounding_boxes = []
+    all_face_scores = []
+    all_face_landmarks_5 = []
+    feature_strides = [8, 16, 32]
+    feature_map_channel = 3
+    anchor_total = 2
+    ratio = numpy.array([ratio_width, ratio_height])
+    face_detector_width, face_detector_height = unpack_resolution(face_detector_size)
 
     for index, feature_stride in enumerate(feature_strides):
-        keep_indices = numpy.where(detection[index] >= state_manager.get_item('face_detector_score'))[0]
+        keep_indices = numpy.where(detection[index][:, 0] >= state_manager.get_item('face_detector_score'))[0]
 
-        if numpy.any(keep_indices):
+        if keep_indices.size:
             stride_height = face_detector_height // feature_stride
             stride_width = face_detector_width // feature_stride
-            anchors = create_static_anchors(feature_stride, anchor_total, stride_height, stride_width)
-            bounding_box_raw = detection[index + feature_map_channel] * feature_stride
-            face_landmark_5_raw = detection[index + feature_map_channel * 2] * feature_stride
+            anchors = create_static_anchors(feature_stride, anchor_total, stride_height, stride_width)[keep_indices]
+            bounding_box_raw = detection[index + feature_map_channel][keep_indices] * feature_stride
+            face_landmark_5_raw = detection[index + feature_map_channel * 2][keep_indices] * feature_stride
 
-            for bounding_box in distance_to_bounding_box(anchors, bounding_box_raw)[keep_indices]:
-                bounding_boxes.append(numpy.array(
-                    [
-                        bounding_box[0] * ratio_width,
-                        bounding_box[1] * ratio_height,
-                        bounding_box[2] * ratio_width,
-                        bounding_box[3] * ratio_height,
-                    ]))
+            # decode only the anchors above the score and scale all of them at once
+            bounding_boxes = distance_to_bounding_box(anchors, bounding_box_raw) * numpy.tile(ratio, 2)
+            face_landmarks_5 = distance_to_face_landmark_5(anchors, face_landmark_5_raw) * ratio
+            all_bounding_boxes.append(bounding_boxes)
+            all_face_scores.append(detection[index][keep_indices, 0])
+            all_face_landmarks_5.append(face_landmarks_5)
 
-            for score in detection[index][keep_indices]:
-                face_scores.append(score[0])
-
-            for face_landmark_5 in distance_to_face_landmark_5(anchors, face_landmark_5_raw)[keep_indices]:
-                face_landmarks_5.append(face_landmark_5 * [ratio_width, ratio_height])
-
-    return bounding_boxes, face_scores, face_landmarks_5
+    return concat_detections(all_bounding_boxes, all_face_scores, all_face_landmarks_5)
 
 
 def detect_with_yoloface(vision_frame: VisionFrame, face_detector_size: str) -> Tuple[
-    List[BoundingBox], List[Score], List[FaceLandmark5]]:
-    bounding_boxes = []
-    face_scores = []
-    face_landmarks_5 = []
+    BoundingBoxes, FaceScores, FaceLandmarks5]:
     face_detector_width, face_detector_height = unpack_resolution(face_detector_size)
     temp_vision_frame = resize_frame_resolution(vision_frame, (face_detector_width, face_detector_height))
     ratio_height = vision_frame.shape[0] / temp_vision_frame.shape[0]
@@ -251,35 +335,22 @@ def detect_with_yoloface(vision_frame: VisionFrame, face_detector_size: str) ->
     detection = forward_with_yoloface(detect_vision_frame)
     detection = numpy.squeeze(detection).T
     bounding_box_raw, score_raw, face_landmark_5_raw = numpy.split(detection, [4, 5], axis=1)
-    keep_indices = numpy.where(score_raw > state_manager.get_item('face_detector_score'))[0]
-
-    if numpy.any(keep_indices):
-        bounding_box_raw, face_landmark_5_raw, score_raw = bounding_box_raw[keep_indices], face_landmark_5_raw[
-            keep_indices], score_raw[keep_indices]
-
-        for bounding_box in bounding_box_raw:
-            bounding_boxes.append(numpy.array(
-                [
-                    (bounding_box[0] - bounding_box[2] / 2) * ratio_width,
-                    (bounding_box[1] - bounding_box[3] / 2) * ratio_height,
-                    (bounding_box[0] + bounding_box[2] / 2) * ratio_width,
-                    (bounding_box[1] + bounding_box[3] / 2) * ratio_height,
-                ]))
-
-        face_scores = score_raw.ravel().tolist()
-        face_landmark_5_raw[:, 0::3] = (face_landmark_5_raw[:, 0::3]) * ratio_width
-        face_landmark_5_raw[:, 1::3] = (face_landmark_5_raw[:, 1::3]) * ratio_height
-
-        for face_landmark_5 in face_landmark_5_raw:
-            face_landmarks_5.append(numpy.array(face_landmark_5.reshape(-1, 3)[:, :2]))
-
-    return bounding_boxes, face_scores, face_landmarks_5
+    keep_indices = numpy.where(score_raw[:, 0] > state_manager.get_item('face_detector_score'))[0]
+    bounding_box_raw = bounding_box_raw[keep_indices]
+    bounding_boxes = numpy.concatenate(
+        [
+            bounding_box_raw[:, :2] - bounding_box_raw[:, 2:] / 2,
+            bounding_box_raw[:, :2] + bounding_box_raw[:, 2:] / 2
+        ], axis=1) * numpy.tile([ratio_width, ratio_height], 2)
+    face_scores = score_raw[keep_indices, 0]
+    face_landmarks_5 = face_landmark_5_raw[keep_indices].reshape(-1, 5, 3)[:, :, :2] * [ratio_width, ratio_height]
+    return concat_detections([bounding_boxes], [face_scores], [face_landmarks_5])
 
 
 def forward_with_retinaface(detect_vision_frame: VisionFrame) -> Detection:
     face_detector = get_inference_pool().get('retinaface')
 
-    with thread_semaphore():
+    with inference_semaphore(face_detector):
         detection = face_detector.run(None,
                                       {
                                           'input': detect_vision_frame
@@ -291,7 +362,7 @@ def forward_with_retinaface(detect_vision_frame: VisionFrame) -> Detection:
 def forward_with_scrfd(detect_vision_frame: VisionFrame) -> Detection:
     face_detector = get_inference_pool().get('scrfd')
 
-    with thread_semaphore():
+    with inference_semaphore(face_detector):
         detection = face_detector.run(None,
                                       {
                                           'input': detect_vision_frame
@@ -303,7 +374,7 @@ def forward_with_scrfd(detect_vision_frame: VisionFrame) -> Detection:
 def forward_with_yoloface(detect_vision_frame: VisionFrame) -> Detection:
     face_detector = get_inference_pool().get('yoloface')
 
-    with thread_semaphore():
+    with inference_semaphore(face_detector):
         detection = face_detector.run(None,
                                       {
                                           'input': detect_vision_frame
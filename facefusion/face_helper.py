@@ -5,8 +5,8 @@ import cv2
 import numpy
 from cv2.typing import Size
 
-from facefusion.typing import Anchors, Angle, BoundingBox, Distance, FaceDetectorModel, FaceLandmark5, FaceLandmark68, \
-    Mask, Matrix, Points, Scale, Score, Translation, VisionFrame, WarpTemplate, WarpTemplateSet
+from facefusion.typing import Anchors, Angle, BoundingBox, BoundingBoxes, Distance, FaceDetectorModel, FaceLandmark5, \
+    FaceLandmark68, FaceScores, Mask, Matrix, Points, Scale, Translation, VisionFrame, WarpTemplate, WarpTemplateSet
 
 WARP_TEMPLATES: WarpTemplateSet = \
     {
@@ -85,20 +85,48 @@ def warp_face_by_translation(temp_vision_frame: VisionFrame, translation: Transl
 
 def paste_back(temp_vision_frame: VisionFrame, crop_vision_frame: VisionFrame, crop_mask: Mask,
                affine_matrix: Matrix) -> VisionFrame:
-    inverse_matrix = cv2.invertAffineTransform(affine_matrix)
-    temp_size = temp_vision_frame.shape[:2][::-1]
-    inverse_mask = cv2.warpAffine(crop_mask, inverse_matrix, temp_size).clip(0, 1)
-    inverse_vision_frame = cv2.warpAffine(crop_vision_frame, inverse_matrix, temp_size, borderMode=cv2.BORDER_REPLICATE)
     paste_vision_frame = temp_vision_frame.copy()
-    paste_vision_frame[:, :, 0] = inverse_mask * inverse_vision_frame[:, :, 0] + (1 - inverse_mask) * temp_vision_frame[
-                                                                                                      :, :, 0]
-    paste_vision_frame[:, :, 1] = inverse_mask * inverse_vision_frame[:, :, 1] + (1 - inverse_mask) * temp_vision_frame[
-                                                                                                      :, :, 1]
-    paste_vision_frame[:, :, 2] = inverse_mask * inverse_vision_frame[:, :, 2] + (1 - inverse_mask) * temp_vision_frame[
-                                                                                                      :, :, 2]
+    paste_back_area(paste_vision_frame, crop_vision_frame, crop_mask, affine_matrix)
     return paste_vision_frame
 
 
+def paste_back_many(temp_vision_frame: VisionFrame, crop_vision_frames: List[VisionFrame], crop_masks: List[Mask],
+                    affine_matrices: List[Matrix]) -> VisionFrame:
+    paste_vision_frame = temp_vision_frame.copy()
+
+    # the frame is copied once and every crop is pasted into it in order
+    for crop_vision_frame, crop_mask, affine_matrix in zip(crop_vision_frames, crop_masks, affine_matrices):
+        paste_back_area(paste_vision_frame, crop_vision_frame, crop_mask, affine_matrix)
+    return paste_vision_frame
+
+
+def paste_back_area(paste_vision_frame: VisionFrame, crop_vision_frame: VisionFrame, crop_mask: Mask,
+                    affine_matrix: Matrix) -> None:
+    inverse_matrix = cv2.invertAffineTransform(affine_matrix)
+    x1, y1, x2, y2 = calc_paste_area(paste_vision_frame, crop_vision_frame, inverse_matrix)
+
+    if x2 > x1 and y2 > y1:
+        # warp and blend only the area the crop covers, the remaining frame stays untouched
+        inverse_matrix[:, 2] -= [x1, y1]
+        paste_size = (x2 - x1, y2 - y1)
+        inverse_mask = cv2.warpAffine(crop_mask, inverse_matrix, paste_size).clip(0, 1)
+        inverse_mask = numpy.expand_dims(inverse_mask, axis=-1)
+        inverse_vision_frame = cv2.warpAffine(crop_vision_frame, inverse_matrix, paste_size,
+                                              borderMode=cv2.BORDER_REPLICATE)
+        temp_paste_frame = paste_vision_frame[y1:y2, x1:x2]
+        paste_vision_frame[y1:y2, x1:x2] = inverse_mask * inverse_vision_frame + (1 - inverse_mask) * temp_paste_frame
+
+
+def calc_paste_area(temp_vision_frame: VisionFrame, crop_vision_frame: VisionFrame,
+                    inverse_matrix: Matrix) -> Tuple[int, int, int, int]:
+    crop_height, crop_width = crop_vision_frame.shape[:2]
+    temp_height, temp_width = temp_vision_frame.shape[:2]
+    paste_bounding_box = transform_bounding_box(numpy.array([0, 0, crop_width, crop_height]), inverse_matrix)
+    x1, y1 = numpy.floor(paste_bounding_box[:2]).astype(int) - 1
+    x2, y2 = numpy.ceil(paste_bounding_box[2:]).astype(int) + 1
+    return int(max(x1, 0)), int(max(y1, 0)), int(min(x2, temp_width)), int(min(y2, temp_height))
+
+
 @lru_cache(maxsize=None)
 def create_static_anchors(feature_stride: int, anchor_total: int, stride_height: int, stride_width: int) -> Anchors:
     y, x = numpy.mgrid[:stride_height, :stride_width][::-1]
@@ -130,6 +158,27 @@ def normalize_bounding_box(bounding_box: BoundingBox) -> BoundingBox:
     return numpy.array([x1, y1, x2, y2])
 
 
+def normalize_bounding_boxes(bounding_boxes: BoundingBoxes) -> BoundingBoxes:
+    return numpy.concatenate(
+        [
+            numpy.minimum(bounding_boxes[:, :2], bounding_boxes[:, 2:]),
+            numpy.maximum(bounding_boxes[:, :2], bounding_boxes[:, 2:])
+        ], axis=1)
+
+
+def calc_bounding_box_iou(bounding_box: BoundingBox, other_bounding_box: BoundingBox) -> float:
+    x1, y1 = numpy.maximum(bounding_box[:2], other_bounding_box[:2])
+    x2, y2 = numpy.minimum(bounding_box[2:], other_bounding_box[2:])
+    intersection_area = max(0, x2 - x1) * max(0, y2 - y1)
+    bounding_box_area = numpy.prod(bounding_box[2:] - bounding_box[:2])
+    other_bounding_box_area = numpy.prod(other_bounding_box[2:] - other_bounding_box[:2])
+    union_area = bounding_box_area + other_bounding_box_area - intersection_area
+
+    if union_area > 0:
+        return float(intersection_area / union_area)
+    return 0.0
+
+
 def transform_points(points: Points, matrix: Matrix) -> Points:
     points = points.reshape(-1, 1, 2)
     points = cv2.transform(points, matrix)  # type:ignore[assignment]
@@ -151,6 +200,12 @@ def transform_bounding_box(bounding_box: BoundingBox, matrix: Matrix) -> Boundin
     return normalize_bounding_box(numpy.array([x1, y1, x2, y2]))
 
 
+def transform_bounding_boxes(bounding_boxes: BoundingBoxes, matrix: Matrix) -> BoundingBoxes:
+    points = bounding_boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 2)
+    points = transform_points(points, matrix).reshape(-1, 4, 2)
+    return numpy.concatenate([numpy.min(points, axis=1), numpy.max(points, axis=1)], axis=1)
+
+
 def distance_to_bounding_box(points: Points, distance: Distance) -> BoundingBox:
     x1 = points[:, 0] - distance[:, 0]
     y1 = points[:, 1] - distance[:, 1]
@@ -197,9 +252,10 @@ def estimate_face_angle(face_landmark_68: FaceLandmark68) -> Angle:
     return face_angle
 
 
-def apply_nms(bounding_boxes: List[BoundingBox], face_scores: List[Score], score_threshold: float,
+def apply_nms(bounding_boxes: BoundingBoxes, face_scores: FaceScores, score_threshold: float,
               nms_threshold: float) -> Sequence[int]:
-    normed_bounding_boxes = [(x1, y1, x2 - x1, y2 - y1) for (x1, y1, x2, y2) in bounding_boxes]
+    normed_bounding_boxes = numpy.concatenate([bounding_boxes[:, :2], bounding_boxes[:, 2:] - bounding_boxes[:, :2]],
+                                              axis=1)
     keep_indices = cv2.dnn.NMSBoxes(normed_bounding_boxes, face_scores, score_threshold=score_threshold,
                                     nms_threshold=nms_threshold)
     return keep_indices
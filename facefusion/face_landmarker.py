@@ -1,16 +1,18 @@
-from typing import Tuple
+from typing import List, Tuple
 
 import cv2
 import numpy
+from cv2.typing import Size
 
 from facefusion import inference_manager, state_manager
 from facefusion.download import conditional_download_hashes, conditional_download_sources
 from facefusion.face_helper import create_rotated_matrix_and_size, estimate_matrix_by_face_landmark_5, transform_points, \
     warp_face_by_translation
 from facefusion.filesystem import resolve_relative_path
+from facefusion.inference_batcher import detect_batch_size, run_stacked_inference
 from facefusion.thread_helper import conditional_thread_semaphore
-from facefusion.typing import Angle, BoundingBox, DownloadSet, FaceLandmark5, FaceLandmark68, InferencePool, ModelSet, \
-    Prediction, Score, VisionFrame
+from facefusion.typing import Angle, BoundingBox, DownloadSet, FaceLandmark5, FaceLandmark68, InferencePool, Matrix, \
+    ModelSet, Prediction, Score, VisionFrame
 
 MODEL_SET: ModelSet = \
     {
@@ -116,60 +118,109 @@ def pre_check() -> bool:
 
 def detect_face_landmarks(vision_frame: VisionFrame, bounding_box: BoundingBox, face_angle: Angle) -> Tuple[
     FaceLandmark68, Score]:
-    face_landmark_2dfan4 = None
-    face_landmark_peppa_wutz = None
-    face_landmark_score_2dfan4 = 0.0
-    face_landmark_score_peppa_wutz = 0.0
+    face_landmarks_68, face_landmark_scores_68 = detect_many_face_landmarks(vision_frame, [bounding_box], [face_angle])
+    return face_landmarks_68[0], face_landmark_scores_68[0]
+
+
+def detect_many_face_landmarks(vision_frame: VisionFrame, bounding_boxes: List[BoundingBox],
+                               face_angles: List[Angle]) -> Tuple[List[FaceLandmark68], List[Score]]:
+    face_landmarks_68 = []
+    face_landmark_scores_68 = []
+    face_landmarks_2dfan4 = [None] * len(bounding_boxes)
+    face_landmarks_peppa_wutz = [None] * len(bounding_boxes)
+    face_landmark_scores_2dfan4 = [0.0] * len(bounding_boxes)
+    face_landmark_scores_peppa_wutz = [0.0] * len(bounding_boxes)
 
     if state_manager.get_item('face_landmarker_model') in ['many', '2dfan4']:
-        face_landmark_2dfan4, face_landmark_score_2dfan4 = detect_with_2dfan4(vision_frame, bounding_box, face_angle)
+        face_landmarks_2dfan4, face_landmark_scores_2dfan4 = detect_many_with_2dfan4(vision_frame, bounding_boxes,
+                                                                                     face_angles)
     if state_manager.get_item('face_landmarker_model') in ['many', 'peppa_wutz']:
-        face_landmark_peppa_wutz, face_landmark_score_peppa_wutz = detect_with_peppa_wutz(vision_frame, bounding_box,
-                                                                                          face_angle)
+        face_landmarks_peppa_wutz, face_landmark_scores_peppa_wutz = detect_many_with_peppa_wutz(vision_frame,
+                                                                                                 bounding_boxes,
+                                                                                                 face_angles)
 
-    if face_landmark_score_2dfan4 > face_landmark_score_peppa_wutz - 0.2:
-        return face_landmark_2dfan4, face_landmark_score_2dfan4
-    return face_landmark_peppa_wutz, face_landmark_score_peppa_wutz
+    for index in range(len(bounding_boxes)):
+        if face_landmark_scores_2dfan4[index] > face_landmark_scores_peppa_wutz[index] - 0.2:
+            face_landmarks_68.append(face_landmarks_2dfan4[index])
+            face_landmark_scores_68.append(face_landmark_scores_2dfan4[index])
+        else:
+            face_landmarks_68.append(face_landmarks_peppa_wutz[index])
+            face_landmark_scores_68.append(face_landmark_scores_peppa_wutz[index])
+    return face_landmarks_68, face_landmark_scores_68
 
 
 def detect_with_2dfan4(temp_vision_frame: VisionFrame, bounding_box: BoundingBox, face_angle: Angle) -> Tuple[
     FaceLandmark68, Score]:
+    face_landmarks_68, face_landmark_scores_68 = detect_many_with_2dfan4(temp_vision_frame, [bounding_box],
+                                                                         [face_angle])
+    return face_landmarks_68[0], face_landmark_scores_68[0]
+
+
+def detect_many_with_2dfan4(temp_vision_frame: VisionFrame, bounding_boxes: List[BoundingBox],
+                            face_angles: List[Angle]) -> Tuple[List[FaceLandmark68], List[Score]]:
     model_size = MODEL_SET.get('2dfan4').get('size')
-    scale = 195 / numpy.subtract(bounding_box[2:], bounding_box[:2]).max().clip(1, None)
-    translation = (model_size[0] - numpy.add(bounding_box[2:], bounding_box[:2]) * scale) * 0.5
-    rotated_matrix, rotated_size = create_rotated_matrix_and_size(face_angle, model_size)
-    crop_vision_frame, affine_matrix = warp_face_by_translation(temp_vision_frame, translation, scale, model_size)
-    crop_vision_frame = cv2.warpAffine(crop_vision_frame, rotated_matrix, rotated_size)
-    crop_vision_frame = conditional_optimize_contrast(crop_vision_frame)
-    crop_vision_frame = crop_vision_frame.transpose(2, 0, 1).astype(numpy.float32) / 255.0
-    face_landmark_68, face_heatmap = forward_with_2dfan4(crop_vision_frame)
-    face_landmark_68 = face_landmark_68[:, :, :2][0] / 64 * 256
-    face_landmark_68 = transform_points(face_landmark_68, cv2.invertAffineTransform(rotated_matrix))
-    face_landmark_68 = transform_points(face_landmark_68, cv2.invertAffineTransform(affine_matrix))
-    face_landmark_score_68 = numpy.amax(face_heatmap, axis=(2, 3))
-    face_landmark_score_68 = numpy.mean(face_landmark_score_68)
-    face_landmark_score_68 = numpy.interp(face_landmark_score_68, [0, 0.9], [0, 1])
-    return face_landmark_68, face_landmark_score_68
+    crop_vision_frames, affine_matrices, rotated_matrices = prepare_crop_frames(temp_vision_frame, bounding_boxes,
+                                                                                face_angles, model_size)
+    face_landmarks_68, face_heatmaps = forward_many_with_2dfan4(crop_vision_frames)
+    face_landmarks_68 = face_landmarks_68[:, :, :2] / 64 * 256
+    face_landmarks_68 = restore_face_landmarks_68(face_landmarks_68, affine_matrices, rotated_matrices)
+    face_landmark_scores_68 = numpy.amax(face_heatmaps, axis=(2, 3))
+    face_landmark_scores_68 = numpy.mean(face_landmark_scores_68, axis=1)
+    face_landmark_scores_68 = numpy.interp(face_landmark_scores_68, [0, 0.9], [0, 1])
+    return face_landmarks_68, face_landmark_scores_68.tolist()
 
 
 def detect_with_peppa_wutz(temp_vision_frame: VisionFrame, bounding_box: BoundingBox, face_angle: Angle) -> Tuple[
     FaceLandmark68, Score]:
+    face_landmarks_68, face_landmark_scores_68 = detect_many_with_peppa_wutz(temp_vision_frame, [bounding_box],
+                                                                             [face_angle])
+    return face_landmarks_68[0], face_landmark_scores_68[0]
+
+
+def detect_many_with_peppa_wutz(temp_vision_frame: VisionFrame, bounding_boxes: List[BoundingBox],
+                                face_angles: List[Angle]) -> Tuple[List[FaceLandmark68], List[Score]]:
     model_size = MODEL_SET.get('peppa_wutz').get('size')
-    scale = 195 / numpy.subtract(bounding_box[2:], bounding_box[:2]).max().clip(1, None)
-    translation = (model_size[0] - numpy.add(bounding_box[2:], bounding_box[:2]) * scale) * 0.5
-    rotated_matrix, rotated_size = create_rotated_matrix_and_size(face_angle, model_size)
-    crop_vision_frame, affine_matrix = warp_face_by_translation(temp_vision_frame, translation, scale, model_size)
-    crop_vision_frame = cv2.warpAffine(crop_vision_frame, rotated_matrix, rotated_size)
-    crop_vision_frame = conditional_optimize_contrast(crop_vision_frame)
-    crop_vision_frame = crop_vision_frame.transpose(2, 0, 1).astype(numpy.float32) / 255.0
-    crop_vision_frame = numpy.expand_dims(crop_vision_frame, axis=0)
-    prediction = forward_with_peppa_wutz(crop_vision_frame)
-    face_landmark_68 = prediction.reshape(-1, 3)[:, :2] / 64 * model_size[0]
-    face_landmark_68 = transform_points(face_landmark_68, cv2.invertAffineTransform(rotated_matrix))
-    face_landmark_68 = transform_points(face_landmark_68, cv2.invertAffineTransform(affine_matrix))
-    face_landmark_score_68 = prediction.reshape(-1, 3)[:, 2].mean()
-    face_landmark_score_68 = numpy.interp(face_landmark_score_68, [0, 0.95], [0, 1])
-    return face_landmark_68, face_landmark_score_68
+    crop_vision_frames, affine_matrices, rotated_matrices = prepare_crop_frames(temp_vision_frame, bounding_boxes,
+                                                                                face_angles, model_size)
+    prediction = forward_many_with_peppa_wutz(crop_vision_frames)
+    prediction = prediction.reshape(len(bounding_boxes), -1, 3)
+    face_landmarks_68 = prediction[:, :, :2] / 64 * model_size[0]
+    face_landmarks_68 = restore_face_landmarks_68(face_landmarks_68, affine_matrices, rotated_matrices)
+    face_landmark_scores_68 = prediction[:, :, 2].mean(axis=1)
+    face_landmark_scores_68 = numpy.interp(face_landmark_scores_68, [0, 0.95], [0, 1])
+    return face_landmarks_68, face_landmark_scores_68.tolist()
+
+
+def prepare_crop_frames(temp_vision_frame: VisionFrame, bounding_boxes: List[BoundingBox], face_angles: List[Angle],
+                        model_size: Size) -> Tuple[VisionFrame, List[Matrix], List[Matrix]]:
+    crop_vision_frames = []
+    affine_matrices = []
+    rotated_matrices = []
+
+    # the crops of all faces are stacked to run the landmarker once per frame
+    for bounding_box, face_angle in zip(bounding_boxes, face_angles):
+        scale = 195 / numpy.subtract(bounding_box[2:], bounding_box[:2]).max().clip(1, None)
+        translation = (model_size[0] - numpy.add(bounding_box[2:], bounding_box[:2]) * scale) * 0.5
+        rotated_matrix, rotated_size = create_rotated_matrix_and_size(face_angle, model_size)
+        crop_vision_frame, affine_matrix = warp_face_by_translation(temp_vision_frame, translation, scale, model_size)
+        crop_vision_frame = cv2.warpAffine(crop_vision_frame, rotated_matrix, rotated_size)
+        crop_vision_frame = conditional_optimize_contrast(crop_vision_frame)
+        crop_vision_frame = crop_vision_frame.transpose(2, 0, 1).astype(numpy.float32) / 255.0
+        crop_vision_frames.append(crop_vision_frame)
+        affine_matrices.append(affine_matrix)
+        rotated_matrices.append(rotated_matrix)
+    return numpy.stack(crop_vision_frames), affine_matrices, rotated_matrices
+
+
+def restore_face_landmarks_68(face_landmarks_68: Prediction, affine_matrices: List[Matrix],
+                              rotated_matrices: List[Matrix]) -> List[FaceLandmark68]:
+    restore_face_landmarks = []
+
+    for face_landmark_68, affine_matrix, rotated_matrix in zip(face_landmarks_68, affine_matrices, rotated_matrices):
+        face_landmark_68 = transform_points(face_landmark_68, cv2.invertAffineTransform(rotated_matrix))
+        face_landmark_68 = transform_points(face_landmark_68, cv2.invertAffineTransform(affine_matrix))
+        restore_face_landmarks.append(face_landmark_68)
+    return restore_face_landmarks
 
 
 def conditional_optimize_contrast(crop_vision_frame: VisionFrame) -> VisionFrame:
@@ -181,45 +232,71 @@ def conditional_optimize_contrast(crop_vision_frame: VisionFrame) -> VisionFrame
 
 
 def estimate_face_landmark_68_5(face_landmark_5: FaceLandmark5) -> FaceLandmark68:
-    affine_matrix = estimate_matrix_by_face_landmark_5(face_landmark_5, 'ffhq_512', (1, 1))
-    face_landmark_5 = cv2.transform(face_landmark_5.reshape(1, -1, 2), affine_matrix).reshape(-1, 2)
-    face_landmark_68_5 = forward_fan_68_5(face_landmark_5)
-    face_landmark_68_5 = cv2.transform(face_landmark_68_5.reshape(1, -1, 2),
-                                       cv2.invertAffineTransform(affine_matrix)).reshape(-1, 2)
-    return face_landmark_68_5
+    return estimate_many_face_landmarks_68_5([face_landmark_5])[0]
+
+
+def estimate_many_face_landmarks_68_5(face_landmarks_5: List[FaceLandmark5]) -> List[FaceLandmark68]:
+    face_landmarks_68_5 = []
+    affine_matrices = [estimate_matrix_by_face_landmark_5(face_landmark_5, 'ffhq_512', (1, 1)) for face_landmark_5 in
+                       face_landmarks_5]
+    normed_face_landmarks_5 = numpy.stack(
+        [cv2.transform(face_landmark_5.reshape(1, -1, 2), affine_matrix).reshape(-1, 2) for
+         face_landmark_5, affine_matrix in zip(face_landmarks_5, affine_matrices)])
+
+    for face_landmark_68_5, affine_matrix in zip(forward_many_fan_68_5(normed_face_landmarks_5), affine_matrices):
+        face_landmark_68_5 = cv2.transform(face_landmark_68_5.reshape(1, -1, 2),
+                                           cv2.invertAffineTransform(affine_matrix)).reshape(-1, 2)
+        face_landmarks_68_5.append(face_landmark_68_5)
+    return face_landmarks_68_5
 
 
 def forward_with_2dfan4(crop_vision_frame: VisionFrame) -> Tuple[Prediction, Prediction]:
+    face_landmarks_68, face_heatmaps = forward_many_with_2dfan4(numpy.expand_dims(crop_vision_frame, axis=0))
+    return face_landmarks_68, face_heatmaps
+
+
+def forward_many_with_2dfan4(crop_vision_frames: VisionFrame) -> Tuple[Prediction, Prediction]:
     face_landmarker = get_inference_pool().get('2dfan4')
+    face_landmarker_batch_size = detect_batch_size(face_landmarker, state_manager.get_item('execution_providers'))
 
     with conditional_thread_semaphore():
-        prediction = face_landmarker.run(None,
-                                         {
-                                             'input': [crop_vision_frame]
-                                         })
+        prediction = run_stacked_inference(face_landmarker,
+                                           {
+                                               'input': crop_vision_frames
+                                           }, {}, face_landmarker_batch_size)
 
-    return prediction
+    return prediction[0], prediction[1]
 
 
 def forward_with_peppa_wutz(crop_vision_frame: VisionFrame) -> Prediction:
+    return forward_many_with_peppa_wutz(crop_vision_frame)
+
+
+def forward_many_with_peppa_wutz(crop_vision_frames: VisionFrame) -> Prediction:
     face_landmarker = get_inference_pool().get('peppa_wutz')
+    face_landmarker_batch_size = detect_batch_size(face_landmarker, state_manager.get_item('execution_providers'))
 
     with conditional_thread_semaphore():
-        prediction = face_landmarker.run(None,
-                                         {
-                                             'input': crop_vision_frame
-                                         })[0]
+        prediction = run_stacked_inference(face_landmarker,
+                                           {
+                                               'input': crop_vision_frames
+                                           }, {}, face_landmarker_batch_size)[0]
 
     return prediction
 
 
 def forward_fan_68_5(face_landmark_5: FaceLandmark5) -> FaceLandmark68:
+    return forward_many_fan_68_5(numpy.expand_dims(face_landmark_5, axis=0))[0]
+
+
+def forward_many_fan_68_5(face_landmarks_5: FaceLandmark5) -> FaceLandmark68:
     face_landmarker = get_inference_pool().get('fan_68_5')
+    face_landmarker_batch_size = detect_batch_size(face_landmarker, state_manager.get_item('execution_providers'))
 
     with conditional_thread_semaphore():
-        face_landmark_68_5 = face_landmarker.run(None,
-                                                 {
-                                                     'input': [face_landmark_5]
-                                                 })[0][0]
+        face_landmarks_68_5 = run_stacked_inference(face_landmarker,
+                                                    {
+                                                        'input': face_landmarks_5.astype(numpy.float32)
+                                                    }, {}, face_landmarker_batch_size)[0]
 
-    return face_landmark_68_5
+    return face_landmarks_68_5
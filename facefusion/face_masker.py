@@ -5,9 +5,10 @@ import cv2
 import numpy
 from cv2.typing import Size
 
-from facefusion import inference_manager
+from facefusion import inference_manager, state_manager
 from facefusion.download import conditional_download_hashes, conditional_download_sources
 from facefusion.filesystem import resolve_relative_path
+from facefusion.inference_batcher import detect_batch_size, run_stacked_inference
 from facefusion.thread_helper import conditional_thread_semaphore
 from facefusion.typing import DownloadSet, FaceLandmark68, FaceMaskRegion, InferencePool, Mask, ModelSet, Padding, \
     VisionFrame
@@ -116,31 +117,46 @@ def create_static_box_mask(crop_size: Size, face_mask_blur: float, face_mask_pad
 
 
 def create_occlusion_mask(crop_vision_frame: VisionFrame) -> Mask:
+    return create_occlusion_masks([crop_vision_frame])[0]
+
+
+def create_occlusion_masks(crop_vision_frames: List[VisionFrame]) -> List[Mask]:
     model_size = MODEL_SET.get('face_occluder').get('size')
-    prepare_vision_frame = cv2.resize(crop_vision_frame, model_size)
-    prepare_vision_frame = numpy.expand_dims(prepare_vision_frame, axis=0).astype(numpy.float32) / 255
-    prepare_vision_frame = prepare_vision_frame.transpose(0, 1, 2, 3)
-    occlusion_mask = forward_occlude_face(prepare_vision_frame)
-    occlusion_mask = occlusion_mask.transpose(0, 1, 2).clip(0, 1).astype(numpy.float32)
-    occlusion_mask = cv2.resize(occlusion_mask, crop_vision_frame.shape[:2][::-1])
-    occlusion_mask = (cv2.GaussianBlur(occlusion_mask.clip(0, 1), (0, 0), 5).clip(0.5, 1) - 0.5) * 2
-    return occlusion_mask
+    prepare_vision_frames = numpy.stack(
+        [cv2.resize(crop_vision_frame, model_size) for crop_vision_frame in crop_vision_frames]).astype(
+        numpy.float32) / 255
+    occlusion_masks = []
+
+    for crop_vision_frame, occlusion_mask in zip(crop_vision_frames, forward_occlude_faces(prepare_vision_frames)):
+        occlusion_mask = occlusion_mask.transpose(0, 1, 2).clip(0, 1).astype(numpy.float32)
+        occlusion_mask = cv2.resize(occlusion_mask, crop_vision_frame.shape[:2][::-1])
+        occlusion_mask = (cv2.GaussianBlur(occlusion_mask.clip(0, 1), (0, 0), 5).clip(0.5, 1) - 0.5) * 2
+        occlusion_masks.append(occlusion_mask)
+    return occlusion_masks
 
 
 def create_region_mask(crop_vision_frame: VisionFrame, face_mask_regions: List[FaceMaskRegion]) -> Mask:
+    return create_region_masks([crop_vision_frame], face_mask_regions)[0]
+
+
+def create_region_masks(crop_vision_frames: List[VisionFrame], face_mask_regions: List[FaceMaskRegion]) -> List[Mask]:
     model_size = MODEL_SET.get('face_parser').get('size')
-    prepare_vision_frame = cv2.resize(crop_vision_frame, model_size)
-    prepare_vision_frame = prepare_vision_frame[:, :, ::-1].astype(numpy.float32) / 255
-    prepare_vision_frame = numpy.subtract(prepare_vision_frame,
-                                          numpy.array([0.485, 0.456, 0.406]).astype(numpy.float32))
-    prepare_vision_frame = numpy.divide(prepare_vision_frame, numpy.array([0.229, 0.224, 0.225]).astype(numpy.float32))
-    prepare_vision_frame = numpy.expand_dims(prepare_vision_frame, axis=0)
-    prepare_vision_frame = prepare_vision_frame.transpose(0, 3, 1, 2)
-    region_mask = forward_parse_face(prepare_vision_frame)
-    region_mask = numpy.isin(region_mask.argmax(0), [FACE_MASK_REGIONS[region] for region in face_mask_regions])
-    region_mask = cv2.resize(region_mask.astype(numpy.float32), crop_vision_frame.shape[:2][::-1])
-    region_mask = (cv2.GaussianBlur(region_mask.clip(0, 1), (0, 0), 5).clip(0.5, 1) - 0.5) * 2
-    return region_mask
+    prepare_vision_frames = numpy.stack(
+        [cv2.resize(crop_vision_frame, model_size) for crop_vision_frame in crop_vision_frames])
+    prepare_vision_frames = prepare_vision_frames[:, :, :, ::-1].astype(numpy.float32) / 255
+    prepare_vision_frames = numpy.subtract(prepare_vision_frames,
+                                           numpy.array([0.485, 0.456, 0.406]).astype(numpy.float32))
+    prepare_vision_frames = numpy.divide(prepare_vision_frames,
+                                         numpy.array([0.229, 0.224, 0.225]).astype(numpy.float32))
+    prepare_vision_frames = prepare_vision_frames.transpose(0, 3, 1, 2)
+    region_masks = []
+
+    for crop_vision_frame, region_mask in zip(crop_vision_frames, forward_parse_faces(prepare_vision_frames)):
+        region_mask = numpy.isin(region_mask.argmax(0), [FACE_MASK_REGIONS[region] for region in face_mask_regions])
+        region_mask = cv2.resize(region_mask.astype(numpy.float32), crop_vision_frame.shape[:2][::-1])
+        region_mask = (cv2.GaussianBlur(region_mask.clip(0, 1), (0, 0), 5).clip(0.5, 1) - 0.5) * 2
+        region_masks.append(region_mask)
+    return region_masks
 
 
 def create_mouth_mask(face_landmark_68: FaceLandmark68) -> Mask:
@@ -153,24 +169,34 @@ def create_mouth_mask(face_landmark_68: FaceLandmark68) -> Mask:
 
 
 def forward_occlude_face(prepare_vision_frame: VisionFrame) -> Mask:
+    return forward_occlude_faces(prepare_vision_frame)[0]
+
+
+def forward_occlude_faces(prepare_vision_frames: VisionFrame) -> Mask:
     face_occluder = get_inference_pool().get('face_occluder')
+    face_occluder_batch_size = detect_batch_size(face_occluder, state_manager.get_item('execution_providers'))
 
     with conditional_thread_semaphore():
-        occlusion_mask: Mask = face_occluder.run(None,
-                                                 {
-                                                     'input': prepare_vision_frame
-                                                 })[0][0]
+        occlusion_masks: Mask = run_stacked_inference(face_occluder,
+                                                      {
+                                                          'input': prepare_vision_frames
+                                                      }, {}, face_occluder_batch_size)[0]
 
-    return occlusion_mask
+    return occlusion_masks
 
 
 def forward_parse_face(prepare_vision_frame: VisionFrame) -> Mask:
+    return forward_parse_faces(prepare_vision_frame)[0]
+
+
+def forward_parse_faces(prepare_vision_frames: VisionFrame) -> Mask:
     face_parser = get_inference_pool().get('face_parser')
+    face_parser_batch_size = detect_batch_size(face_parser, state_manager.get_item('execution_providers'))
 
     with conditional_thread_semaphore():
-        region_mask: Mask = face_parser.run(None,
-                                            {
-                                                'input': prepare_vision_frame
-                                            })[0][0]
+        region_masks: Mask = run_stacked_inference(face_parser,
+                                                   {
+                                                       'input': prepare_vision_frames
+                                                   }, {}, face_parser_batch_size)[0]
 
-    return region_mask
+    return region_masks
@@ -1,11 +1,12 @@
-from typing import Tuple
+from typing import List, Tuple
 
 import numpy
 
-from facefusion import inference_manager
+from facefusion import inference_manager, state_manager
 from facefusion.download import conditional_download_hashes, conditional_download_sources
 from facefusion.face_helper import warp_face_by_face_landmark_5
 from facefusion.filesystem import resolve_relative_path
+from facefusion.inference_batcher import detect_batch_size, run_stacked_inference
 from facefusion.thread_helper import conditional_thread_semaphore
 from facefusion.typing import Embedding, FaceLandmark5, InferencePool, ModelOptions, ModelSet, VisionFrame
 
@@ -58,26 +59,40 @@ def pre_check() -> bool:
 
 
 def calc_embedding(temp_vision_frame: VisionFrame, face_landmark_5: FaceLandmark5) -> Tuple[Embedding, Embedding]:
+    embeddings, normed_embeddings = calc_embeddings(temp_vision_frame, [face_landmark_5])
+    return embeddings[0], normed_embeddings[0]
+
+
+def calc_embeddings(temp_vision_frame: VisionFrame, face_landmarks_5: List[FaceLandmark5]) -> Tuple[
+    List[Embedding], List[Embedding]]:
     model_template = get_model_options().get('template')
     model_size = get_model_options().get('size')
-    crop_vision_frame, matrix = warp_face_by_face_landmark_5(temp_vision_frame, face_landmark_5, model_template,
-                                                             model_size)
-    crop_vision_frame = crop_vision_frame / 127.5 - 1
-    crop_vision_frame = crop_vision_frame[:, :, ::-1].transpose(2, 0, 1).astype(numpy.float32)
-    crop_vision_frame = numpy.expand_dims(crop_vision_frame, axis=0)
-    embedding = forward(crop_vision_frame)
-    embedding = embedding.ravel()
-    normed_embedding = embedding / numpy.linalg.norm(embedding)
-    return embedding, normed_embedding
+    crop_vision_frames = []
+
+    for face_landmark_5 in face_landmarks_5:
+        crop_vision_frame, _ = warp_face_by_face_landmark_5(temp_vision_frame, face_landmark_5, model_template,
+                                                            model_size)
+        crop_vision_frame = crop_vision_frame / 127.5 - 1
+        crop_vision_frame = crop_vision_frame[:, :, ::-1].transpose(2, 0, 1).astype(numpy.float32)
+        crop_vision_frames.append(crop_vision_frame)
+    embeddings = forward_faces(numpy.stack(crop_vision_frames))
+    embeddings = embeddings.reshape(len(face_landmarks_5), -1)
+    normed_embeddings = embeddings / numpy.linalg.norm(embeddings, axis=1, keepdims=True)
+    return list(embeddings), list(normed_embeddings)
 
 
 def forward(crop_vision_frame: VisionFrame) -> Embedding:
+    return forward_faces(crop_vision_frame)
+
+
+def forward_faces(crop_vision_frames: VisionFrame) -> Embedding:
     face_recognizer = get_inference_pool().get('face_recognizer')
+    face_recognizer_batch_size = detect_batch_size(face_recognizer, state_manager.get_item('execution_providers'))
 
     with conditional_thread_semaphore():
-        embedding = face_recognizer.run(None,
-                                        {
-                                            'input': crop_vision_frame
-                                        })[0]
+        embeddings = run_stacked_inference(face_recognizer,
+                                           {
+                                               'input': crop_vision_frames
+                                           }, {}, face_recognizer_batch_size)[0]
 
-    return embedding
+    return embeddings
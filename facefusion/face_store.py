@@ -1,20 +1,37 @@
 import hashlib
+import threading
+from collections import OrderedDict
 from typing import Optional, List, Tuple
 
 import numpy
 
 from facefusion import state_manager
-from facefusion.typing import VisionFrame, Face, FaceStore, FaceSet
+from facefusion.face_tracker import clear_face_tracker, evict_face_tracker_anchor, get_face_tracker_statistics
+from facefusion.typing import VisionFrame, Face, FaceStore, FaceStoreStatistics, FaceSet, FrameFaces
 
+FRAME_HASH_SAMPLE_SIZE = 256
+FRAME_FACES_ENTRY_BYTES = 256
+FACE_STORE_LOCK: threading.Lock = threading.Lock()
+FACE_STORE_STATISTICS: FaceStoreStatistics = \
+    {
+        'static_faces_hits': 0,
+        'static_faces_misses': 0,
+        'static_faces_evictions': 0,
+        'static_faces_bytes': 0,
+        'frame_faces_evictions': 0,
+        'frame_faces_bytes': 0
+    }
 FACE_STORE: FaceStore = \
     {
-        'static_faces': {},
+        'static_faces': OrderedDict(),
+        'frame_faces': OrderedDict(),
         'reference_faces': {}
     }
 
 FACE_STORE_2: FaceStore = \
     {
-        'static_faces': {},
+        'static_faces': OrderedDict(),
+        'frame_faces': {},
         'reference_faces': {}
     }
 
@@ -23,35 +40,147 @@ def get_face_store() -> FaceStore:
     return FACE_STORE
 
 
+def get_face_store_statistics() -> FaceStoreStatistics:
+    return FACE_STORE_STATISTICS
+
+
 def get_static_faces(vision_frame: VisionFrame, dict_2=False) -> Optional[List[Face]]:
+    face_store = FACE_STORE_2 if dict_2 else FACE_STORE
     frame_hash = create_frame_hash(vision_frame)
-    if dict_2:
-        if frame_hash in FACE_STORE_2['static_faces']:
-            return FACE_STORE_2['static_faces'][frame_hash]
-        return None
-    if frame_hash in FACE_STORE['static_faces']:
-        return FACE_STORE['static_faces'][frame_hash]
+
+    with FACE_STORE_LOCK:
+        if frame_hash in face_store['static_faces']:
+            face_store['static_faces'].move_to_end(frame_hash)
+            FACE_STORE_STATISTICS['static_faces_hits'] += 1
+            return face_store['static_faces'][frame_hash]
+        FACE_STORE_STATISTICS['static_faces_misses'] += 1
     return None
 
 
 def set_static_faces(vision_frame: VisionFrame, faces: List[Face], dict_2=False) -> None:
+    face_store = FACE_STORE_2 if dict_2 else FACE_STORE
     frame_hash = create_frame_hash(vision_frame)
+
     if frame_hash:
-        if dict_2:
-            FACE_STORE_2['static_faces'][frame_hash] = faces
-            return
-        FACE_STORE['static_faces'][frame_hash] = faces
+        with FACE_STORE_LOCK:
+            if frame_hash in face_store['static_faces']:
+                faces_bytes = calc_faces_bytes(face_store['static_faces'].pop(frame_hash))
+                FACE_STORE_STATISTICS['static_faces_bytes'] -= faces_bytes
+            face_store['static_faces'][frame_hash] = faces
+            FACE_STORE_STATISTICS['static_faces_bytes'] += calc_faces_bytes(faces)
+            evict_static_faces(face_store)
+
+
+def evict_static_faces(face_store: FaceStore) -> None:
+    face_store_memory_limit = state_manager.get_item('face_store_memory_limit')
+
+    if face_store_memory_limit and face_store_memory_limit > 0:
+        while calc_face_store_bytes() > face_store_memory_limit * 1024 ** 2:
+            other_face_store = FACE_STORE if face_store is FACE_STORE_2 else FACE_STORE_2
+            # the faces of single frames are evicted before the static faces that are shared across frames
+            if len(FACE_STORE['frame_faces']) > 1:
+                _, frame_faces = FACE_STORE['frame_faces'].popitem(last=False)
+                FACE_STORE_STATISTICS['frame_faces_bytes'] -= calc_frame_faces_bytes(frame_faces)
+                FACE_STORE_STATISTICS['frame_faces_evictions'] += 1
+                continue
+            # the grayscale anchor frames of the face tracker are next as a single detection replaces them
+            if evict_face_tracker_anchor():
+                continue
+            if len(face_store['static_faces']) > 1:
+                _, faces = face_store['static_faces'].popitem(last=False)
+            elif other_face_store['static_faces']:
+                _, faces = other_face_store['static_faces'].popitem(last=False)
+            else:
+                break
+            FACE_STORE_STATISTICS['static_faces_bytes'] -= calc_faces_bytes(faces)
+            FACE_STORE_STATISTICS['static_faces_evictions'] += 1
+
+
+def calc_face_store_bytes() -> int:
+    face_tracker_anchor_bytes = get_face_tracker_statistics().get('face_tracker_anchor_bytes')
+    return FACE_STORE_STATISTICS['static_faces_bytes'] + FACE_STORE_STATISTICS['frame_faces_bytes'] + \
+        face_tracker_anchor_bytes
+
+
+def calc_frame_faces_bytes(frame_faces: FrameFaces) -> int:
+    return FRAME_FACES_ENTRY_BYTES + calc_faces_bytes(frame_faces.get('faces'))
+
+
+def calc_faces_bytes(faces: List[Face]) -> int:
+    faces_bytes = 0
+
+    for face in faces:
+        face_arrays = [face.bounding_box, face.embedding, face.normed_embedding]
+        if face.landmark_set:
+            face_arrays.extend(face.landmark_set.values())
+        for face_array in face_arrays:
+            if isinstance(face_array, numpy.ndarray):
+                faces_bytes += face_array.nbytes
+    return faces_bytes
 
 
 def clear_static_faces() -> None:
-    FACE_STORE['static_faces'] = {}
-    FACE_STORE_2['static_faces'] = {}
+    with FACE_STORE_LOCK:
+        FACE_STORE['static_faces'] = OrderedDict()
+        FACE_STORE_2['static_faces'] = OrderedDict()
+        FACE_STORE_STATISTICS['static_faces_bytes'] = 0
+    clear_static_frame_faces()
+    clear_face_tracker()
+
+
+def get_static_frame_faces(frame_number: int) -> Optional[FrameFaces]:
+    with FACE_STORE_LOCK:
+        if frame_number in FACE_STORE['frame_faces']:
+            FACE_STORE['frame_faces'].move_to_end(frame_number)
+            return FACE_STORE['frame_faces'][frame_number]
+    return None
+
+
+def set_static_frame_faces(frame_number: int, vision_frame: VisionFrame, faces: List[Face]) -> None:
+    frame_faces: FrameFaces = \
+        {
+            'frame_size': vision_frame.shape[:2],
+            'faces': faces
+        }
+
+    with FACE_STORE_LOCK:
+        if frame_number in FACE_STORE['frame_faces']:
+            frame_faces_bytes = calc_frame_faces_bytes(FACE_STORE['frame_faces'].pop(frame_number))
+            FACE_STORE_STATISTICS['frame_faces_bytes'] -= frame_faces_bytes
+        FACE_STORE['frame_faces'][frame_number] = frame_faces
+        FACE_STORE_STATISTICS['frame_faces_bytes'] += calc_frame_faces_bytes(frame_faces)
+        evict_static_faces(FACE_STORE)
+
+
+def clear_static_frame_faces() -> None:
+    with FACE_STORE_LOCK:
+        FACE_STORE['frame_faces'] = OrderedDict()
+        FACE_STORE_STATISTICS['frame_faces_bytes'] = 0
 
 
 def create_frame_hash(vision_frame: VisionFrame) -> Optional[str]:
+    # the strided sample ignores the pixels between the samples and is therefore opt-in
+    if state_manager.get_item('face_store_fingerprint') == 'strided':
+        return create_strided_frame_hash(vision_frame)
+    return create_sha1_frame_hash(vision_frame)
+
+
+def create_sha1_frame_hash(vision_frame: VisionFrame) -> Optional[str]:
     return hashlib.sha1(vision_frame.tobytes()).hexdigest() if numpy.any(vision_frame) else None
 
 
+def create_strided_frame_hash(vision_frame: VisionFrame) -> Optional[str]:
+    frame_height, frame_width = vision_frame.shape[:2]
+    frame_stride = max(1, max(frame_height, frame_width) // FRAME_HASH_SAMPLE_SIZE)
+    sample_vision_frame = numpy.ascontiguousarray(vision_frame[::frame_stride, ::frame_stride])
+
+    if numpy.any(sample_vision_frame):
+        frame_hash = hashlib.blake2b(sample_vision_frame, digest_size=16)
+        frame_hash.update(str(vision_frame.shape).encode())
+        return frame_hash.hexdigest()
+    return None
+
+
 def get_reference_faces(is_face_swapper: bool = False) -> Tuple[Optional[FaceSet], Optional[FaceSet]]:
     from facefusion.face_analyser import get_avg_faces
 
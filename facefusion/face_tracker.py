@@ -0,0 +1,246 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy
+
+from facefusion.face_helper import calc_bounding_box_iou, transform_bounding_box, transform_points
+from facefusion.typing import BoundingBox, Face, FaceLandmark5, FaceLandmarkSet, FaceTrackerAnchor, \
+    FaceTrackerIdentity, FaceTrackerStatistics, Points, VisionFrame
+
+FACE_TRACKER_ANCHOR_LIMIT = 32
+FACE_TRACKER_IDENTITY_LIMIT = 64
+FACE_TRACKER_ERROR = 1.0
+FACE_TRACKER_IOU = 0.5
+FACE_TRACKER_POSE = 0.08
+FACE_TRACKER_LOCK: threading.Lock = threading.Lock()
+FACE_TRACKER_ANCHORS: 'OrderedDict[int, FaceTrackerAnchor]' = OrderedDict()
+FACE_TRACKER_IDENTITIES: List[FaceTrackerIdentity] = []
+FACE_TRACKER_SCOPE: Dict[str, Optional[str]] = \
+    {
+        'target_path': None
+    }
+FACE_TRACKER_STATISTICS: FaceTrackerStatistics = \
+    {
+        'face_tracker_detected_frames': 0,
+        'face_tracker_tracked_frames': 0,
+        'face_tracker_lost_frames': 0,
+        'face_tracker_embedded_faces': 0,
+        'face_tracker_reused_faces': 0,
+        'face_tracker_anchor_evictions': 0,
+        'face_tracker_anchor_bytes': 0
+    }
+
+
+def get_face_tracker_statistics() -> FaceTrackerStatistics:
+    return FACE_TRACKER_STATISTICS
+
+
+def scope_face_tracker(target_path: Optional[str]) -> None:
+    with FACE_TRACKER_LOCK:
+        # anchors and identities of another target must never be matched against the faces of this one
+        if FACE_TRACKER_SCOPE.get('target_path') != target_path:
+            FACE_TRACKER_ANCHORS.clear()
+            FACE_TRACKER_IDENTITIES.clear()
+            FACE_TRACKER_SCOPE['target_path'] = target_path
+            FACE_TRACKER_STATISTICS['face_tracker_anchor_bytes'] = 0
+
+
+def find_face_tracker_anchor(frame_number: int, face_tracker_interval: int) -> Optional[FaceTrackerAnchor]:
+    face_tracker_anchor = None
+
+    # frames are processed out of order by the workers, any detected frame within the interval serves as anchor
+    with FACE_TRACKER_LOCK:
+        for anchor_frame_number, anchor in FACE_TRACKER_ANCHORS.items():
+            if 0 < frame_number - anchor_frame_number < face_tracker_interval:
+                if not face_tracker_anchor or anchor_frame_number > face_tracker_anchor.get('frame_number'):
+                    face_tracker_anchor = anchor
+    return face_tracker_anchor
+
+
+def set_face_tracker_anchor(frame_number: int, vision_frame: VisionFrame, faces: List[Face]) -> None:
+    face_tracker_anchor: FaceTrackerAnchor = \
+        {
+            'frame_number': frame_number,
+            'vision_frame': cv2.cvtColor(vision_frame, cv2.COLOR_BGR2GRAY),
+            'faces': faces
+        }
+
+    with FACE_TRACKER_LOCK:
+        if frame_number in FACE_TRACKER_ANCHORS:
+            anchor_bytes = calc_face_tracker_anchor_bytes(FACE_TRACKER_ANCHORS.pop(frame_number))
+            FACE_TRACKER_STATISTICS['face_tracker_anchor_bytes'] -= anchor_bytes
+        FACE_TRACKER_ANCHORS[frame_number] = face_tracker_anchor
+        FACE_TRACKER_STATISTICS['face_tracker_anchor_bytes'] += calc_face_tracker_anchor_bytes(face_tracker_anchor)
+        FACE_TRACKER_STATISTICS['face_tracker_detected_frames'] += 1
+        while len(FACE_TRACKER_ANCHORS) > FACE_TRACKER_ANCHOR_LIMIT:
+            pop_face_tracker_anchor()
+
+
+def evict_face_tracker_anchor() -> bool:
+    with FACE_TRACKER_LOCK:
+        # the latest anchor is kept for the frames that follow
+        if len(FACE_TRACKER_ANCHORS) > 1:
+            pop_face_tracker_anchor()
+            return True
+    return False
+
+
+def pop_face_tracker_anchor() -> None:
+    _, face_tracker_anchor = FACE_TRACKER_ANCHORS.popitem(last=False)
+    FACE_TRACKER_STATISTICS['face_tracker_anchor_bytes'] -= calc_face_tracker_anchor_bytes(face_tracker_anchor)
+    FACE_TRACKER_STATISTICS['face_tracker_anchor_evictions'] += 1
+
+
+def calc_face_tracker_anchor_bytes(face_tracker_anchor: FaceTrackerAnchor) -> int:
+    return face_tracker_anchor.get('vision_frame').nbytes
+
+
+def track_faces(face_tracker_anchor: FaceTrackerAnchor, vision_frame: VisionFrame,
+                face_tracker_score: float) -> Optional[List[Face]]:
+    anchor_vision_frame = face_tracker_anchor.get('vision_frame')
+    anchor_faces = face_tracker_anchor.get('faces')
+
+    if anchor_vision_frame.shape != vision_frame.shape[:2]:
+        return None
+    if not anchor_faces:
+        count_face_tracker_frame('face_tracker_tracked_frames')
+        return []
+    vision_frame = cv2.cvtColor(vision_frame, cv2.COLOR_BGR2GRAY)
+    anchor_points = numpy.concatenate([face.landmark_set.get('68') for face in anchor_faces]).astype(numpy.float32)
+    track_points, track_mask = track_points_bidirectional(anchor_vision_frame, vision_frame, anchor_points)
+    point_total = len(anchor_points) // len(anchor_faces)
+    faces = []
+
+    for index, anchor_face in enumerate(anchor_faces):
+        face_anchor_points = anchor_points[index * point_total:(index + 1) * point_total]
+        face_track_points = track_points[index * point_total:(index + 1) * point_total]
+        face_track_mask = track_mask[index * point_total:(index + 1) * point_total]
+        face = None
+
+        if numpy.mean(face_track_mask) >= face_tracker_score and numpy.sum(face_track_mask) > 2:
+            face = move_face(anchor_face, face_anchor_points[face_track_mask], face_track_points[face_track_mask])
+        if not face:
+            count_face_tracker_frame('face_tracker_lost_frames')
+            return None
+        faces.append(face)
+    count_face_tracker_frame('face_tracker_tracked_frames')
+    return faces
+
+
+def track_points_bidirectional(anchor_vision_frame: VisionFrame, vision_frame: VisionFrame,
+                               anchor_points: Points) -> Tuple[Points, numpy.ndarray]:
+    track_points, track_status, _ = cv2.calcOpticalFlowPyrLK(anchor_vision_frame, vision_frame,
+                                                             anchor_points.reshape(-1, 1, 2), None, winSize=(21, 21),
+                                                             maxLevel=3)
+    back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(vision_frame, anchor_vision_frame, track_points, None,
+                                                           winSize=(21, 21), maxLevel=3)
+    track_points = track_points.reshape(-1, 2)
+    back_error = numpy.linalg.norm(back_points.reshape(-1, 2) - anchor_points, axis=1)
+
+    # points that do not return to their origin are occluded or drifted
+    track_mask = (track_status.ravel() == 1) & (back_status.ravel() == 1) & (back_error < FACE_TRACKER_ERROR)
+    return track_points, track_mask
+
+
+def move_face(face: Face, anchor_points: Points, track_points: Points) -> Optional[Face]:
+    track_matrix, _ = cv2.estimateAffinePartial2D(anchor_points, track_points)
+
+    if track_matrix is None:
+        return None
+    face_landmark_set: FaceLandmarkSet = \
+        {
+            '5': transform_points(face.landmark_set.get('5'), track_matrix),
+            '5/68': transform_points(face.landmark_set.get('5/68'), track_matrix),
+            '68': transform_points(face.landmark_set.get('68'), track_matrix),
+            '68/5': transform_points(face.landmark_set.get('68/5'), track_matrix)
+        }
+    return face._replace(bounding_box=transform_bounding_box(face.bounding_box, track_matrix),
+                         landmark_set=face_landmark_set)
+
+
+def find_face_tracker_identities(frame_number: int, bounding_boxes: List[BoundingBox],
+                                 face_landmarks_5: List[FaceLandmark5],
+                                 face_tracker_identity_interval: int) -> List[Optional[FaceTrackerIdentity]]:
+    face_tracker_identities: List[Optional[FaceTrackerIdentity]] = [None] * len(bounding_boxes)
+    identity_matches = []
+    claimed_indices = set()
+    claimed_identity_ids = set()
+
+    with FACE_TRACKER_LOCK:
+        for index, bounding_box in enumerate(bounding_boxes):
+            for identity in FACE_TRACKER_IDENTITIES:
+                if abs(frame_number - identity.get('frame_number')) <= face_tracker_identity_interval:
+                    identity_iou = calc_bounding_box_iou(bounding_box, identity.get('bounding_box'))
+                    if identity_iou >= FACE_TRACKER_IOU:
+                        identity_matches.append((identity_iou, index, identity))
+
+        # the best overlaps are matched first and every identity is claimed by a single face of the frame
+        for _, index, identity in sorted(identity_matches, key=lambda identity_match: identity_match[0], reverse=True):
+            if index in claimed_indices or id(identity) in claimed_identity_ids:
+                continue
+            claimed_indices.add(index)
+            claimed_identity_ids.add(id(identity))
+
+            # the identity is embedded again once it aged beyond the interval or the head turned away
+            if abs(frame_number - identity.get('embedded_frame_number')) >= face_tracker_identity_interval:
+                continue
+            if calc_pose_change(identity.get('face_landmark_5'), face_landmarks_5[index]) > FACE_TRACKER_POSE:
+                continue
+            identity['frame_number'] = frame_number
+            identity['bounding_box'] = bounding_boxes[index]
+            FACE_TRACKER_STATISTICS['face_tracker_reused_faces'] += 1
+            face_tracker_identities[index] = identity
+    return face_tracker_identities
+
+
+def set_face_tracker_identity(frame_number: int, face: Face) -> None:
+    face_tracker_identity: FaceTrackerIdentity = \
+        {
+            'frame_number': frame_number,
+            'embedded_frame_number': frame_number,
+            'bounding_box': face.bounding_box,
+            'face_landmark_5': face.landmark_set.get('5/68'),
+            'embedding': face.embedding,
+            'normed_embedding': face.normed_embedding,
+            'gender': face.gender,
+            'age': face.age,
+            'race': face.race
+        }
+
+    with FACE_TRACKER_LOCK:
+        # the identity replaced is the best overlap that no other face of this frame claimed already
+        replace_identities = [identity for identity in FACE_TRACKER_IDENTITIES if
+                              identity.get('frame_number') != frame_number and calc_bounding_box_iou(
+                                  face.bounding_box, identity.get('bounding_box')) >= FACE_TRACKER_IOU]
+        if replace_identities:
+            FACE_TRACKER_IDENTITIES.remove(max(replace_identities, key=lambda identity: calc_bounding_box_iou(
+                face.bounding_box, identity.get('bounding_box'))))
+        FACE_TRACKER_IDENTITIES.append(face_tracker_identity)
+        FACE_TRACKER_STATISTICS['face_tracker_embedded_faces'] += 1
+        while len(FACE_TRACKER_IDENTITIES) > FACE_TRACKER_IDENTITY_LIMIT:
+            FACE_TRACKER_IDENTITIES.pop(0)
+
+
+def calc_pose_change(face_landmark_5: FaceLandmark5, other_face_landmark_5: FaceLandmark5) -> float:
+    pose_matrix, _ = cv2.estimateAffinePartial2D(face_landmark_5, other_face_landmark_5)
+
+    if pose_matrix is None:
+        return numpy.inf
+    pose_error = numpy.linalg.norm(transform_points(face_landmark_5, pose_matrix) - other_face_landmark_5, axis=1)
+    eye_distance = numpy.linalg.norm(other_face_landmark_5[0] - other_face_landmark_5[1])
+    return float(numpy.max(pose_error) / max(eye_distance, 1.0))
+
+
+def count_face_tracker_frame(statistics_key: str) -> None:
+    with FACE_TRACKER_LOCK:
+        FACE_TRACKER_STATISTICS[statistics_key] += 1  # type:ignore[literal-required]
+
+
+def clear_face_tracker() -> None:
+    with FACE_TRACKER_LOCK:
+        FACE_TRACKER_ANCHORS.clear()
+        FACE_TRACKER_IDENTITIES.clear()
+        for statistics_key in FACE_TRACKER_STATISTICS:
+            FACE_TRACKER_STATISTICS[statistics_key] = 0  # type:ignore[literal-required]
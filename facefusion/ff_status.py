@@ -120,7 +120,10 @@ class FFStatus:
                 video_frame_total = trim_frame_end - (trim_frame_start if trim_frame_start is not None else 0)
             total_frames = video_frame_total / original_fps * fps
             print(f"Total frames: {total_frames}, execution providers: {len(frame_processors)}")
-            total_steps = total_frames * len(frame_processors)
+            if state_manager.get_item('processor_pipeline') in ['fused', 'streaming']:
+                total_steps = total_frames
+            else:
+                total_steps = total_frames * len(frame_processors)
             total_steps += 2
             if not state_manager.get_item('skip_audio'):
                 total_steps += 1
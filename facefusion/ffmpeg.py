@@ -80,32 +80,22 @@ def log_debug(process: subprocess.Popen[bytes]) -> None:
             logger.debug(error.strip(), __name__)
 
 
-def extract_frames(target_path: str, temp_video_resolution: str, temp_video_fps: Fps) -> bool:
-    print(f"Extracting frames from video: {target_path}")
+def create_extract_filter(temp_video_fps: Fps) -> str:
     trim_frame_start = state_manager.get_item('trim_frame_start')
     trim_frame_end = state_manager.get_item('trim_frame_end')
-    temp_frames_pattern = get_temp_frames_pattern(target_path, '%08d')
-    commands = ['-i', target_path, '-s', str(temp_video_resolution), '-q:v', '0']
 
     if isinstance(trim_frame_start, int) and isinstance(trim_frame_end, int):
-        commands.extend(['-vf', 'trim=start_frame=' + str(trim_frame_start) + ':end_frame=' + str(
-            trim_frame_end) + ',fps=' + str(temp_video_fps)])
-    elif isinstance(trim_frame_start, int):
-        commands.extend(['-vf', 'trim=start_frame=' + str(trim_frame_start) + ',fps=' + str(temp_video_fps)])
-    elif isinstance(trim_frame_end, int):
-        commands.extend(['-vf', 'trim=end_frame=' + str(trim_frame_end) + ',fps=' + str(temp_video_fps)])
-    else:
-        commands.extend(['-vf', 'fps=' + str(temp_video_fps)])
-    commands.extend(['-vsync', '0', temp_frames_pattern])
-    return run_ffmpeg(commands, True, "Extracting").returncode == 0
+        return 'trim=start_frame=' + str(trim_frame_start) + ':end_frame=' + str(trim_frame_end) + ',fps=' + str(
+            temp_video_fps)
+    if isinstance(trim_frame_start, int):
+        return 'trim=start_frame=' + str(trim_frame_start) + ',fps=' + str(temp_video_fps)
+    if isinstance(trim_frame_end, int):
+        return 'trim=end_frame=' + str(trim_frame_end) + ',fps=' + str(temp_video_fps)
+    return 'fps=' + str(temp_video_fps)
 
 
-def merge_video(target_path: str, output_video_resolution: str, output_video_fps: Fps) -> bool:
-    temp_video_fps = restrict_video_fps(target_path, output_video_fps)
-    temp_file_path = get_temp_file_path(target_path)
-    temp_frames_pattern = get_temp_frames_pattern(target_path, '%08d')
-    commands = ['-r', str(temp_video_fps), '-i', temp_frames_pattern, '-s', str(output_video_resolution), '-c:v',
-                state_manager.get_item('output_video_encoder')]
+def create_encoder_commands(output_video_resolution: str, output_video_fps: Fps, temp_file_path: str) -> List[str]:
+    commands = ['-s', str(output_video_resolution), '-c:v', state_manager.get_item('output_video_encoder')]
 
     if state_manager.get_item('output_video_encoder') in ['libx264', 'libx265']:
         output_video_compression = round(51 - (state_manager.get_item('output_video_quality') * 0.51))
@@ -127,9 +117,44 @@ def merge_video(target_path: str, output_video_resolution: str, output_video_fps
     commands.extend(
         ['-vf', 'framerate=fps=' + str(output_video_fps), '-pix_fmt', 'yuv420p', '-colorspace', 'bt709', '-y',
          temp_file_path])
+    return commands
+
+
+def extract_frames(target_path: str, temp_video_resolution: str, temp_video_fps: Fps) -> bool:
+    print(f"Extracting frames from video: {target_path}")
+    temp_frames_pattern = get_temp_frames_pattern(target_path, '%08d')
+    commands = ['-i', target_path, '-s', str(temp_video_resolution), '-q:v', '0']
+    commands.extend(['-vf', create_extract_filter(temp_video_fps)])
+    commands.extend(['-vsync', '0', temp_frames_pattern])
+    return run_ffmpeg(commands, True, "Extracting").returncode == 0
+
+
+def merge_video(target_path: str, output_video_resolution: str, output_video_fps: Fps) -> bool:
+    temp_video_fps = restrict_video_fps(target_path, output_video_fps)
+    temp_file_path = get_temp_file_path(target_path)
+    temp_frames_pattern = get_temp_frames_pattern(target_path, '%08d')
+    commands = ['-r', str(temp_video_fps), '-i', temp_frames_pattern]
+    commands.extend(create_encoder_commands(output_video_resolution, output_video_fps, temp_file_path))
     return run_ffmpeg(commands).returncode == 0
 
 
+def open_frame_decoder(target_path: str, temp_video_resolution: str, temp_video_fps: Fps) -> subprocess.Popen[bytes]:
+    commands = ['-i', target_path, '-s', str(temp_video_resolution)]
+    commands.extend(['-vf', create_extract_filter(temp_video_fps)])
+    commands.extend(['-vsync', '0', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'])
+    return open_ffmpeg(commands)
+
+
+def open_frame_encoder(target_path: str, frame_resolution: str, output_video_resolution: str,
+                       output_video_fps: Fps) -> subprocess.Popen[bytes]:
+    temp_video_fps = restrict_video_fps(target_path, output_video_fps)
+    temp_file_path = get_temp_file_path(target_path)
+    commands = ['-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', str(frame_resolution), '-r', str(temp_video_fps), '-i',
+                '-']
+    commands.extend(create_encoder_commands(output_video_resolution, output_video_fps, temp_file_path))
+    return open_ffmpeg(commands)
+
+
 def concat_video(output_path: str, temp_output_paths: List[str]) -> bool:
     concat_video_path = tempfile.mktemp()
 
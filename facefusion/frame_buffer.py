@@ -0,0 +1,41 @@
+from multiprocessing import shared_memory
+from queue import Queue
+
+import numpy
+
+from facefusion.typing import Resolution, VisionFrame
+
+
+class FrameRingBuffer:
+    """Fixed amount of frame slots in shared memory, the pipeline stages hand over slot indices instead of frames"""
+
+    def __init__(self, frame_resolution: Resolution, slot_total: int):
+        frame_width, frame_height = frame_resolution
+        self.frame_shape = (frame_height, frame_width, 3)
+        self.slot_size = frame_width * frame_height * 3
+        self.slot_total = slot_total
+        self.shared_memory = shared_memory.SharedMemory(create=True, size=self.slot_size * slot_total)
+        self.vision_frames = numpy.ndarray((slot_total,) + self.frame_shape, dtype=numpy.uint8,
+                                           buffer=self.shared_memory.buf)
+        self.free_slots: Queue[int] = Queue()
+
+        for slot_index in range(slot_total):
+            self.free_slots.put(slot_index)
+
+    def acquire_slot(self) -> int:
+        return self.free_slots.get()
+
+    def release_slot(self, slot_index: int) -> None:
+        self.free_slots.put(slot_index)
+
+    def get_vision_frame(self, slot_index: int) -> VisionFrame:
+        return self.vision_frames[slot_index]
+
+    def close(self) -> None:
+        self.shared_memory.unlink()
+        del self.vision_frames
+        try:
+            self.shared_memory.close()
+        except BufferError:
+            # frames still referenced by the caller keep the mapping alive until they are collected
+            pass
@@ -4,7 +4,8 @@ from typing import List, Optional
 from facefusion.choices import face_mask_regions
 from facefusion.typing import LogLevel, VideoMemoryStrategy, FaceSelectorMode, FaceSelectorOrder, FaceAnalyserAge, \
     FaceAnalyserGender, FaceMaskType, FaceMaskRegion, OutputVideoEncoder, OutputVideoPreset, FaceDetectorModel, \
-    FaceRecognizerModel, TempFrameFormat, Padding
+    ExecutionBackend, ExecutionSessionMode, ExecutionSessionOptimization, FaceRecognizerModel, FaceStoreFingerprint, \
+    FaceDetectorAngleStrategy, TempFrameFormat, Padding
 from modules.paths_internal import default_output_dir
 
 age_modifier_model: Optional[str] = "styleganex_age"
@@ -23,6 +24,20 @@ log_level: Optional[LogLevel] = ['info']
 execution_providers: List[str] = ['tensorrt', 'cuda']
 execution_thread_count: Optional[int] = 4
 execution_queue_count: Optional[int] = 1
+execution_batch_size: Optional[int] = 1
+execution_batch_wait: Optional[int] = 2
+execution_backend: Optional[ExecutionBackend] = 'thread'
+execution_model_concurrency: Optional[int] = 0
+execution_provider_concurrency: Optional[List[str]] = None
+execution_session_count: Optional[int] = 1
+execution_session_families: Optional[List[str]] = None
+execution_session_family_options: Optional[List[str]] = None
+execution_session_intra_threads: Optional[int] = 0
+execution_session_inter_threads: Optional[int] = 0
+execution_session_optimization: Optional[ExecutionSessionOptimization] = 'all'
+execution_session_mode: Optional[ExecutionSessionMode] = 'sequential'
+execution_session_skip_arena: Optional[bool] = False
+execution_session_keep_optimized: Optional[bool] = False
 expression_restorer_model: Optional[str] = 'live_portrait'
 face_editor_model: Optional[str] = 'live_portrait'
 face_enhancer_model: Optional[str] = 'gfpgan_1.4'
@@ -36,6 +51,8 @@ face_swapper_pixel_boost: Optional[str] = "512x512"
 # memory
 video_memory_strategy: Optional[VideoMemoryStrategy] = "tolerant"
 system_memory_limit: Optional[int] = 0
+face_store_fingerprint: Optional[FaceStoreFingerprint] = 'sha1'
+face_store_memory_limit: Optional[int] = 1024
 # face analyser
 face_selector_order: Optional[FaceSelectorOrder] = 'best-worst'
 face_selector_age_start: Optional[FaceAnalyserAge] = None
@@ -47,8 +64,12 @@ face_selector_race: Optional[str] = None
 face_detector_model: Optional[FaceDetectorModel] = 'many'
 face_detector_size: Optional[str] = "640x640"
 face_detector_score: Optional[float] = 0.35
+face_tracker_interval: Optional[int] = 0
+face_tracker_score: Optional[float] = 0.8
+face_tracker_identity_interval: Optional[int] = 0
 face_landmarker_score: Optional[float] = 0.35
 face_detector_angles: Optional[List[int]] = [0, 90, 180, 270]
+face_detector_angle_strategy: Optional[FaceDetectorAngleStrategy] = 'all'
 face_recognizer_model: Optional[FaceRecognizerModel] = 'arcface_inswapper'
 # face selector
 
@@ -82,6 +103,7 @@ style_changer_target: Optional[str] = 'target'
 style_changer_skip_head: Optional[bool] = False
 # frame processors
 processors: List[str] = ["face_swapper"]
+processor_pipeline: Optional[str] = 'sequential'
 # uis
 ui_layouts: List[str] = ["default"]
 
@@ -3,12 +3,31 @@ import zlib
 from typing import Optional
 
 from facefusion.filesystem import is_file
+from facefusion.json import read_json, write_json
+from facefusion.typing import HashRecord
+
+HASH_CHUNK_SIZE = 4 * 1024 ** 2
 
 
 def create_hash(content: bytes) -> str:
     return format(zlib.crc32(content), '08x')
 
 
+def create_file_content_hash(file_path: str) -> str:
+    hash_value = 0
+    hash_buffer = bytearray(HASH_CHUNK_SIZE)
+    hash_view = memoryview(hash_buffer)
+
+    # the file is hashed in chunks to avoid holding large models in memory
+    with open(file_path, 'rb') as hash_file:
+        while True:
+            chunk_size = hash_file.readinto(hash_buffer)
+            if not chunk_size:
+                break
+            hash_value = zlib.crc32(hash_view[:chunk_size], hash_value)
+    return format(hash_value, '08x')
+
+
 def validate_hash(validate_path: str) -> bool:
     hash_path = get_hash_path(validate_path)
 
@@ -16,12 +35,14 @@ def validate_hash(validate_path: str) -> bool:
         with open(hash_path, 'r') as hash_file:
             hash_content = hash_file.read().strip()
 
-        with open(validate_path, 'rb') as validate_file:
-            validate_content = validate_file.read()
-        hashed = create_hash(validate_content)
+        # unchanged files are trusted from their record and skip the hashing
+        if is_hash_record_valid(validate_path, hash_content):
+            return True
+        hashed = create_file_content_hash(validate_path)
         if hashed != hash_content:
             print(f'Hash mismatch: {hash_path} != {hashed}')
-        return hashed == hash_content
+            return False
+        return write_hash_record(validate_path, hashed)
     print(f'Hash file not found: {hash_path}')
     return False
 
@@ -35,13 +56,50 @@ def get_hash_path(validate_path: str) -> Optional[str]:
     return None
 
 
+def get_hash_record_path(validate_path: str) -> Optional[str]:
+    hash_path = get_hash_path(validate_path)
+
+    if hash_path:
+        return hash_path + '.json'
+    return None
+
+
+def create_hash_record(validate_path: str, hashed: str) -> HashRecord:
+    validate_stat = os.stat(validate_path)
+    hash_record: HashRecord = \
+        {
+            'size': validate_stat.st_size,
+            'mtime': validate_stat.st_mtime_ns,
+            'hash': hashed
+        }
+    return hash_record
+
+
+def is_hash_record_valid(validate_path: str, hash_content: str) -> bool:
+    hash_record_path = get_hash_record_path(validate_path)
+
+    if hash_record_path:
+        hash_record = read_json(hash_record_path)
+        return hash_record == create_hash_record(validate_path, hash_content)
+    return False
+
+
+def write_hash_record(validate_path: str, hashed: str) -> bool:
+    hash_record_path = get_hash_record_path(validate_path)
+
+    try:
+        return write_json(hash_record_path, create_hash_record(validate_path, hashed))  # type:ignore[arg-type]
+    except OSError:
+        # a read only model directory validates again next time
+        return True
+
+
 def create_file_hash(validate_path: str) -> Optional[str]:
     if is_file(validate_path):
-        with open(validate_path, 'rb') as validate_file:
-            validate_content = validate_file.read()
-        hashed = create_hash(validate_content)
+        hashed = create_file_content_hash(validate_path)
         hash_path = get_hash_path(validate_path)
         with open(hash_path, 'w') as hash_file:
             hash_file.write(hashed)
+        write_hash_record(validate_path, hashed)
         return hashed
     return None
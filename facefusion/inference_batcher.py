@@ -0,0 +1,175 @@
+import threading
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+import numpy
+from onnxruntime import InferenceSession
+
+from facefusion.typing import InferenceRequest
+
+
+class BatchedInferenceSession:
+    """Merge concurrent run calls of the worker threads into a single batched run of the wrapped session"""
+
+    def __init__(self, inference_session: InferenceSession, batch_size: int, batch_wait: float):
+        self.inference_session = inference_session
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.condition = threading.Condition()
+        self.inference_requests: List[InferenceRequest] = []
+        self.is_running = False
+        self.can_batch = True
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inference_session, name)
+
+    def run(self, output_names: Optional[List[str]], input_feed: Dict[str, numpy.ndarray],
+            run_options: Any = None) -> List[numpy.ndarray]:
+        if run_options or not self.can_batch or not can_batch_input_feed(input_feed):
+            return self.inference_session.run(output_names, input_feed, run_options)
+        inference_request: InferenceRequest = \
+            {
+                'output_names': output_names,
+                'input_feed': input_feed,
+                'outputs': None,
+                'exception': None
+            }
+
+        with self.condition:
+            self.inference_requests.append(inference_request)
+            self.condition.notify_all()
+
+            while not is_inference_request_done(inference_request):
+                if self.is_running:
+                    self.condition.wait()
+                    continue
+                self.is_running = True
+                batch_deadline = perf_counter() + self.batch_wait
+
+                while len(self.inference_requests) < self.batch_size and batch_deadline > perf_counter():
+                    self.condition.wait(batch_deadline - perf_counter())
+                batch_requests = self.inference_requests[:self.batch_size]
+                del self.inference_requests[:self.batch_size]
+                self.condition.release()
+                try:
+                    # models whose outputs do not lead with the batch dimension are run unbatched from now on
+                    if not run_inference_requests(self.inference_session, batch_requests):
+                        self.can_batch = False
+                finally:
+                    self.condition.acquire()
+                    self.is_running = False
+                    self.condition.notify_all()
+
+        if inference_request.get('exception'):
+            raise inference_request.get('exception')
+        return inference_request.get('outputs')
+
+
+def has_dynamic_batch(inference_session: InferenceSession) -> bool:
+    for session_node in inference_session.get_inputs() + inference_session.get_outputs():
+        if not session_node.shape or isinstance(session_node.shape[0], int):
+            return False
+    return True
+
+
+def can_batch_input_feed(input_feed: Dict[str, numpy.ndarray]) -> bool:
+    input_arrays = list(input_feed.values())
+    return all(isinstance(input_array, numpy.ndarray) and input_array.ndim > 0 for input_array in input_arrays) and len(
+        set(len(input_array) for input_array in input_arrays)) == 1
+
+
+def is_inference_request_done(inference_request: InferenceRequest) -> bool:
+    return inference_request.get('outputs') is not None or inference_request.get('exception') is not None
+
+
+def create_batch_signature(inference_request: InferenceRequest) -> Any:
+    output_names = inference_request.get('output_names')
+    input_feed = inference_request.get('input_feed')
+    return tuple(output_names or []), tuple(
+        (input_name, input_array.shape[1:], input_array.dtype.str) for input_name, input_array in
+        sorted(input_feed.items()))
+
+
+def has_batch_outputs(outputs: List[numpy.ndarray], batch_total: int) -> bool:
+    return all(output.ndim > 0 and output.shape[0] == batch_total for output in outputs)
+
+
+def run_inference_requests(inference_session: InferenceSession, inference_requests: List[InferenceRequest]) -> bool:
+    batch_groups: Dict[Any, List[InferenceRequest]] = {}
+    can_batch = True
+
+    for inference_request in inference_requests:
+        batch_groups.setdefault(create_batch_signature(inference_request), []).append(inference_request)
+
+    for batch_requests in batch_groups.values():
+        try:
+            if not run_batch_requests(inference_session, batch_requests):
+                can_batch = False
+        except Exception as exception:
+            for inference_request in batch_requests:
+                inference_request['exception'] = exception
+    return can_batch
+
+
+def run_batch_requests(inference_session: InferenceSession, batch_requests: List[InferenceRequest]) -> bool:
+    output_names = batch_requests[0].get('output_names')
+    batch_sizes = [len(next(iter(inference_request.get('input_feed').values()))) for inference_request in
+                   batch_requests]
+    input_feed = \
+        {
+            input_name: numpy.concatenate(
+                [inference_request.get('input_feed').get(input_name) for inference_request in batch_requests])
+            for input_name in batch_requests[0].get('input_feed')
+        }
+    outputs = inference_session.run(output_names, input_feed)
+    batch_offset = 0
+
+    # a symbolic leading dimension can count anchors instead of batch items, such outputs are never split
+    if not has_batch_outputs(outputs, sum(batch_sizes)):
+        if len(batch_requests) == 1:
+            batch_requests[0]['outputs'] = outputs
+            return False
+        for inference_request in batch_requests:
+            inference_request['outputs'] = inference_session.run(output_names, inference_request.get('input_feed'))
+        return False
+
+    for inference_request, batch_size in zip(batch_requests, batch_sizes):
+        inference_request['outputs'] = [output[batch_offset:batch_offset + batch_size] for output in outputs]
+        batch_offset += batch_size
+    return True
+
+
+def detect_batch_size(inference_session: InferenceSession, execution_provider_keys: List[str],
+                      input_name: Optional[str] = None) -> Optional[int]:
+    session_inputs = inference_session.get_inputs()
+    input_shape = next((session_input.shape for session_input in session_inputs if session_input.name == input_name),
+                       session_inputs[0].shape)
+
+    if input_shape and isinstance(input_shape[0], int):
+        return input_shape[0]
+    # batching only pays off on accelerators, the cpu provider runs single items faster
+    if execution_provider_keys == ['cpu']:
+        return 1
+    return None
+
+
+def run_stacked_inference(inference_session: InferenceSession, batch_input_feed: Dict[str, numpy.ndarray],
+                          static_input_feed: Dict[str, numpy.ndarray],
+                          batch_size: Optional[int]) -> List[numpy.ndarray]:
+    input_total = len(next(iter(batch_input_feed.values())))
+    batch_size = batch_size or input_total
+    batch_outputs = []
+
+    for batch_start in range(0, input_total, batch_size):
+        batch_total = min(batch_size, input_total - batch_start)
+        input_feed = dict(static_input_feed)
+
+        for input_name, input_array in batch_input_feed.items():
+            input_feed[input_name] = input_array[batch_start:batch_start + batch_size]
+            # fixed batch models need the last batch padded to their batch size
+            if batch_total < batch_size:
+                batch_padding = ((0, batch_size - batch_total),) + ((0, 0),) * (input_array.ndim - 1)
+                input_feed[input_name] = numpy.pad(input_feed.get(input_name), batch_padding)
+        outputs = inference_session.run(None, input_feed)
+        batch_outputs.append([output[:batch_total] for output in outputs])
+    return [numpy.concatenate(outputs) for outputs in zip(*batch_outputs)]
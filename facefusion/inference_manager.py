@@ -1,16 +1,35 @@
-from functools import lru_cache
+import os
+from functools import partial
 from time import sleep
-from typing import List
+from typing import Any, Dict, List, Optional
 
-import onnx
-from onnxruntime import InferenceSession
+from onnxruntime import ExecutionMode, GraphOptimizationLevel, InferenceSession, SessionOptions
 
-from facefusion import process_manager, state_manager
+from facefusion import logger, process_manager, state_manager
 from facefusion.app_context import detect_app_context
+from facefusion.common_helper import cast_int, parse_key_values
 from facefusion.execution import create_execution_providers, has_execution_provider
+from facefusion.filesystem import is_file, remove_file
+from facefusion.inference_batcher import BatchedInferenceSession, has_dynamic_batch
+from facefusion.inference_replicas import ReplicatedInferenceSession
+from facefusion.model_cache import commit_model_cache, create_model_cache_temp_path, resolve_model_cache_path
 from facefusion.thread_helper import thread_lock
-from facefusion.typing import DownloadSet, ExecutionProviderKey, InferencePool, InferencePoolSet, ModelInitializer
+from facefusion.typing import DownloadSet, ExecutionProviderKey, ExecutionSessionMode, ExecutionSessionOptimization, \
+    InferencePool, InferencePoolSet
 
+GRAPH_OPTIMIZATION_LEVELS: Dict[ExecutionSessionOptimization, GraphOptimizationLevel] = \
+    {
+        'disable': GraphOptimizationLevel.ORT_DISABLE_ALL,
+        'basic': GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        'extended': GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        'all': GraphOptimizationLevel.ORT_ENABLE_ALL
+    }
+EXECUTION_MODES: Dict[ExecutionSessionMode, ExecutionMode] = \
+    {
+        'sequential': ExecutionMode.ORT_SEQUENTIAL,
+        'parallel': ExecutionMode.ORT_PARALLEL
+    }
+COMPILING_EXECUTION_PROVIDERS: List[ExecutionProviderKey] = ['coreml', 'openvino', 'tensorrt']
 INFERENCE_POOLS: InferencePoolSet = \
     {
         'cli': {},  # type:ignore[typeddict-item]
@@ -21,11 +40,17 @@ INFERENCE_POOLS: InferencePoolSet = \
 def get_inference_pool(model_context: str, model_sources: DownloadSet) -> InferencePool:
     global INFERENCE_POOLS
 
+    app_context = detect_app_context()
+    inference_context = get_inference_context(model_context)
+    inference_pool = INFERENCE_POOLS.get(app_context).get(inference_context)
+
+    # cache hits skip the global lock, it is only taken to create pools
+    if inference_pool and not process_manager.is_checking():
+        return inference_pool
+
     with thread_lock():
         while process_manager.is_checking():
             sleep(0.5)
-        app_context = detect_app_context()
-        inference_context = get_inference_context(model_context)
 
         if app_context == 'cli' and INFERENCE_POOLS.get('ui').get(inference_context):
             INFERENCE_POOLS['cli'][inference_context] = INFERENCE_POOLS.get('ui').get(inference_context)
@@ -36,21 +61,97 @@ def get_inference_pool(model_context: str, model_sources: DownloadSet) -> Infere
             INFERENCE_POOLS[app_context][inference_context] = create_inference_pool(model_sources,
                                                                                     state_manager.get_item(
                                                                                         'execution_device_id'),
-                                                                                    execution_provider_keys)
+                                                                                    execution_provider_keys,
+                                                                                    get_model_family(model_context))
 
         return INFERENCE_POOLS.get(app_context).get(inference_context)
 
 
 def create_inference_pool(model_sources: DownloadSet, execution_device_id: str,
-                          execution_provider_keys: List[ExecutionProviderKey]) -> InferencePool:
+                          execution_provider_keys: List[ExecutionProviderKey],
+                          model_family: Optional[str] = None) -> InferencePool:
     inference_pool: InferencePool = {}
+    inference_session_total = resolve_inference_session_total()
 
     for model_name in model_sources.keys():
-        inference_pool[model_name] = create_inference_session(model_sources.get(model_name).get('path'),
-                                                              execution_device_id, execution_provider_keys)
+        model_path = model_sources.get(model_name).get('path')
+        if inference_session_total > 1:
+            inference_pool[model_name] = ReplicatedInferenceSession(
+                partial(create_inference_session, model_path, execution_device_id, execution_provider_keys,
+                        model_family, inference_session_total), inference_session_total)  # type:ignore[assignment]
+        else:
+            inference_pool[model_name] = create_inference_session(model_path, execution_device_id,
+                                                                  execution_provider_keys, model_family)
     return inference_pool
 
 
+def resolve_inference_session_total() -> int:
+    execution_batch_size = state_manager.get_item('execution_batch_size')
+
+    # replicas would split the concurrent requests that the batched session is meant to merge
+    if execution_batch_size and execution_batch_size > 1:
+        return 1
+    return max(1, state_manager.get_item('execution_session_count') or 1)
+
+
+def create_session_options(model_family: Optional[str], execution_provider_keys: List[ExecutionProviderKey],
+                           inference_session_total: int) -> SessionOptions:
+    session_options = SessionOptions()
+    session_options.intra_op_num_threads = cast_int(get_session_option(model_family, 'intra_threads')) or 0
+    session_options.inter_op_num_threads = cast_int(get_session_option(model_family, 'inter_threads')) or 0
+    session_options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS.get(resolve_session_optimization(model_family))
+    session_options.execution_mode = EXECUTION_MODES.get(get_session_option(model_family, 'mode'),
+                                                         ExecutionMode.ORT_SEQUENTIAL)
+    session_options.enable_cpu_mem_arena = get_session_option(model_family, 'skip_arena') not in [True, 'True']
+
+    if execution_provider_keys == ['cpu'] and inference_session_total > 1 and not session_options.intra_op_num_threads:
+        session_options.intra_op_num_threads = max(1, (os.cpu_count() or 1) // inference_session_total)
+    return session_options
+
+
+def resolve_optimized_model_path(model_path: str, model_family: Optional[str],
+                                 execution_provider_keys: List[ExecutionProviderKey]) -> Optional[str]:
+    # compiling providers turn the graph into nodes that cannot be serialized
+    if state_manager.get_item('execution_session_keep_optimized') and is_tuned_model_family(model_family) and not any(
+            execution_provider_key in COMPILING_EXECUTION_PROVIDERS for execution_provider_key in execution_provider_keys):
+        execution_session_optimization = resolve_session_optimization(model_family)
+        return resolve_model_cache_path(model_path, ['_'.join(execution_provider_keys), execution_session_optimization],
+                                        '.onnx')
+    return None
+
+
+def get_session_option(model_family: Optional[str], session_option_name: str) -> Any:
+    execution_session_family_options = parse_key_values(state_manager.get_item('execution_session_family_options'))
+    session_option_key = str(model_family) + '.' + session_option_name
+
+    # options of a single family like face_detector.intra_threads=2 win over the options of all tuned families
+    if session_option_key in execution_session_family_options:
+        return execution_session_family_options.get(session_option_key)
+    if is_tuned_model_family(model_family):
+        return state_manager.get_item('execution_session_' + session_option_name)  # type:ignore[arg-type]
+    return None
+
+
+def resolve_session_optimization(model_family: Optional[str]) -> ExecutionSessionOptimization:
+    execution_session_optimization = get_session_option(model_family, 'optimization')
+
+    if execution_session_optimization in GRAPH_OPTIMIZATION_LEVELS:
+        return execution_session_optimization
+    return 'all'
+
+
+def is_tuned_model_family(model_family: Optional[str]) -> bool:
+    execution_session_families = state_manager.get_item('execution_session_families')
+    return not execution_session_families or model_family in execution_session_families
+
+
+def get_model_family(model_context: str) -> str:
+    for model_context_prefix in ['facefusion.processors.modules.', 'facefusion.']:
+        if model_context.startswith(model_context_prefix):
+            return model_context[len(model_context_prefix):].split('.')[0]
+    return model_context.split('.')[0]
+
+
 def clear_inference_pool(model_context: str) -> None:
     global INFERENCE_POOLS
 
@@ -62,15 +163,49 @@ def clear_inference_pool(model_context: str) -> None:
 
 
 def create_inference_session(model_path: str, execution_device_id: str,
-                             execution_provider_keys: List[ExecutionProviderKey]) -> InferenceSession:
+                             execution_provider_keys: List[ExecutionProviderKey], model_family: Optional[str] = None,
+                             inference_session_total: int = 1) -> InferenceSession:
     execution_providers = create_execution_providers(execution_device_id, execution_provider_keys)
-    return InferenceSession(model_path, providers=execution_providers)
-
-
-@lru_cache(maxsize=None)
-def get_static_model_initializer(model_path: str) -> ModelInitializer:
-    model = onnx.load(model_path)
-    return onnx.numpy_helper.to_array(model.graph.initializer[-1])
+    session_options = create_session_options(model_family, execution_provider_keys, inference_session_total)
+    optimized_model_path = resolve_optimized_model_path(model_path, model_family, execution_provider_keys)
+
+    inference_session = None
+
+    if optimized_model_path and is_file(optimized_model_path):
+        inference_session = load_optimized_inference_session(optimized_model_path, session_options,
+                                                             execution_providers)
+    if not inference_session and optimized_model_path:
+        optimized_model_temp_path = create_model_cache_temp_path(optimized_model_path)
+        session_options.optimized_model_filepath = optimized_model_temp_path
+        try:
+            inference_session = InferenceSession(model_path, sess_options=session_options,
+                                                 providers=execution_providers)
+        finally:
+            commit_model_cache(optimized_model_temp_path, optimized_model_path)
+    if not inference_session:
+        inference_session = InferenceSession(model_path, sess_options=session_options, providers=execution_providers)
+    execution_batch_size = state_manager.get_item('execution_batch_size')
+
+    if execution_batch_size and execution_batch_size > 1 and has_dynamic_batch(inference_session):
+        execution_batch_wait = state_manager.get_item('execution_batch_wait') or 0
+        return BatchedInferenceSession(inference_session, execution_batch_size,
+                                       execution_batch_wait / 1000)  # type:ignore[return-value]
+    return inference_session
+
+
+def load_optimized_inference_session(optimized_model_path: str, session_options: SessionOptions,
+                                     execution_providers: List[Any]) -> Optional[InferenceSession]:
+    graph_optimization_level = session_options.graph_optimization_level
+    session_options.graph_optimization_level = GraphOptimizationLevel.ORT_DISABLE_ALL
+
+    # a cached model that fails to load counts as a cache miss and is optimized again
+    try:
+        return InferenceSession(optimized_model_path, sess_options=session_options, providers=execution_providers)
+    except Exception as exception:
+        logger.debug(str(exception), __name__)
+        remove_file(optimized_model_path)
+    session_options.graph_optimization_level = graph_optimization_level
+    return None
 
 
 def resolve_execution_provider_keys(model_context: str) -> List[ExecutionProviderKey]:
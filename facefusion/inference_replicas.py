@@ -0,0 +1,48 @@
+import threading
+from queue import Empty, SimpleQueue
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy
+from onnxruntime import InferenceSession
+
+
+class ReplicatedInferenceSession:
+    """Hold up to a fixed amount of replicas of a session, each run checks out an idle replica and checks it in again"""
+
+    def __init__(self, create_session: Callable[[], InferenceSession], session_total: int):
+        self.create_session = create_session
+        self.session_total = session_total
+        self.session_lock = threading.Lock()
+        self.inference_sessions: List[InferenceSession] = [create_session()]
+        self.idle_sessions: SimpleQueue[InferenceSession] = SimpleQueue()
+        self.idle_sessions.put(self.inference_sessions[0])
+
+    def __getattr__(self, name: str) -> Any:
+        if name == 'inference_sessions':
+            raise AttributeError(name)
+        return getattr(self.inference_sessions[0], name)
+
+    def checkout(self) -> InferenceSession:
+        try:
+            return self.idle_sessions.get_nowait()
+        except Empty:
+            pass
+
+        # further replicas are created lazily once all existing replicas are busy
+        with self.session_lock:
+            if len(self.inference_sessions) < self.session_total:
+                inference_session = self.create_session()
+                self.inference_sessions.append(inference_session)
+                return inference_session
+        return self.idle_sessions.get()
+
+    def checkin(self, inference_session: InferenceSession) -> None:
+        self.idle_sessions.put(inference_session)
+
+    def run(self, output_names: Optional[List[str]], input_feed: Dict[str, numpy.ndarray],
+            run_options: Any = None) -> List[numpy.ndarray]:
+        inference_session = self.checkout()
+        try:
+            return inference_session.run(output_names, input_feed, run_options)
+        finally:
+            self.checkin(inference_session)
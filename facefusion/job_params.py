@@ -12,10 +12,10 @@ from facefusion.typing import (
 )
 from modules.paths_internal import script_path
 
-execution_thread_count, execution_queue_count, video_memory_strategy = tune_performance()
-        
+
 class JobParams:
     def __init__(self):
+        execution_thread_count, execution_queue_count, video_memory_strategy = tune_performance()
         self.id = 0
         # general
         self.source_paths: Optional[List[str]] = None
@@ -1,6 +1,5 @@
 import platform
-
-import torch
+from functools import lru_cache
 
 from facefusion import globals
 
@@ -26,7 +25,11 @@ def limit_system_memory(system_memory_limit: int = 1) -> bool:
         return False
 
 
+@lru_cache(maxsize=None)
 def get_total_vram():
+    # torch is only needed to query the video memory and takes seconds to import
+    import torch
+
     if torch.cuda.is_available():
         total_memory = torch.cuda.get_device_properties(0).total_memory
         return total_memory / (1024 ** 2)  # Convert bytes to MB
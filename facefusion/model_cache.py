@@ -0,0 +1,77 @@
+import os
+import tempfile
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy
+
+from facefusion.filesystem import create_directory, is_file, remove_file, resolve_relative_path
+from facefusion.hash_helper import create_file_content_hash, get_hash_path
+from facefusion.typing import ModelInitializer
+
+
+def get_model_cache_directory_path() -> str:
+    return resolve_relative_path('../.assets/models/cache')
+
+
+@lru_cache(maxsize=None)
+def get_model_hash(model_path: str) -> str:
+    hash_path = get_hash_path(model_path)
+
+    if is_file(hash_path):
+        with open(hash_path, 'r') as hash_file:
+            return hash_file.read().strip()
+    return create_file_content_hash(model_path)
+
+
+def resolve_model_cache_path(model_path: str, cache_keys: List[str], cache_extension: str) -> Optional[str]:
+    model_cache_directory_path = get_model_cache_directory_path()
+
+    if is_file(model_path) and (os.path.isdir(model_cache_directory_path) or create_directory(model_cache_directory_path)):
+        model_file_name, _ = os.path.splitext(os.path.basename(model_path))
+        model_cache_name = '.'.join([model_file_name, get_model_hash(model_path)] + cache_keys)
+        return os.path.join(model_cache_directory_path, model_cache_name + cache_extension)
+    return None
+
+
+def create_model_cache_temp_path(model_cache_path: str) -> str:
+    model_cache_directory_path, model_cache_name = os.path.split(model_cache_path)
+    _, cache_extension = os.path.splitext(model_cache_name)
+    # the temp file shares the directory and extension to be renamed onto the cache path once it is complete
+    temp_file_descriptor, temp_path = tempfile.mkstemp(suffix=cache_extension, prefix=model_cache_name + '.',
+                                                       dir=model_cache_directory_path)
+    os.close(temp_file_descriptor)
+    return temp_path
+
+
+def commit_model_cache(temp_path: str, model_cache_path: str) -> bool:
+    if is_file(temp_path) and os.path.getsize(temp_path) > 0:
+        os.replace(temp_path, model_cache_path)
+        return True
+    remove_file(temp_path)
+    return False
+
+
+@lru_cache(maxsize=None)
+def get_static_model_initializer(model_path: str) -> ModelInitializer:
+    initializer_path = resolve_model_cache_path(model_path, ['initializer'], '.npy')
+
+    # the cached initializer is mapped instead of parsing the full model again
+    if initializer_path and is_file(initializer_path):
+        try:
+            return numpy.load(initializer_path, mmap_mode='r')
+        except (OSError, ValueError):
+            remove_file(initializer_path)
+    # onnx is only parsed on a cache miss and slows down the startup otherwise
+    import onnx
+
+    model = onnx.load(model_path)
+    model_initializer = onnx.numpy_helper.to_array(model.graph.initializer[-1])
+    if initializer_path:
+        initializer_temp_path = create_model_cache_temp_path(initializer_path)
+        try:
+            numpy.save(initializer_temp_path, model_initializer)
+            commit_model_cache(initializer_temp_path, initializer_path)
+        except OSError:
+            remove_file(initializer_temp_path)
+    return model_initializer
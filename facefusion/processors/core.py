@@ -1,18 +1,36 @@
 import importlib
+import multiprocessing
 import os
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from queue import Queue
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, \
+    as_completed, wait
+from functools import partial
 from types import ModuleType
-from typing import Any, List
+from typing import Any, Deque, Dict, Iterator, List, Set, Tuple
+
+import numpy
 
 import facefusion.globals
-from facefusion import logger, wording, state_manager
+from facefusion import logger, process_manager, wording, state_manager
+from facefusion.audio import create_empty_audio_frame, get_voice_frame
+from facefusion.common_helper import get_first
 from facefusion.face_analyser import get_avg_faces
 from facefusion.ff_status import FFStatus
+from facefusion.ffmpeg import open_frame_decoder, open_frame_encoder
+from facefusion.filesystem import filter_audio_paths, list_directory
+from facefusion.frame_buffer import FrameRingBuffer
 from facefusion.mytqdm import mytqdm as tqdm
-from facefusion.typing import ProcessFrames, QueuePayload
+from facefusion.typing import ApplyStateItem, Args, Fps, ProcessFrames, ProcessVisionFrame, QueuePayload, VisionFrame
+from facefusion.vision import count_trim_frame_total, detect_video_fps, pack_resolution, read_image, \
+    restrict_video_fps, unpack_resolution, write_image
 
+PROCESS_WORKER_PAYLOAD_KEYS = ['source_face', 'source_face_2', 'reference_faces', 'reference_faces_2']
+PROCESS_WORKER_PAYLOAD: Dict[str, Any] = {}
+PROCESS_WORKER_FUSED_FRAMES: Dict[Tuple[str, ...], ProcessFrames] = {}
+PROCESSORS_ARGS: Args = {}
+PROCESSORS_ARGS_APPLIED: Set[str] = set()
 PROCESSORS_METHODS = \
     [
         'get_inference_pool',
@@ -39,6 +57,11 @@ def load_processor_module(processor: str) -> Any:
             if not hasattr(processor_module, method_name):
                 last_method_name = method_name
                 raise NotImplementedError
+        # processors that were not selected at startup receive their args once they are loaded
+        if PROCESSORS_ARGS and processor not in PROCESSORS_ARGS_APPLIED:
+            PROCESSORS_ARGS_APPLIED.add(processor)
+            processor_module.apply_args(collect_processor_args(processor_module, PROCESSORS_ARGS),
+                                        state_manager.init_item)
     except ModuleNotFoundError as exception:
         logger.error(wording.get('processor_not_loaded').format(processor=processor), __name__)
         logger.debug(exception.msg, __name__)
@@ -66,22 +89,224 @@ def get_processors_modules(frame_processors: List[str]) -> List[ModuleType]:
     return processor_modules
 
 
+def apply_processors_args(args: Args, apply_state_item: ApplyStateItem) -> None:
+    processors = [processor for processor in args.get('processors') or [] if processor in list_processors()]
+
+    PROCESSORS_ARGS.clear()
+    PROCESSORS_ARGS.update(args)
+    PROCESSORS_ARGS_APPLIED.clear()
+    PROCESSORS_ARGS_APPLIED.update(processors)
+    for processor_module in get_processors_modules(processors):
+        processor_module.apply_args(collect_processor_args(processor_module, args), apply_state_item)
+
+
+def collect_processor_args(processor_module: ModuleType, args: Args) -> Args:
+    program = ArgumentParser(add_help=False)
+    program.add_argument_group('processors')
+    processor_module.register_args(program)
+    processor_args = vars(program.parse_args([]))
+
+    # the args of a processor are only registered once it is selected, until then its defaults are used
+    processor_args.update({key: value for key, value in args.items() if value is not None})
+    return processor_args
+
+
+def list_processors() -> List[str]:
+    return list_directory('facefusion/processors/modules')
+
+
 def clear_processors_modules(processors: List[str]) -> None:
     for processor in processors:
         processor_module = load_processor_module(processor)
         processor_module.clear_inference_pool()
 
 
+def get_fused_processors_modules(processors: List[str]) -> List[ModuleType]:
+    processor_modules = []
+
+    for processor_module in get_processors_modules(processors):
+        if processor_module.__name__.endswith('style_changer') and state_manager.get_item(
+                'style_changer_target') == 'source':
+            continue
+        processor_modules.append(processor_module)
+    return processor_modules
+
+
+def fused_process_frame(processor_modules: List[ModuleType], inputs: Dict[str, Any]) -> VisionFrame:
+    for processor_module in processor_modules:
+        inputs['target_vision_frame'] = processor_module.process_frame(inputs)
+    return inputs.get('target_vision_frame')
+
+
+def create_fused_process_vision_frame(processor_modules: List[ModuleType]) -> ProcessVisionFrame:
+    source_audio_path = get_first(filter_audio_paths(state_manager.get_item('source_paths')))
+    source_audio_path_2 = get_first(filter_audio_paths(state_manager.get_item('source_paths_2')))
+    temp_video_fps = restrict_video_fps(state_manager.get_item('target_path'),
+                                        state_manager.get_item('output_video_fps'))
+
+    def process_vision_frame(queue_payload: QueuePayload, target_vision_frame: VisionFrame) -> VisionFrame:
+        frame_number = queue_payload.get('frame_number')
+        source_audio_frame = get_voice_frame(source_audio_path, temp_video_fps, frame_number)
+        source_audio_frame_2 = get_voice_frame(source_audio_path_2, temp_video_fps, frame_number)
+        if not numpy.any(source_audio_frame):
+            source_audio_frame = create_empty_audio_frame()
+        if not numpy.any(source_audio_frame_2):
+            source_audio_frame_2 = create_empty_audio_frame()
+        source_vision_frame = target_vision_frame.copy()
+        processor_inputs = \
+            {
+                'reference_faces': queue_payload.get('reference_faces'),
+                'reference_faces_2': queue_payload.get('reference_faces_2'),
+                'source_face': queue_payload.get('source_face'),
+                'source_face_2': queue_payload.get('source_face_2'),
+                'source_audio_frame': source_audio_frame,
+                'source_audio_frame_2': source_audio_frame_2,
+                'source_frame': source_vision_frame,
+                'source_vision_frame': source_vision_frame,
+                'target_vision_frame': target_vision_frame,
+                'target_frame_number': frame_number
+            }
+        return fused_process_frame(processor_modules, processor_inputs)
+
+    return process_vision_frame
+
+
+def create_fused_process_frames(processor_modules: List[ModuleType]) -> ProcessFrames:
+    process_vision_frame = create_fused_process_vision_frame(processor_modules)
+
+    def process_frames(queue_payloads: List[QueuePayload]) -> List[Tuple[int, str]]:
+        output_frames = []
+
+        for queue_payload in process_manager.manage(queue_payloads):
+            target_vision_path = queue_payload.get('frame_path')
+            target_vision_frame = read_image(target_vision_path)
+            output_vision_frame = process_vision_frame(queue_payload, target_vision_frame)
+            write_image(target_vision_path, output_vision_frame)
+            output_frames.append((queue_payload.get('frame_number'), target_vision_path))
+        return output_frames
+
+    return process_frames
+
+
+def fused_process_video(processor_modules: List[ModuleType], temp_frame_paths: List[str]) -> None:
+    if state_manager.get_item('execution_backend') == 'process':
+        processor_module_names = [processor_module.__name__ for processor_module in processor_modules]
+        multi_process_frames(temp_frame_paths, partial(process_worker_fused_frames, processor_module_names))
+    else:
+        multi_process_frames(temp_frame_paths, create_fused_process_frames(processor_modules))
+
+
+def stream_process_video(processor_modules: List[ModuleType], target_path: str, temp_video_resolution: str,
+                         temp_video_fps: Fps, output_video_resolution: str, output_video_fps: Fps) -> bool:
+    from facefusion.face_store import get_reference_faces
+
+    frame_total = round(count_trim_frame_total(target_path, state_manager.get_item('trim_frame_start'),
+                                               state_manager.get_item('trim_frame_end')) / detect_video_fps(
+        target_path) * temp_video_fps)
+    execution_thread_count = state_manager.get_item('execution_thread_count')
+    process_vision_frame = create_fused_process_vision_frame(processor_modules)
+    source_face, source_face_2 = get_avg_faces()
+    reference_faces, reference_faces_2 = (
+        get_reference_faces() if 'reference' in state_manager.get_item('face_selector_mode') else (None, None))
+    futures: Deque[Tuple[int, Future[VisionFrame]]] = deque()
+    # the decoder reads into fixed slots that stay shared with the processors and the encoder until the frame is encoded
+    frame_ring_buffer = FrameRingBuffer(unpack_resolution(temp_video_resolution), execution_thread_count * 2)
+    frame_decoder = open_frame_decoder(target_path, temp_video_resolution, temp_video_fps)
+    frame_encoder = None
+    frame_decoder.stdin.close()
+
+    def encode_frame() -> bool:
+        nonlocal frame_encoder
+        slot_index, future = futures.popleft()
+        try:
+            output_vision_frame = future.result()
+        except Exception as e:
+            print("Error: ", e)
+            traceback.print_exc()
+            output_vision_frame = frame_ring_buffer.get_vision_frame(slot_index)
+        output_vision_frame = numpy.ascontiguousarray(output_vision_frame, dtype=numpy.uint8)
+
+        # the encoder is opened lazily since processors like frame_enhancer change the frame resolution
+        if frame_encoder is None:
+            output_frame_height, output_frame_width = output_vision_frame.shape[:2]
+            frame_encoder = open_frame_encoder(target_path, pack_resolution((output_frame_width, output_frame_height)),
+                                               output_video_resolution, output_video_fps)
+        try:
+            frame_encoder.stdin.write(output_vision_frame.data)
+        except (BrokenPipeError, ValueError):
+            return False
+        finally:
+            frame_ring_buffer.release_slot(slot_index)
+        progress.update()
+        return True
+
+    with tqdm(total=frame_total, desc=wording.get('processing'), unit='frame', ascii=' =',
+              disable=state_manager.get_item('log_level') in ['warn', 'error']) as progress:
+        progress.set_postfix(
+            {
+                'execution_providers': state_manager.get_item('execution_providers'),
+                'execution_thread_count': execution_thread_count,
+                'processor_pipeline': 'streaming'
+            })
+
+        with ThreadPoolExecutor(max_workers=execution_thread_count) as executor:
+            frame_number = 0
+            is_encoding = True
+
+            while is_encoding and process_manager.is_processing():
+                slot_index = frame_ring_buffer.acquire_slot()
+                target_vision_frame = frame_ring_buffer.get_vision_frame(slot_index)
+                if frame_decoder.stdout.readinto(target_vision_frame) < frame_ring_buffer.slot_size:
+                    frame_ring_buffer.release_slot(slot_index)
+                    break
+                queue_payload: QueuePayload = \
+                    {
+                        'frame_number': frame_number,
+                        'frame_path': None,
+                        'source_face': source_face,
+                        'source_face_2': source_face_2,
+                        'reference_faces': reference_faces,
+                        'reference_faces_2': reference_faces_2
+                    }
+                futures.append((slot_index, executor.submit(process_vision_frame, queue_payload, target_vision_frame)))
+                frame_number += 1
+
+                # bound the frames in flight so a slow encoder or processor chain throttles the decoder
+                if len(futures) >= execution_thread_count * 2:
+                    is_encoding = encode_frame()
+            while is_encoding and futures and process_manager.is_processing():
+                is_encoding = encode_frame()
+            for _, future in futures:
+                future.cancel()
+    frame_ring_buffer.close()
+
+    frame_decoder.stdout.close()
+    if process_manager.is_stopping():
+        frame_decoder.terminate()
+    frame_decoder.wait()
+    if frame_encoder:
+        try:
+            frame_encoder.stdin.close()
+        except BrokenPipeError:
+            pass
+        if process_manager.is_stopping():
+            frame_encoder.terminate()
+        return frame_encoder.wait() == 0 and is_encoding and process_manager.is_processing()
+    return False
+
+
 def multi_process_frames(temp_frame_paths: List[str], process_frames: ProcessFrames) -> None:
     queue_payloads = create_queue_payloads(temp_frame_paths)
+    execution_thread_count = state_manager.get_item('execution_thread_count')
+    execution_queue_count = max(1, state_manager.get_item('execution_queue_count') or 1)
 
     with tqdm(total=len(queue_payloads), desc=wording.get('processing'), unit='frame', ascii=' =',
               disable=state_manager.get_item('log_level') in ['warn', 'error']) as progress:
         progress.set_postfix(
             {
                 'execution_providers': state_manager.get_item('execution_providers'),
-                'execution_thread_count': state_manager.get_item('execution_thread_count'),
-                'execution_queue_count': state_manager.get_item('execution_queue_count')
+                'execution_thread_count': execution_thread_count,
+                'execution_queue_count': execution_queue_count
             })
         status = FFStatus()
 
@@ -92,44 +317,91 @@ def multi_process_frames(temp_frame_paths: List[str], process_frames: ProcessFra
                 if current_step % 30 == 0 or current_step == status.job_total:
                     status.preview_image = preview_image
 
-        with ThreadPoolExecutor(max_workers=state_manager.get_item('execution_thread_count')) as executor:
-            futures = []
-            queue: Queue[QueuePayload] = create_queue(queue_payloads)
-            while not queue.empty():
-                future = executor.submit(process_frames, pick_queue(queue, 1))
-                futures.append(future)
-            for future_done in as_completed(futures):
-                try:
-                    results = future_done.result()
-                    for result in results:
-                        if isinstance(result, tuple):
-                            frame_number, processed_path = result
-                            if frame_number % 10 == 0 or frame_number == status.job_total:
-                                update_progress(processed_path)
-                            else:
-                                update_progress()
+        def complete_future(future_done: Future[List[Tuple[int, str]]]) -> None:
+            try:
+                results = future_done.result()
+                for result in results:
+                    if isinstance(result, tuple):
+                        frame_number, processed_path = result
+                        if frame_number % 10 == 0 or frame_number == status.job_total:
+                            update_progress(processed_path)
                         else:
-                            print("Error: ", result)
+                            update_progress()
+                    else:
+                        print("Error: ", result)
+
+            except Exception as e:
+                print("Error: ", e)
+                traceback.print_exc()
+                pass
+
+        with create_executor(queue_payloads) as executor:
+            futures: Set[Future[List[Tuple[int, str]]]] = set()
+
+            for queue_chunk in create_queue_chunks(queue_payloads, execution_queue_count):
+                if not process_manager.is_processing():
+                    break
+                if isinstance(executor, ProcessPoolExecutor):
+                    futures.add(executor.submit(process_worker_frames, process_frames, compact_queue_payloads(queue_chunk)))
+                else:
+                    futures.add(executor.submit(process_frames, queue_chunk))
+
+                # bound the futures in flight and report completions while the remaining chunks are submitted
+                if len(futures) >= execution_thread_count * 2:
+                    futures_done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future_done in futures_done:
+                        complete_future(future_done)
+            for future_done in as_completed(futures):
+                complete_future(future_done)
+
+
+def create_executor(queue_payloads: List[QueuePayload]) -> Executor:
+    execution_thread_count = state_manager.get_item('execution_thread_count')
+
+    if state_manager.get_item('execution_backend') == 'process' and queue_payloads:
+        # the worker processes receive the state and the shared faces once instead of once per frame
+        # every worker keeps its own face store and face tracker, cached faces and anchors are not shared across them
+        worker_payload = {key: queue_payloads[0].get(key) for key in PROCESS_WORKER_PAYLOAD_KEYS}
+        return ProcessPoolExecutor(max_workers=execution_thread_count, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=init_process_worker,
+                                   initargs=(dict(state_manager.get_state()), worker_payload))
+    return ThreadPoolExecutor(max_workers=execution_thread_count)
+
+
+def init_process_worker(state: Dict[str, Any], worker_payload: Dict[str, Any]) -> None:
+    for key, value in state.items():
+        state_manager.init_item(key, value)
+    PROCESS_WORKER_PAYLOAD.clear()
+    PROCESS_WORKER_PAYLOAD.update(worker_payload)
+    PROCESS_WORKER_FUSED_FRAMES.clear()
+    process_manager.start()
+
+
+def compact_queue_payloads(queue_payloads: List[QueuePayload]) -> List[QueuePayload]:
+    return [
+        {
+            'frame_number': queue_payload.get('frame_number'),
+            'frame_path': queue_payload.get('frame_path')
+        } for queue_payload in queue_payloads]
+
+
+def process_worker_frames(process_frames: ProcessFrames, queue_payloads: List[QueuePayload]) -> List[Tuple[int, str]]:
+    queue_payloads = [{**PROCESS_WORKER_PAYLOAD, **queue_payload} for queue_payload in queue_payloads]
+    return process_frames(queue_payloads)
 
-                except Exception as e:
-                    print("Error: ", e)
-                    traceback.print_exc()
-                    pass
 
+def process_worker_fused_frames(processor_module_names: List[str], queue_payloads: List[QueuePayload]) -> List[Tuple[int, str]]:
+    process_frames_key = tuple(processor_module_names)
 
-def create_queue(queue_payloads: List[QueuePayload]) -> Queue[QueuePayload]:
-    queue: Queue[QueuePayload] = Queue()
-    for queue_payload in queue_payloads:
-        queue.put(queue_payload)
-    return queue
+    if process_frames_key not in PROCESS_WORKER_FUSED_FRAMES:
+        processor_modules = [importlib.import_module(processor_module_name) for processor_module_name in processor_module_names]
+        PROCESS_WORKER_FUSED_FRAMES[process_frames_key] = create_fused_process_frames(processor_modules)
+    return PROCESS_WORKER_FUSED_FRAMES.get(process_frames_key)(queue_payloads)
 
 
-def pick_queue(queue: Queue[QueuePayload], queue_per_future: int) -> List[QueuePayload]:
-    queues = []
-    for _ in range(queue_per_future):
-        if not queue.empty():
-            queues.append(queue.get())
-    return queues
+def create_queue_chunks(queue_payloads: List[QueuePayload], queue_per_future: int) -> Iterator[List[QueuePayload]]:
+    for index in range(0, len(queue_payloads), queue_per_future):
+        yield queue_payloads[index:index + queue_per_future]
 
 
 def create_queue_payloads(temp_frame_paths: List[str]) -> List[QueuePayload]:
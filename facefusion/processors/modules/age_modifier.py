@@ -13,8 +13,8 @@ from facefusion import config, content_analyser, face_classifier, face_detector,
     face_recognizer, inference_manager, logger, process_manager, state_manager, wording
 from facefusion.common_helper import create_int_metavar
 from facefusion.download import conditional_download_hashes, conditional_download_sources
-from facefusion.face_analyser import get_many_faces, get_one_face
-from facefusion.face_helper import merge_matrix, paste_back, scale_face_landmark_5, warp_face_by_face_landmark_5
+from facefusion.face_analyser import get_frame_faces, get_one_face
+from facefusion.face_helper import merge_matrix, paste_back_area, scale_face_landmark_5, warp_face_by_face_landmark_5
 from facefusion.face_masker import create_occlusion_mask, create_static_box_mask
 from facefusion.face_selector import find_similar_faces, sort_and_filter_faces
 from facefusion.face_store import get_reference_faces
@@ -22,7 +22,7 @@ from facefusion.filesystem import in_directory, is_image, is_video, resolve_rela
 from facefusion.processors import choices as processors_choices
 from facefusion.processors.typing import AgeModifierInputs
 from facefusion.program_helper import find_argument_group
-from facefusion.thread_helper import thread_semaphore
+from facefusion.thread_helper import model_semaphore
 from facefusion.typing import ApplyStateItem, Args, Face, InferencePool, Mask, ModelOptions, ModelSet, ProcessMode, \
     QueuePayload, VisionFrame
 from facefusion.vision import read_image, read_static_image, write_image
@@ -154,8 +154,8 @@ def modify_age(target_face: Face, temp_vision_frame: VisionFrame) -> VisionFrame
     extend_vision_frame = fix_color(extend_vision_frame_raw, extend_vision_frame)
     extend_crop_mask = cv2.pyrUp(numpy.minimum.reduce(crop_masks).clip(0, 1))
     extend_affine_matrix *= extend_vision_frame.shape[0] / 512
-    paste_vision_frame = paste_back(temp_vision_frame, extend_vision_frame, extend_crop_mask, extend_affine_matrix)
-    return paste_vision_frame
+    paste_back_area(temp_vision_frame, extend_vision_frame, extend_crop_mask, extend_affine_matrix)
+    return temp_vision_frame
 
 
 def forward(crop_vision_frame: VisionFrame, extend_vision_frame: VisionFrame) -> VisionFrame:
@@ -171,7 +171,7 @@ def forward(crop_vision_frame: VisionFrame, extend_vision_frame: VisionFrame) ->
             age_modifier_inputs[age_modifier_input.name] = prepare_direction(
                 state_manager.get_item('age_modifier_direction'))
 
-    with thread_semaphore():
+    with model_semaphore('age_modifier'):
         crop_vision_frame = age_modifier.run(None, age_modifier_inputs)[0][0]
 
     return crop_vision_frame
@@ -229,7 +229,7 @@ def normalize_extend_frame(extend_vision_frame: VisionFrame) -> VisionFrame:
 
 
 def get_reference_frame(source_face: Face, target_face: Face, temp_vision_frame: VisionFrame) -> VisionFrame:
-    return modify_age(target_face, temp_vision_frame)
+    return modify_age(target_face, temp_vision_frame.copy())
 
 
 def process_frame(inputs: AgeModifierInputs) -> VisionFrame:
@@ -237,7 +237,11 @@ def process_frame(inputs: AgeModifierInputs) -> VisionFrame:
     reference_faces_2 = inputs.get('reference_faces_2')
 
     target_vision_frame = inputs.get('target_vision_frame')
-    many_faces = sort_and_filter_faces(get_many_faces([target_vision_frame]))
+    many_faces = sort_and_filter_faces(get_frame_faces(target_vision_frame, inputs.get('target_frame_number')))
+
+    # the faces are pasted in place, the frame of the caller is copied once instead of once per face
+    if many_faces:
+        target_vision_frame = target_vision_frame.copy()
 
     if state_manager.get_item('face_selector_mode') == 'many':
         if many_faces:
@@ -283,7 +287,8 @@ def process_frames(queue_payloads: List[QueuePayload]) -> None:
             {
                 'reference_faces': reference_faces,
                 'reference_faces_2': reference_faces_2,
-                'target_vision_frame': target_vision_frame
+                'target_vision_frame': target_vision_frame,
+                'target_frame_number': target_frame_number
             })
         write_image(target_vision_path, output_vision_frame)
         output_frames.append((target_frame_number, target_vision_path))
@@ -11,8 +11,8 @@ from facefusion import config, content_analyser, face_classifier, face_detector,
     face_recognizer, inference_manager, logger, process_manager, state_manager, wording
 from facefusion.common_helper import create_int_metavar
 from facefusion.download import conditional_download_hashes, conditional_download_sources
-from facefusion.face_analyser import get_many_faces, get_one_face
-from facefusion.face_helper import paste_back, warp_face_by_face_landmark_5
+from facefusion.face_analyser import get_frame_faces, get_one_face
+from facefusion.face_helper import paste_back_area, warp_face_by_face_landmark_5
 from facefusion.face_masker import create_occlusion_mask, create_static_box_mask
 from facefusion.face_selector import find_similar_faces, sort_and_filter_faces
 from facefusion.face_store import get_reference_faces
@@ -176,7 +176,7 @@ def restore_expression(source_vision_frame: VisionFrame, target_face: Face,
                                              expression_restorer_factor)
     target_crop_vision_frame = normalize_crop_frame(target_crop_vision_frame)
     crop_mask = numpy.minimum.reduce(crop_masks).clip(0, 1)
-    temp_vision_frame = paste_back(temp_vision_frame, target_crop_vision_frame, crop_mask, affine_matrix)
+    paste_back_area(temp_vision_frame, target_crop_vision_frame, crop_mask, affine_matrix)
     return temp_vision_frame
 
 
@@ -262,7 +262,11 @@ def process_frame(inputs: ExpressionRestorerInputs) -> VisionFrame:
     reference_faces_2 = inputs.get('reference_faces_2')
     source_vision_frame = inputs.get('source_vision_frame')
     target_vision_frame = inputs.get('target_vision_frame')
-    many_faces = sort_and_filter_faces(get_many_faces([target_vision_frame]))
+    many_faces = sort_and_filter_faces(get_frame_faces(target_vision_frame, inputs.get('target_frame_number')))
+
+    # the faces are pasted in place, the frame of the caller is copied once instead of once per face
+    if many_faces:
+        target_vision_frame = target_vision_frame.copy()
 
     if state_manager.get_item('face_selector_mode') == 'many':
         if many_faces:
@@ -298,7 +302,8 @@ def process_frames(queue_payloads: List[QueuePayload]) -> None:
                 'reference_faces': reference_faces,
                 'reference_faces_2': reference_faces_2,
                 'source_vision_frame': source_vision_frame,
-                'target_vision_frame': target_vision_frame
+                'target_vision_frame': target_vision_frame,
+                'target_frame_number': queue_payload.get('frame_number')
             })
         write_image(target_vision_path, output_vision_frame)
         output_frames.append((frame_number, target_vision_path))
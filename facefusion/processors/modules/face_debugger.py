@@ -9,7 +9,7 @@ import facefusion.jobs.job_store
 import facefusion.processors.core as processors
 from facefusion import config, content_analyser, face_classifier, face_detector, face_landmarker, face_masker, \
     face_recognizer, logger, state_manager, wording
-from facefusion.face_analyser import get_many_faces, get_one_face
+from facefusion.face_analyser import get_frame_faces, get_one_face
 from facefusion.face_helper import warp_face_by_face_landmark_5
 from facefusion.face_masker import create_occlusion_mask, create_region_mask, create_static_box_mask
 from facefusion.face_selector import find_similar_faces, sort_and_filter_faces
@@ -194,7 +194,7 @@ def process_frame(inputs: FaceDebuggerInputs) -> VisionFrame:
     reference_faces = inputs.get('reference_faces')
     reference_faces_2 = inputs.get('reference_faces_2', None)
     target_vision_frame = inputs.get('target_vision_frame')
-    many_faces = sort_and_filter_faces(get_many_faces([target_vision_frame]))
+    many_faces = sort_and_filter_faces(get_frame_faces(target_vision_frame, inputs.get('target_frame_number')))
 
     if state_manager.get_item('face_selector_mode') == 'many':
         if many_faces:
@@ -11,8 +11,8 @@ from facefusion import config, content_analyser, face_classifier, face_detector,
     face_recognizer, inference_manager, logger, process_manager, state_manager, wording
 from facefusion.common_helper import create_float_metavar
 from facefusion.download import conditional_download_hashes, conditional_download_sources
-from facefusion.face_analyser import get_many_faces, get_one_face
-from facefusion.face_helper import paste_back, scale_face_landmark_5, warp_face_by_face_landmark_5
+from facefusion.face_analyser import get_frame_faces, get_one_face
+from facefusion.face_helper import paste_back_area, scale_face_landmark_5, warp_face_by_face_landmark_5
 from facefusion.face_masker import create_static_box_mask
 from facefusion.face_selector import find_similar_faces, sort_and_filter_faces
 from facefusion.face_store import get_reference_faces
@@ -277,7 +277,7 @@ def edit_face(target_face: Face, temp_vision_frame: VisionFrame) -> VisionFrame:
     crop_vision_frame = prepare_crop_frame(crop_vision_frame)
     crop_vision_frame = apply_edit(crop_vision_frame, target_face.landmark_set.get('68'))
     crop_vision_frame = normalize_crop_frame(crop_vision_frame)
-    temp_vision_frame = paste_back(temp_vision_frame, crop_vision_frame, box_mask, affine_matrix)
+    paste_back_area(temp_vision_frame, crop_vision_frame, box_mask, affine_matrix)
     return temp_vision_frame
 
 
@@ -565,7 +565,11 @@ def get_reference_frame(source_face: Face, target_face: Face, temp_vision_frame:
 def process_frame(inputs: FaceEditorInputs) -> VisionFrame:
     reference_faces = inputs.get('reference_faces')
     target_vision_frame = inputs.get('target_vision_frame')
-    many_faces = sort_and_filter_faces(get_many_faces([target_vision_frame]))
+    many_faces = sort_and_filter_faces(get_frame_faces(target_vision_frame, inputs.get('target_frame_number')))
+
+    # the faces are pasted in place, the frame of the caller is copied once instead of once per face
+    if many_faces:
+        target_vision_frame = target_vision_frame.copy()
 
     if state_manager.get_item('face_selector_mode') == 'many':
         if many_faces:
@@ -593,7 +597,8 @@ def process_frames(source_path: List[str], queue_payloads: List[QueuePayload], u
         output_vision_frame = process_frame(
             {
                 'reference_faces': reference_faces,
-                'target_vision_frame': target_vision_frame
+                'target_vision_frame': target_vision_frame,
+                'target_frame_number': queue_payload['frame_number']
             })
         write_image(target_vision_path, output_vision_frame)
         update_progress(1)
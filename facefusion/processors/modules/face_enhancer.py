@@ -11,16 +11,17 @@ from facefusion import config, content_analyser, face_classifier, face_detector,
     face_recognizer, inference_manager, logger, state_manager, wording, process_manager
 from facefusion.common_helper import create_int_metavar
 from facefusion.download import conditional_download_hashes, conditional_download_sources
-from facefusion.face_analyser import get_many_faces, get_one_face
-from facefusion.face_helper import paste_back, warp_face_by_face_landmark_5
-from facefusion.face_masker import create_occlusion_mask, create_static_box_mask
+from facefusion.face_analyser import get_frame_faces, get_one_face
+from facefusion.face_helper import paste_back_many, warp_face_by_face_landmark_5
+from facefusion.face_masker import create_occlusion_masks, create_static_box_mask
 from facefusion.face_selector import find_similar_faces, sort_and_filter_faces
 from facefusion.face_store import get_reference_faces
 from facefusion.filesystem import in_directory, is_image, is_video, resolve_relative_path, same_file_extension
+from facefusion.inference_batcher import detect_batch_size, run_stacked_inference
 from facefusion.processors import choices as processors_choices
 from facefusion.processors.typing import FaceEnhancerInputs
 from facefusion.program_helper import find_argument_group
-from facefusion.thread_helper import thread_semaphore
+from facefusion.thread_helper import model_semaphore
 from facefusion.typing import ApplyStateItem, Args, Face, InferencePool, ModelOptions, ModelSet, ProcessMode, \
     QueuePayload, VisionFrame
 from facefusion.vision import read_image, read_static_image, write_image
@@ -291,46 +292,61 @@ def post_process() -> None:
 
 
 def enhance_face(target_face: Face, temp_vision_frame: VisionFrame) -> VisionFrame:
+    return enhance_faces([target_face], temp_vision_frame)
+
+
+def enhance_faces(target_faces: List[Face], temp_vision_frame: VisionFrame) -> VisionFrame:
     model_template = get_model_options().get('template')
     model_size = get_model_options().get('size')
-    crop_vision_frame, affine_matrix = warp_face_by_face_landmark_5(temp_vision_frame,
-                                                                    target_face.landmark_set.get('5/68'),
-                                                                    model_template, model_size)
-    box_mask = create_static_box_mask(crop_vision_frame.shape[:2][::-1], state_manager.get_item('face_mask_blur'),
-                                      (0, 0, 0, 0))
-    crop_masks = \
-        [
-            box_mask
-        ]
+    crop_vision_frames = []
+    affine_matrices = []
+
+    for target_face in target_faces:
+        crop_vision_frame, affine_matrix = warp_face_by_face_landmark_5(temp_vision_frame,
+                                                                        target_face.landmark_set.get('5/68'),
+                                                                        model_template, model_size)
+        crop_vision_frames.append(crop_vision_frame)
+        affine_matrices.append(affine_matrix)
+    box_mask = create_static_box_mask(model_size, state_manager.get_item('face_mask_blur'), (0, 0, 0, 0))
+    crop_masks = [box_mask] * len(target_faces)
 
     if 'occlusion' in state_manager.get_item('face_mask_types'):
-        occlusion_mask = create_occlusion_mask(crop_vision_frame)
-        crop_masks.append(occlusion_mask)
-
-    crop_vision_frame = prepare_crop_frame(crop_vision_frame)
-    crop_vision_frame = forward(crop_vision_frame)
-    crop_vision_frame = normalize_crop_frame(crop_vision_frame)
-    crop_mask = numpy.minimum.reduce(crop_masks).clip(0, 1)
-    paste_vision_frame = paste_back(temp_vision_frame, crop_vision_frame, crop_mask, affine_matrix)
-    temp_vision_frame = blend_frame(temp_vision_frame, paste_vision_frame)
-    return temp_vision_frame
+        occlusion_masks = create_occlusion_masks(crop_vision_frames)
+        crop_masks = [numpy.minimum(box_mask, occlusion_mask) for occlusion_mask in occlusion_masks]
+
+    prepare_vision_frames = numpy.concatenate(
+        [prepare_crop_frame(crop_vision_frame) for crop_vision_frame in crop_vision_frames])
+    crop_vision_frames = [normalize_crop_frame(crop_vision_frame) for crop_vision_frame in
+                          forward_faces(prepare_vision_frames)]
+    crop_masks = [crop_mask.clip(0, 1) for crop_mask in crop_masks]
+
+    # all faces are pasted into one frame that is blended once
+    paste_vision_frame = paste_back_many(temp_vision_frame, crop_vision_frames, crop_masks, affine_matrices)
+    return blend_frame(temp_vision_frame, paste_vision_frame)
 
 
 def forward(crop_vision_frame: VisionFrame) -> VisionFrame:
+    return forward_faces(crop_vision_frame)[0]
+
+
+def forward_faces(crop_vision_frames: VisionFrame) -> VisionFrame:
     face_enhancer = get_inference_pool().get('face_enhancer')
+    face_enhancer_batch_size = detect_batch_size(face_enhancer, state_manager.get_item('execution_providers'))
     face_enhancer_inputs = {}
+    face_enhancer_static_inputs = {}
 
     for face_enhancer_input in face_enhancer.get_inputs():
         if face_enhancer_input.name == 'input':
-            face_enhancer_inputs[face_enhancer_input.name] = crop_vision_frame
+            face_enhancer_inputs[face_enhancer_input.name] = crop_vision_frames
         if face_enhancer_input.name == 'weight':
             weight = numpy.array([1]).astype(numpy.double)
-            face_enhancer_inputs[face_enhancer_input.name] = weight
+            face_enhancer_static_inputs[face_enhancer_input.name] = weight
 
-    with thread_semaphore():
-        crop_vision_frame = face_enhancer.run(None, face_enhancer_inputs)[0][0]
+    with model_semaphore('face_enhancer'):
+        crop_vision_frames = run_stacked_inference(face_enhancer, face_enhancer_inputs, face_enhancer_static_inputs,
+                                                   face_enhancer_batch_size)[0]
 
-    return crop_vision_frame
+    return crop_vision_frames
 
 
 def prepare_crop_frame(crop_vision_frame: VisionFrame) -> VisionFrame:
@@ -364,12 +380,11 @@ def process_frame(inputs: FaceEnhancerInputs) -> VisionFrame:
     reference_faces = inputs.get('reference_faces')
     reference_faces_2 = inputs['reference_faces_2']
     target_vision_frame = inputs.get('target_vision_frame')
-    many_faces = sort_and_filter_faces(get_many_faces([target_vision_frame]))
+    many_faces = sort_and_filter_faces(get_frame_faces(target_vision_frame, inputs.get('target_frame_number')))
 
     if state_manager.get_item('face_selector_mode') == 'many':
         if many_faces:
-            for target_face in many_faces:
-                target_vision_frame = enhance_face(target_face, target_vision_frame)
+            target_vision_frame = enhance_faces(many_faces, target_vision_frame)
     if state_manager.get_item('face_selector_mode') == 'one':
         target_face = get_one_face(many_faces)
         if target_face:
@@ -379,8 +394,7 @@ def process_frame(inputs: FaceEnhancerInputs) -> VisionFrame:
             similar_faces = find_similar_faces(many_faces, ref_faces,
                                                state_manager.get_item('reference_face_distance'))
             if similar_faces:
-                for similar_face in similar_faces:
-                    target_vision_frame = enhance_face(similar_face, target_vision_frame)
+                target_vision_frame = enhance_faces(similar_faces, target_vision_frame)
 
     return target_vision_frame
 
@@ -395,7 +409,8 @@ def process_frames(queue_payloads: List[QueuePayload]) -> List[Tuple[int, str]]:
             {
                 'reference_faces': reference_faces,
                 'reference_faces_2': reference_faces_2,
-                'target_vision_frame': target_vision_frame
+                'target_vision_frame': target_vision_frame,
+                'target_frame_number': queue_payload['frame_number']
             })
         write_image(target_vision_path, result_frame)
         output_frames.append((queue_payload['frame_number'], target_vision_path))
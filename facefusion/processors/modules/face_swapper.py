@@ -11,14 +11,15 @@ from facefusion import config, content_analyser, face_classifier, face_detector,
 from facefusion.common_helper import get_first
 from facefusion.download import conditional_download_hashes, conditional_download_sources
 from facefusion.execution import has_execution_provider
-from facefusion.face_analyser import get_many_faces, get_one_face, get_avg_faces
-from facefusion.face_helper import paste_back, warp_face_by_face_landmark_5
-from facefusion.face_masker import create_occlusion_mask, create_region_mask, create_static_box_mask
+from facefusion.face_analyser import get_avg_faces, get_frame_faces, get_one_face
+from facefusion.face_helper import paste_back_many, warp_face_by_face_landmark_5
+from facefusion.face_masker import create_occlusion_masks, create_region_masks, create_static_box_mask
 from facefusion.face_selector import find_similar_faces, sort_and_filter_faces
 from facefusion.face_store import get_reference_faces
 from facefusion.filesystem import has_image, in_directory, is_image, is_video, \
     resolve_relative_path, same_file_extension
-from facefusion.inference_manager import get_static_model_initializer
+from facefusion.inference_batcher import detect_batch_size, run_stacked_inference
+from facefusion.model_cache import get_static_model_initializer
 from facefusion.processors import choices as processors_choices
 from facefusion.processors.pixel_boost import explode_pixel_boost, implode_pixel_boost
 from facefusion.processors.typing import FaceSwapperInputs
@@ -407,62 +408,81 @@ def update_padding(padding: Padding, frame_number: int, fps: float) -> Padding:
 
 
 def swap_face(source_face: Face, target_face: Face, temp_vision_frame: VisionFrame, frame_number=-1) -> VisionFrame:
+    return swap_faces(source_face, [target_face], temp_vision_frame, frame_number)
+
+
+def swap_faces(source_face: Face, target_faces: List[Face], temp_vision_frame: VisionFrame,
+               frame_number=-1) -> VisionFrame:
     model_template = get_model_options().get('template')
     model_size = get_model_options().get('size')
+    face_mask_types = state_manager.get_item('face_mask_types')
     pixel_boost_size = unpack_resolution(state_manager.get_item('face_swapper_pixel_boost'))
     pixel_boost_total = pixel_boost_size[0] // model_size[0]
-    crop_vision_frame, affine_matrix = warp_face_by_face_landmark_5(temp_vision_frame,
-                                                                    target_face.landmark_set.get('5/68'),
-                                                                    model_template, pixel_boost_size)
-    temp_vision_frames = []
-    crop_masks = []
+    crop_vision_frames = []
+    affine_matrices = []
+
+    for target_face in target_faces:
+        crop_vision_frame, affine_matrix = warp_face_by_face_landmark_5(temp_vision_frame,
+                                                                        target_face.landmark_set.get('5/68'),
+                                                                        model_template, pixel_boost_size)
+        crop_vision_frames.append(crop_vision_frame)
+        affine_matrices.append(affine_matrix)
+    crop_masks_set = []
     padding = state_manager.get_item('face_mask_padding')
     fps = state_manager.get_item('output_video_fps')
     padding = update_padding(padding, frame_number, fps)
 
-    if 'box' in state_manager.get_item('face_mask_types'):
-        box_mask = create_static_box_mask(crop_vision_frame.shape[:2][::-1], state_manager.get_item('face_mask_blur'),
-                                          padding)
-        crop_masks.append(box_mask)
+    if 'box' in face_mask_types:
+        box_mask = create_static_box_mask(crop_vision_frames[0].shape[:2][::-1],
+                                          state_manager.get_item('face_mask_blur'), padding)
+        crop_masks_set.append([box_mask] * len(target_faces))
 
-    if 'occlusion' in state_manager.get_item('face_mask_types'):
-        occlusion_mask = create_occlusion_mask(crop_vision_frame)
-        crop_masks.append(occlusion_mask)
+    if 'occlusion' in face_mask_types:
+        crop_masks_set.append(create_occlusion_masks(crop_vision_frames))
 
-    pixel_boost_vision_frames = implode_pixel_boost(crop_vision_frame, pixel_boost_total, model_size)
-    for pixel_boost_vision_frame in pixel_boost_vision_frames:
-        pixel_boost_vision_frame = prepare_crop_frame(pixel_boost_vision_frame)
-        pixel_boost_vision_frame = forward_swap_face(source_face, pixel_boost_vision_frame)
-        pixel_boost_vision_frame = normalize_crop_frame(pixel_boost_vision_frame)
-        temp_vision_frames.append(pixel_boost_vision_frame)
-    crop_vision_frame = explode_pixel_boost(temp_vision_frames, pixel_boost_total, model_size, pixel_boost_size)
+    # the pixel boost tiles of all faces share the swapper calls
+    pixel_boost_vision_frames = numpy.concatenate(
+        [implode_pixel_boost(crop_vision_frame, pixel_boost_total, model_size) for crop_vision_frame in
+         crop_vision_frames])
+    pixel_boost_vision_frames = prepare_crop_frames(pixel_boost_vision_frames)
+    pixel_boost_vision_frames = forward_swap_faces(source_face, pixel_boost_vision_frames)
+    temp_vision_frames = normalize_crop_frames(pixel_boost_vision_frames)
+    crop_vision_frames = [
+        explode_pixel_boost(temp_vision_frames[index:index + pixel_boost_total ** 2], pixel_boost_total, model_size,
+                            pixel_boost_size) for index in range(0, len(temp_vision_frames), pixel_boost_total ** 2)]
 
-    if 'region' in state_manager.get_item('face_mask_types'):
-        region_mask = create_region_mask(crop_vision_frame, state_manager.get_item('face_mask_regions'))
-        crop_masks.append(region_mask)
+    if 'region' in face_mask_types:
+        crop_masks_set.append(create_region_masks(crop_vision_frames, state_manager.get_item('face_mask_regions')))
 
-    crop_mask = numpy.minimum.reduce(crop_masks).clip(0, 1)
-    temp_vision_frame = paste_back(temp_vision_frame, crop_vision_frame, crop_mask, affine_matrix)
-    return temp_vision_frame
+    crop_masks = [numpy.minimum.reduce(crop_masks).clip(0, 1) for crop_masks in zip(*crop_masks_set)]
+    return paste_back_many(temp_vision_frame, crop_vision_frames, crop_masks, affine_matrices)
 
 
 def forward_swap_face(source_face: Face, crop_vision_frame: VisionFrame) -> VisionFrame:
+    return forward_swap_faces(source_face, crop_vision_frame)[0]
+
+
+def forward_swap_faces(source_face: Face, crop_vision_frames: VisionFrame) -> VisionFrame:
     face_swapper = get_inference_pool().get('face_swapper')
     model_type = get_model_options().get('type')
+    face_swapper_batch_size = detect_batch_size(face_swapper, state_manager.get_item('execution_providers'), 'target')
     face_swapper_inputs = {}
 
     for face_swapper_input in face_swapper.get_inputs():
         if face_swapper_input.name == 'source':
             if model_type == 'blendswap' or model_type == 'uniface':
-                face_swapper_inputs[face_swapper_input.name] = prepare_source_frame(source_face)
+                source_input = prepare_source_frame(source_face)
             else:
-                face_swapper_inputs[face_swapper_input.name] = prepare_source_embedding(source_face)
+                source_input = prepare_source_embedding(source_face)
+            # the source is repeated for every target to be batched alongside
+            face_swapper_inputs[face_swapper_input.name] = numpy.repeat(source_input, len(crop_vision_frames), axis=0)
         if face_swapper_input.name == 'target':
-            face_swapper_inputs[face_swapper_input.name] = crop_vision_frame
+            face_swapper_inputs[face_swapper_input.name] = crop_vision_frames
 
     with conditional_thread_semaphore():
-        crop_vision_frame = face_swapper.run(None, face_swapper_inputs)[0][0]
-    return crop_vision_frame
+        crop_vision_frames = run_stacked_inference(face_swapper, face_swapper_inputs, {}, face_swapper_batch_size)[0]
+
+    return crop_vision_frames
 
 
 def forward_convert_embedding(embedding: Embedding) -> Embedding:
@@ -519,27 +539,34 @@ def convert_embedding(source_face: Face) -> Tuple[Embedding, Embedding]:
 
 
 def prepare_crop_frame(crop_vision_frame: VisionFrame) -> VisionFrame:
-    model_mean = get_model_options().get('mean')
-    model_standard_deviation = get_model_options().get('standard_deviation')
+    return prepare_crop_frames(numpy.expand_dims(crop_vision_frame, axis=0))
+
+
+def prepare_crop_frames(crop_vision_frames: VisionFrame) -> VisionFrame:
+    model_mean = numpy.array(get_model_options().get('mean'), dtype=numpy.float32)
+    model_standard_deviation = numpy.array(get_model_options().get('standard_deviation'), dtype=numpy.float32)
 
-    crop_vision_frame = crop_vision_frame[:, :, ::-1] / 255.0
-    crop_vision_frame = (crop_vision_frame - model_mean) / model_standard_deviation
-    crop_vision_frame = crop_vision_frame.transpose(2, 0, 1)
-    crop_vision_frame = numpy.expand_dims(crop_vision_frame, axis=0).astype(numpy.float32)
-    return crop_vision_frame
+    crop_vision_frames = crop_vision_frames[:, :, :, ::-1].astype(numpy.float32) / 255.0
+    crop_vision_frames = (crop_vision_frames - model_mean) / model_standard_deviation
+    crop_vision_frames = numpy.ascontiguousarray(crop_vision_frames.transpose(0, 3, 1, 2))
+    return crop_vision_frames
 
 
 def normalize_crop_frame(crop_vision_frame: VisionFrame) -> VisionFrame:
+    return normalize_crop_frames(numpy.expand_dims(crop_vision_frame, axis=0))[0]
+
+
+def normalize_crop_frames(crop_vision_frames: VisionFrame) -> VisionFrame:
     model_type = get_model_options().get('type')
     model_mean = get_model_options().get('mean')
     model_standard_deviation = get_model_options().get('standard_deviation')
 
-    crop_vision_frame = crop_vision_frame.transpose(1, 2, 0)
+    crop_vision_frames = crop_vision_frames.transpose(0, 2, 3, 1)
     if model_type == 'ghost' or model_type == 'uniface':
-        crop_vision_frame = crop_vision_frame * model_standard_deviation + model_mean
-    crop_vision_frame = crop_vision_frame.clip(0, 1)
-    crop_vision_frame = crop_vision_frame[:, :, ::-1] * 255
-    return crop_vision_frame
+        crop_vision_frames = crop_vision_frames * model_standard_deviation + model_mean
+    crop_vision_frames = crop_vision_frames.clip(0, 1)
+    crop_vision_frames = crop_vision_frames[:, :, :, ::-1] * 255
+    return crop_vision_frames
 
 
 def get_reference_frame(source_face: Face, target_face: Face, temp_vision_frame: VisionFrame) -> VisionFrame:
@@ -552,12 +579,11 @@ def process_frame(inputs: FaceSwapperInputs) -> VisionFrame:
     source_face = inputs.get('source_face')
     source_face_2 = inputs.get('source_face_2')
     target_vision_frame = inputs.get('target_vision_frame')
-    many_faces = sort_and_filter_faces(get_many_faces([target_vision_frame]))
+    many_faces = sort_and_filter_faces(get_frame_faces(target_vision_frame, inputs.get('target_frame_number')))
     face_selector_mode = state_manager.get_item('face_selector_mode')
     if state_manager.get_item('face_selector_mode') == 'many':
         if many_faces:
-            for target_face in many_faces:
-                target_vision_frame = swap_face(source_face, target_face, target_vision_frame)
+            target_vision_frame = swap_faces(source_face, many_faces, target_vision_frame)
     if state_manager.get_item('face_selector_mode') == 'one':
         target_face = get_one_face(many_faces)
         if target_face:
@@ -569,8 +595,7 @@ def process_frame(inputs: FaceSwapperInputs) -> VisionFrame:
             similar_faces = find_similar_faces(many_faces, ref_faces,
                                                state_manager.get_item('reference_face_distance'))
             if similar_faces:
-                for similar_face in similar_faces:
-                    target_vision_frame = swap_face(src_face, similar_face, target_vision_frame)
+                target_vision_frame = swap_faces(src_face, similar_faces, target_vision_frame)
     return target_vision_frame
 
 
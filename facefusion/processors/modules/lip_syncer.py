@@ -12,8 +12,8 @@ from facefusion import config, content_analyser, face_classifier, face_detector,
 from facefusion.audio import create_empty_audio_frame, read_static_voice, get_voice_frame
 from facefusion.common_helper import get_first
 from facefusion.download import conditional_download_hashes, conditional_download_sources
-from facefusion.face_analyser import get_many_faces, get_one_face
-from facefusion.face_helper import create_bounding_box, paste_back, warp_face_by_bounding_box, \
+from facefusion.face_analyser import get_frame_faces, get_one_face
+from facefusion.face_helper import create_bounding_box, paste_back_area, warp_face_by_bounding_box, \
     warp_face_by_face_landmark_5
 from facefusion.face_masker import create_mouth_mask, create_occlusion_mask, create_static_box_mask
 from facefusion.face_selector import find_similar_faces, sort_and_filter_faces
@@ -173,8 +173,8 @@ def sync_lip(target_face: Face, temp_audio_frame: AudioFrame, temp_vision_frame:
     crop_vision_frame = cv2.warpAffine(close_vision_frame, cv2.invertAffineTransform(close_matrix), (512, 512),
                                        borderMode=cv2.BORDER_REPLICATE)
     crop_mask = numpy.minimum.reduce(crop_masks)
-    paste_vision_frame = paste_back(temp_vision_frame, crop_vision_frame, crop_mask, affine_matrix)
-    return paste_vision_frame
+    paste_back_area(temp_vision_frame, crop_vision_frame, crop_mask, affine_matrix)
+    return temp_vision_frame
 
 
 def forward(temp_audio_frame: AudioFrame, close_vision_frame: VisionFrame) -> VisionFrame:
@@ -224,7 +224,11 @@ def process_frame(inputs: LipSyncerInputs) -> VisionFrame:
     source_audio_frame = inputs.get('source_audio_frame')
     source_audio_frame_2 = inputs.get('source_audio_frame_2')
     target_vision_frame = inputs.get('target_vision_frame')
-    many_faces = sort_and_filter_faces(get_many_faces([target_vision_frame]))
+    many_faces = sort_and_filter_faces(get_frame_faces(target_vision_frame, inputs.get('target_frame_number')))
+
+    # the faces are pasted in place, the frame of the caller is copied once instead of once per face
+    if many_faces:
+        target_vision_frame = target_vision_frame.copy()
 
     if state_manager.get_item('face_selector_mode') == 'many':
         if many_faces:
@@ -271,7 +275,8 @@ def process_frames(queue_payloads: List[QueuePayload]) -> List[Tuple[int, str]]:
                 'reference_faces_2': reference_faces_2,
                 'source_audio_frame': source_audio_frame,
                 'source_audio_frame_2': source_audio_frame_2,
-                'target_vision_frame': target_vision_frame
+                'target_vision_frame': target_vision_frame,
+                'target_frame_number': frame_number
             })
         write_image(target_vision_path, result_frame)
         output_frames.append((frame_number, target_vision_path))
@@ -1,14 +1,12 @@
 import argparse
 import os
 import threading
-from typing import Dict, Tuple
+from functools import lru_cache
+from typing import Any, Dict, Tuple
 from typing import Optional, List
 
-import PIL
 import cv2
 import numpy as np
-from PIL import ImageOps
-from PIL.Image import Image
 
 import facefusion.globals
 import facefusion.jobs.job_store
@@ -246,9 +244,14 @@ OPTIONS: Optional[OptionsWithModel] = None
 REFERENCE_PTS = get_reference_facial_points(default_square=True)
 BOX_WIDTH = 288
 STYLE_MODEL_DIR = resolve_relative_path('../.assets/models/style')
-GLOBAL_MASK = cv2.imread(os.path.join(STYLE_MODEL_DIR, 'alpha.jpg'))
-GLOBAL_MASK = cv2.resize(GLOBAL_MASK, (BOX_WIDTH, BOX_WIDTH), interpolation=cv2.INTER_AREA)
-GLOBAL_MASK = cv2.cvtColor(GLOBAL_MASK, cv2.COLOR_BGR2GRAY).astype(np.float32) / 255.0
+
+
+@lru_cache(maxsize=None)
+def get_global_mask() -> np.ndarray:
+    # read on first use, the mask is part of the downloaded model assets and missing before pre_check
+    global_mask = cv2.imread(os.path.join(STYLE_MODEL_DIR, 'alpha.jpg'))
+    global_mask = cv2.resize(global_mask, (BOX_WIDTH, BOX_WIDTH), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(global_mask, cv2.COLOR_BGR2GRAY).astype(np.float32) / 255.0
 
 
 def padTo16x(image):
@@ -272,18 +275,22 @@ def resize_size(image, size=720):
     return image
 
 
-def load_image(image_path: str) -> Image:
+def load_image(image_path: str) -> Any:
+    from PIL import Image, ImageOps
+
     with open(image_path, 'rb') as f:
-        img = PIL.Image.open(f)
+        img = Image.open(f)
         img = ImageOps.exif_transpose(img)
         img = img.convert('RGB')
     return img
 
 
 def convert_to_ndarray(input) -> np.ndarray:
+    from PIL import Image
+
     if isinstance(input, str):
         img = np.array(load_image(input))
-    elif isinstance(input, Image):
+    elif isinstance(input, Image.Image):
         img = np.array(input.convert('RGB'))
     elif isinstance(input, np.ndarray):
         if len(input.shape) == 2:
@@ -439,7 +446,7 @@ def change_style(temp_vision_frame: VisionFrame) -> VisionFrame:
                     trans_inv, (img_resized.shape[1], img_resized.shape[0]),
                     borderValue=(0, 0, 0)
                 )
-                mask = GLOBAL_MASK
+                mask = get_global_mask()
                 mask_trans_inv = cv2.warpAffine(
                     mask,
                     trans_inv, (img_resized.shape[1], img_resized.shape[0]),
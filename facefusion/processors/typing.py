@@ -26,14 +26,16 @@ AgeModifierInputs = TypedDict('AgeModifierInputs',
                                   'reference_faces_2': FaceSet,
                                   'source_face': Face,
                                   'source_face_2': Face,
-                                  'target_vision_frame': VisionFrame
+                                  'target_vision_frame': VisionFrame,
+                                  'target_frame_number': int
                               })
 ExpressionRestorerInputs = TypedDict('ExpressionRestorerInputs',
                                      {
                                          'reference_faces': FaceSet,
                                          'reference_faces_2': FaceSet,
                                          'source_vision_frame': VisionFrame,
-                                         'target_vision_frame': VisionFrame
+                                         'target_vision_frame': VisionFrame,
+                                         'target_frame_number': int
                                      })
 FaceDebuggerInputs = TypedDict('FaceDebuggerInputs',
                                {
@@ -47,13 +49,15 @@ FaceEditorInputs = TypedDict('FaceEditorInputs',
                              {
                                  'reference_faces': FaceSet,
                                  'reference_faces_2': FaceSet,
-                                 'target_vision_frame': VisionFrame
+                                 'target_vision_frame': VisionFrame,
+                                 'target_frame_number': int
                              })
 FaceEnhancerInputs = TypedDict('FaceEnhancerInputs',
                                {
                                    'reference_faces': FaceSet,
                                    'reference_faces_2': FaceSet,
-                                   'target_vision_frame': VisionFrame
+                                   'target_vision_frame': VisionFrame,
+                                   'target_frame_number': int
                                })
 FaceSwapperInputs = TypedDict('FaceSwapperInputs',
                               {
@@ -83,7 +87,8 @@ LipSyncerInputs = TypedDict('LipSyncerInputs',
                                 'reference_faces_2': FaceSet,
                                 'source_audio_frame': AudioFrame,
                                 'source_audio_frame_2': AudioFrame,
-                                'target_vision_frame': VisionFrame
+                                'target_vision_frame': VisionFrame,
+                                'target_frame_number': int
                             })
 ProcessorStateKey = Literal \
     [
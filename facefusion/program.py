@@ -62,12 +62,30 @@ def create_face_detector_program() -> ArgumentParser:
                                      default=config.get_int_list('face_detector.face_detector_angles', '0'),
                                      choices=facefusion.choices.face_detector_angles, nargs='+',
                                      metavar='FACE_DETECTOR_ANGLES')
+    group_face_detector.add_argument('--face-detector-angle-strategy',
+                                     help=wording.get('help.face_detector_angle_strategy'),
+                                     default=config.get_str_value('face_detector.face_detector_angle_strategy', 'all'),
+                                     choices=facefusion.choices.face_detector_angle_strategies)
     group_face_detector.add_argument('--face-detector-score', help=wording.get('help.face_detector_score'), type=float,
                                      default=config.get_float_value('face_detector.face_detector_score', '0.5'),
                                      choices=facefusion.choices.face_detector_score_range,
                                      metavar=create_float_metavar(facefusion.choices.face_detector_score_range))
+    group_face_detector.add_argument('--face-tracker-interval', help=wording.get('help.face_tracker_interval'),
+                                     type=int, default=config.get_int_value('face_detector.face_tracker_interval', '0'),
+                                     choices=facefusion.choices.face_tracker_interval_range,
+                                     metavar=create_int_metavar(facefusion.choices.face_tracker_interval_range))
+    group_face_detector.add_argument('--face-tracker-score', help=wording.get('help.face_tracker_score'), type=float,
+                                     default=config.get_float_value('face_detector.face_tracker_score', '0.8'),
+                                     choices=facefusion.choices.face_tracker_score_range,
+                                     metavar=create_float_metavar(facefusion.choices.face_tracker_score_range))
+    group_face_detector.add_argument('--face-tracker-identity-interval',
+                                     help=wording.get('help.face_tracker_identity_interval'), type=int,
+                                     default=config.get_int_value('face_detector.face_tracker_identity_interval', '0'),
+                                     choices=facefusion.choices.face_tracker_identity_interval_range,
+                                     metavar=create_int_metavar(facefusion.choices.face_tracker_identity_interval_range))
     job_store.register_step_keys(
-        ['face_detector_model', 'face_detector_angles', 'face_detector_size', 'face_detector_score'])
+        ['face_detector_model', 'face_detector_angles', 'face_detector_angle_strategy', 'face_detector_size',
+         'face_detector_score', 'face_tracker_interval', 'face_tracker_score', 'face_tracker_identity_interval'])
     return program
 
 
@@ -209,8 +227,14 @@ def create_processors_program() -> ArgumentParser:
     group_processors.add_argument('--processors',
                                   help=wording.get('help.processors').format(choices=', '.join(available_processors)),
                                   default=config.get_str_list('processors.processors', 'face_swapper'), nargs='+')
-    job_store.register_step_keys(['processors'])
-    for processor_module in get_processors_modules(available_processors):
+    group_processors.add_argument('--processor-pipeline', help=wording.get('help.processor_pipeline'),
+                                  default=config.get_str_value('processors.processor_pipeline', 'sequential'),
+                                  choices=facefusion.choices.processor_pipelines)
+    job_store.register_step_keys(['processors', 'processor_pipeline'])
+    # only the args of the applied processors are registered, this keeps the other modules unimported
+    processors = [processor for processor in state_manager.get_item('processors') or [] if
+                  processor in available_processors]
+    for processor_module in get_processors_modules(processors):
         processor_module.register_args(program)
     return program
 
@@ -247,8 +271,63 @@ def create_execution_program() -> ArgumentParser:
                                  default=config.get_int_value('execution.execution_queue_count', '1'),
                                  choices=facefusion.choices.execution_queue_count_range,
                                  metavar=create_int_metavar(facefusion.choices.execution_queue_count_range))
+    group_execution.add_argument('--execution-batch-size', help=wording.get('help.execution_batch_size'), type=int,
+                                 default=config.get_int_value('execution.execution_batch_size', '1'),
+                                 choices=facefusion.choices.execution_batch_size_range,
+                                 metavar=create_int_metavar(facefusion.choices.execution_batch_size_range))
+    group_execution.add_argument('--execution-batch-wait', help=wording.get('help.execution_batch_wait'), type=int,
+                                 default=config.get_int_value('execution.execution_batch_wait', '2'),
+                                 choices=facefusion.choices.execution_batch_wait_range,
+                                 metavar=create_int_metavar(facefusion.choices.execution_batch_wait_range))
+    group_execution.add_argument('--execution-backend', help=wording.get('help.execution_backend'),
+                                 default=config.get_str_value('execution.execution_backend', 'thread'),
+                                 choices=facefusion.choices.execution_backends)
+    group_execution.add_argument('--execution-model-concurrency', help=wording.get('help.execution_model_concurrency'),
+                                 type=int, default=config.get_int_value('execution.execution_model_concurrency', '0'),
+                                 choices=facefusion.choices.execution_model_concurrency_range,
+                                 metavar=create_int_metavar(facefusion.choices.execution_model_concurrency_range))
+    group_execution.add_argument('--execution-provider-concurrency',
+                                 help=wording.get('help.execution_provider_concurrency'),
+                                 default=config.get_str_list('execution.execution_provider_concurrency'), nargs='+')
+    group_execution.add_argument('--execution-session-count', help=wording.get('help.execution_session_count'),
+                                 type=int, default=config.get_int_value('execution.execution_session_count', '1'),
+                                 choices=facefusion.choices.execution_session_count_range,
+                                 metavar=create_int_metavar(facefusion.choices.execution_session_count_range))
+    group_execution.add_argument('--execution-session-families', help=wording.get('help.execution_session_families'),
+                                 default=config.get_str_list('execution.execution_session_families'), nargs='+')
+    group_execution.add_argument('--execution-session-family-options',
+                                 help=wording.get('help.execution_session_family_options'),
+                                 default=config.get_str_list('execution.execution_session_family_options'), nargs='+')
+    group_execution.add_argument('--execution-session-intra-threads',
+                                 help=wording.get('help.execution_session_intra_threads'), type=int,
+                                 default=config.get_int_value('execution.execution_session_intra_threads', '0'),
+                                 choices=facefusion.choices.execution_session_threads_range,
+                                 metavar=create_int_metavar(facefusion.choices.execution_session_threads_range))
+    group_execution.add_argument('--execution-session-inter-threads',
+                                 help=wording.get('help.execution_session_inter_threads'), type=int,
+                                 default=config.get_int_value('execution.execution_session_inter_threads', '0'),
+                                 choices=facefusion.choices.execution_session_threads_range,
+                                 metavar=create_int_metavar(facefusion.choices.execution_session_threads_range))
+    group_execution.add_argument('--execution-session-optimization',
+                                 help=wording.get('help.execution_session_optimization'),
+                                 default=config.get_str_value('execution.execution_session_optimization', 'all'),
+                                 choices=facefusion.choices.execution_session_optimizations)
+    group_execution.add_argument('--execution-session-mode', help=wording.get('help.execution_session_mode'),
+                                 default=config.get_str_value('execution.execution_session_mode', 'sequential'),
+                                 choices=facefusion.choices.execution_session_modes)
+    group_execution.add_argument('--execution-session-skip-arena', help=wording.get('help.execution_session_skip_arena'),
+                                 action='store_true',
+                                 default=config.get_bool_value('execution.execution_session_skip_arena'))
+    group_execution.add_argument('--execution-session-keep-optimized',
+                                 help=wording.get('help.execution_session_keep_optimized'), action='store_true',
+                                 default=config.get_bool_value('execution.execution_session_keep_optimized'))
     job_store.register_job_keys(
-        ['execution_device_id', 'execution_providers', 'execution_thread_count', 'execution_queue_count'])
+        ['execution_device_id', 'execution_providers', 'execution_thread_count', 'execution_queue_count',
+         'execution_batch_size', 'execution_batch_wait', 'execution_backend', 'execution_model_concurrency',
+         'execution_provider_concurrency', 'execution_session_count', 'execution_session_families',
+         'execution_session_family_options',
+         'execution_session_intra_threads', 'execution_session_inter_threads', 'execution_session_optimization', 'execution_session_mode',
+         'execution_session_skip_arena', 'execution_session_keep_optimized'])
     return program
 
 
@@ -262,7 +341,15 @@ def create_memory_program() -> ArgumentParser:
                               default=config.get_int_value('memory.system_memory_limit', '0'),
                               choices=facefusion.choices.system_memory_limit_range,
                               metavar=create_int_metavar(facefusion.choices.system_memory_limit_range))
-    job_store.register_job_keys(['video_memory_strategy', 'system_memory_limit'])
+    group_memory.add_argument('--face-store-fingerprint', help=wording.get('help.face_store_fingerprint'),
+                              default=config.get_str_value('memory.face_store_fingerprint', 'sha1'),
+                              choices=facefusion.choices.face_store_fingerprints)
+    group_memory.add_argument('--face-store-memory-limit', help=wording.get('help.face_store_memory_limit'), type=int,
+                              default=config.get_int_value('memory.face_store_memory_limit', '1024'),
+                              choices=facefusion.choices.face_store_memory_limit_range,
+                              metavar=create_int_metavar(facefusion.choices.face_store_memory_limit_range))
+    job_store.register_job_keys(
+        ['video_memory_strategy', 'system_memory_limit', 'face_store_fingerprint', 'face_store_memory_limit'])
     return program
 
 
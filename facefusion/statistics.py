@@ -3,7 +3,9 @@ from typing import Any, Dict
 import numpy
 
 from facefusion import logger, state_manager
-from facefusion.face_store import get_face_store
+from facefusion.face_detector import get_face_detector_statistics
+from facefusion.face_store import get_face_store, get_face_store_statistics
+from facefusion.face_tracker import get_face_tracker_statistics
 from facefusion.typing import FaceSet
 
 
@@ -22,6 +24,9 @@ def create_statistics(static_faces: FaceSet) -> Dict[str, Any]:
             'total_frames_with_faces': 0,
             'total_faces': 0
         }
+    statistics.update(get_face_detector_statistics())
+    statistics.update(get_face_store_statistics())
+    statistics.update(get_face_tracker_statistics())
 
     for faces in static_faces.values():
         statistics['total_frames_with_faces'] = statistics.get('total_frames_with_faces') + 1
@@ -1,12 +1,23 @@
 import threading
 from contextlib import nullcontext
-from typing import ContextManager, Union
+from typing import Any, ContextManager, Dict, Tuple, Union
 
+from facefusion import state_manager
+from facefusion.common_helper import cast_int, parse_key_values
 from facefusion.execution import has_execution_provider
+from facefusion.inference_batcher import BatchedInferenceSession
+from facefusion.typing import ExecutionProviderKey
 
 THREAD_LOCK: threading.Lock = threading.Lock()
 THREAD_SEMAPHORE: threading.Semaphore = threading.Semaphore()
 NULL_CONTEXT: ContextManager[None] = nullcontext()
+MODEL_SEMAPHORE_LOCK: threading.Lock = threading.Lock()
+MODEL_SEMAPHORE_LIMITS: Dict[ExecutionProviderKey, int] = \
+    {
+        'directml': 1,
+        'rocm': 1
+    }
+MODEL_SEMAPHORES: Dict[Tuple[str, int], threading.Semaphore] = {}
 
 
 def thread_lock() -> threading.Lock:
@@ -21,3 +32,39 @@ def conditional_thread_semaphore() -> Union[threading.Semaphore, ContextManager[
     if has_execution_provider('directml') or has_execution_provider('rocm'):
         return THREAD_SEMAPHORE
     return NULL_CONTEXT
+
+
+def inference_semaphore(inference_session: Any) -> Union[threading.Semaphore, ContextManager[None]]:
+    # batched sessions merge the runs of the worker threads, the global semaphore would hand them over one by one
+    if isinstance(inference_session, BatchedInferenceSession):
+        return NULL_CONTEXT
+    return THREAD_SEMAPHORE
+
+
+def model_semaphore(model_name: str) -> Union[threading.Semaphore, ContextManager[None]]:
+    model_semaphore_limit = get_model_semaphore_limit()
+
+    if model_semaphore_limit > 0:
+        with MODEL_SEMAPHORE_LOCK:
+            if (model_name, model_semaphore_limit) not in MODEL_SEMAPHORES:
+                MODEL_SEMAPHORES[(model_name, model_semaphore_limit)] = threading.Semaphore(model_semaphore_limit)
+            return MODEL_SEMAPHORES.get((model_name, model_semaphore_limit))
+    return NULL_CONTEXT
+
+
+def get_model_semaphore_limit() -> int:
+    execution_model_concurrency = state_manager.get_item('execution_model_concurrency')
+
+    if execution_model_concurrency:
+        return execution_model_concurrency
+    model_semaphore_limits: Dict[str, int] = dict(MODEL_SEMAPHORE_LIMITS)
+    execution_provider_concurrency = parse_key_values(state_manager.get_item('execution_provider_concurrency'))
+
+    # limits like cuda=4 or directml=2 replace the default of the execution provider
+    for execution_provider_key, model_semaphore_limit in execution_provider_concurrency.items():
+        if cast_int(model_semaphore_limit) is not None:
+            model_semaphore_limits[execution_provider_key] = cast_int(model_semaphore_limit)
+    for execution_provider_key, model_semaphore_limit in model_semaphore_limits.items():
+        if has_execution_provider(execution_provider_key):
+            return model_semaphore_limit
+    return 0
@@ -13,6 +13,9 @@ Prediction = NDArray[Any]
 BoundingBox = NDArray[Any]
 FaceLandmark5 = NDArray[Any]
 FaceLandmark68 = NDArray[Any]
+BoundingBoxes = NDArray[Any]
+FaceScores = NDArray[Any]
+FaceLandmarks5 = NDArray[Any]
 FaceLandmarkSet = TypedDict('FaceLandmarkSet',
                             {
                                 '5': FaceLandmark5,  # type: ignore[valid-type]
@@ -42,9 +45,64 @@ Face = namedtuple('Face',
                       'race'
                   ])
 FaceSet = Dict[str, List[Face]]
+FrameFaces = TypedDict('FrameFaces',
+                       {
+                           'frame_size': Tuple[int, int],
+                           'faces': List[Face]
+                       })
+FrameFaceSet = Dict[int, FrameFaces]
+FaceStoreStatistics = TypedDict('FaceStoreStatistics',
+                                {
+                                    'static_faces_hits': int,
+                                    'static_faces_misses': int,
+                                    'static_faces_evictions': int,
+                                    'static_faces_bytes': int,
+                                    'frame_faces_evictions': int,
+                                    'frame_faces_bytes': int
+                                })
+FaceDetectorStatistics = TypedDict('FaceDetectorStatistics',
+                                   {
+                                       'face_detector_angle_passes': Dict[Angle, int],
+                                       'face_detector_angle_hits': Dict[Angle, int],
+                                       'face_detector_angle_skips': int
+                                   })
+FaceDetectorAngleMemory = TypedDict('FaceDetectorAngleMemory',
+                                    {
+                                        'angle': Angle,
+                                        'face_total': int
+                                    })
+FaceTrackerAnchor = TypedDict('FaceTrackerAnchor',
+                              {
+                                  'frame_number': int,
+                                  'vision_frame': NDArray[Any],
+                                  'faces': List[Face]
+                              })
+FaceTrackerIdentity = TypedDict('FaceTrackerIdentity',
+                                {
+                                    'frame_number': int,
+                                    'embedded_frame_number': int,
+                                    'bounding_box': BoundingBox,
+                                    'face_landmark_5': FaceLandmark5,
+                                    'embedding': Embedding,
+                                    'normed_embedding': Embedding,
+                                    'gender': Gender,
+                                    'age': Age,
+                                    'race': Race
+                                })
+FaceTrackerStatistics = TypedDict('FaceTrackerStatistics',
+                                  {
+                                      'face_tracker_detected_frames': int,
+                                      'face_tracker_tracked_frames': int,
+                                      'face_tracker_lost_frames': int,
+                                      'face_tracker_embedded_faces': int,
+                                      'face_tracker_reused_faces': int,
+                                      'face_tracker_anchor_evictions': int,
+                                      'face_tracker_anchor_bytes': int
+                                  })
 FaceStore = TypedDict('FaceStore',
                       {
                           'static_faces': FaceSet,
+                          'frame_faces': FrameFaceSet,
                           'reference_faces': FaceSet
                       })
 
@@ -82,6 +140,7 @@ QueuePayload = TypedDict('QueuePayload',
 Args = Dict[str, Any]
 UpdateProgress = Callable[[int], None]
 ProcessFrames = Callable[[List[str], List[QueuePayload], UpdateProgress], None]
+ProcessVisionFrame = Callable[[QueuePayload, VisionFrame], VisionFrame]
 ProcessStep = Callable[[str, int, Args], bool]
 
 Content = Dict[str, Any]
@@ -95,6 +154,12 @@ LogLevelSet = Dict[LogLevel, int]
 TableHeaders = List[str]
 TableContents = List[List[Any]]
 VideoMemoryStrategy = Literal['strict', 'moderate', 'tolerant']
+ProcessorPipeline = Literal['sequential', 'fused', 'streaming']
+FaceStoreFingerprint = Literal['sha1', 'strided']
+FaceDetectorAngleStrategy = Literal['all', 'adaptive']
+ExecutionBackend = Literal['thread', 'process']
+ExecutionSessionOptimization = Literal['disable', 'basic', 'extended', 'all']
+ExecutionSessionMode = Literal['sequential', 'parallel']
 FaceDetectorModel = Literal['many', 'retinaface', 'scrfd', 'yoloface']
 FaceLandmarkerModel = Literal['many', '2dfan4', 'peppa_wutz']
 FaceDetectorSet = Dict[FaceDetectorModel, List[str]]
@@ -130,6 +195,12 @@ Download = TypedDict('Download',
                          'path': str
                      })
 DownloadSet = Dict[str, Download]
+HashRecord = TypedDict('HashRecord',
+                       {
+                           'size': int,
+                           'mtime': int,
+                           'hash': str
+                       })
 
 ModelOptions = Dict[str, Any]
 ModelInitializer = NDArray[Any]
@@ -173,6 +244,13 @@ ExecutionDevice = TypedDict('ExecutionDevice',
                             })
 AppContext = Literal['cli', 'ui']
 InferencePool = Dict[str, InferenceSession]
+InferenceRequest = TypedDict('InferenceRequest',
+                             {
+                                 'output_names': Optional[List[str]],
+                                 'input_feed': Dict[str, NDArray[Any]],
+                                 'outputs': Optional[List[NDArray[Any]]],
+                                 'exception': Optional[Exception]
+                             })
 InferencePoolSet = Dict[AppContext, Dict[str, InferencePool]]
 UiWorkflow = Literal['instant_runner', 'job_runner', 'job_manager']
 JobStore = TypedDict('JobStore',
@@ -208,7 +286,11 @@ StateKey = Literal \
     'face_detector_model',
     'face_detector_size',
     'face_detector_angles',
+    'face_detector_angle_strategy',
     'face_detector_score',
+    'face_tracker_interval',
+    'face_tracker_score',
+    'face_tracker_identity_interval',
     'face_landmarker_model',
     'face_landmarker_score',
     'face_selector_mode',
@@ -238,6 +320,7 @@ StateKey = Literal \
     'output_video_fps',
     'skip_audio',
     'processors',
+    'processor_pipeline',
     'open_browser',
     'ui_layouts',
     'ui_workflow',
@@ -245,8 +328,24 @@ StateKey = Literal \
     'execution_providers',
     'execution_thread_count',
     'execution_queue_count',
+    'execution_batch_size',
+    'execution_batch_wait',
+    'execution_backend',
+    'execution_model_concurrency',
+    'execution_provider_concurrency',
+    'execution_session_count',
+    'execution_session_families',
+    'execution_session_family_options',
+    'execution_session_intra_threads',
+    'execution_session_inter_threads',
+    'execution_session_optimization',
+    'execution_session_mode',
+    'execution_session_skip_arena',
+    'execution_session_keep_optimized',
     'video_memory_strategy',
     'system_memory_limit',
+    'face_store_fingerprint',
+    'face_store_memory_limit',
     'skip_download',
     'log_level',
     'job_id',
@@ -264,7 +363,11 @@ State = TypedDict('State',
                       'face_detector_model': FaceDetectorModel,
                       'face_detector_size': str,
                       'face_detector_angles': List[Angle],
+                      'face_detector_angle_strategy': FaceDetectorAngleStrategy,
                       'face_detector_score': Score,
+                      'face_tracker_interval': int,
+                      'face_tracker_score': Score,
+                      'face_tracker_identity_interval': int,
                       'face_landmarker_model': FaceLandmarkerModel,
                       'face_landmarker_score': Score,
                       'face_selector_mode': FaceSelectorMode,
@@ -294,6 +397,7 @@ State = TypedDict('State',
                       'output_video_fps': float,
                       'skip_audio': bool,
                       'processors': List[str],
+                      'processor_pipeline': ProcessorPipeline,
                       'open_browser': bool,
                       'ui_layouts': List[str],
                       'ui_workflow': UiWorkflow,
@@ -301,8 +405,24 @@ State = TypedDict('State',
                       'execution_providers': List[ExecutionProviderKey],
                       'execution_thread_count': int,
                       'execution_queue_count': int,
+                      'execution_batch_size': int,
+                      'execution_batch_wait': int,
+                      'execution_backend': ExecutionBackend,
+                      'execution_model_concurrency': int,
+                      'execution_provider_concurrency': List[str],
+                      'execution_session_count': int,
+                      'execution_session_families': List[str],
+                      'execution_session_family_options': List[str],
+                      'execution_session_intra_threads': int,
+                      'execution_session_inter_threads': int,
+                      'execution_session_optimization': ExecutionSessionOptimization,
+                      'execution_session_mode': ExecutionSessionMode,
+                      'execution_session_skip_arena': bool,
+                      'execution_session_keep_optimized': bool,
                       'video_memory_strategy': VideoMemoryStrategy,
                       'system_memory_limit': int,
+                      'face_store_fingerprint': FaceStoreFingerprint,
+                      'face_store_memory_limit': int,
                       'skip_download': bool,
                       'log_level': LogLevel,
                       'job_id': str,
@@ -99,6 +99,13 @@ def count_video_frame_total(video_path: str) -> int:
     return 0
 
 
+def count_trim_frame_total(video_path: str, trim_frame_start: Optional[int], trim_frame_end: Optional[int]) -> int:
+    video_frame_total = count_video_frame_total(video_path)
+    trim_frame_start = trim_frame_start if isinstance(trim_frame_start, int) else 0
+    trim_frame_end = trim_frame_end if isinstance(trim_frame_end, int) else video_frame_total
+    return max(0, min(trim_frame_end, video_frame_total) - trim_frame_start)
+
+
 def detect_video_fps(video_path: str) -> Optional[float]:
     if is_video(video_path):
         if is_windows():
@@ -18,6 +18,7 @@ WORDING: Dict[str, Any] = \
         'curl_not_installed': 'CURL is not installed',
         'deleting_corrupt_source': 'Deleting corrupt source for {source_file_name}',
         'downloading': 'Downloading',
+        'downloading_failed': 'Downloading {url} failed',
         'exclamation_mark': '!',
         'extracting_frames': 'Extracting frames with a resolution of {resolution} and {fps} frames per second',
         'extracting_frames_failed': 'Extracting frames failed',
@@ -78,6 +79,9 @@ WORDING: Dict[str, Any] = \
         'skipping_audio': 'Skipping audio',
         'specify_image_or_video_output': 'Specify the output image or video within a directory',
         'stream_not_loaded': 'Stream {stream_mode} could not be loaded',
+        'streaming_frames': 'Streaming frames with a resolution of {resolution} and {fps} frames per second',
+        'streaming_frames_failed': 'Streaming frames failed',
+        'streaming_frames_succeed': 'Streaming frames succeed',
         'temp_frames_not_found': 'Temporary frames not found',
         'time_ago_days': '{days} days, {hours} hours and {minutes} minutes ago',
         'time_ago_hours': '{hours} hours and {minutes} minutes ago',
@@ -93,14 +97,29 @@ WORDING: Dict[str, Any] = \
             'age_modifier_direction': 'specify the direction in which the age should be modified',
             'age_modifier_model': 'choose the model responsible for aging the face',
             'config_path': 'choose the config file to override defaults',
+            'execution_backend': 'run the frame processing in a thread pool or in a pool of worker processes that do not share cached faces',
+            'execution_batch_size': 'specify the amount of concurrent inference requests merged into a single batch',
+            'execution_batch_wait': 'specify the milliseconds an inference batch waits for further requests',
             'execution_device_id': 'specify the device used for processing',
+            'execution_model_concurrency': 'specify the amount of concurrent runs per model for all execution providers (0 uses the execution provider concurrency)',
             'execution_providers': 'accelerate the model inference using different providers (choices: {choices}, ...)',
             'execution_queue_count': 'specify the amount of frames each thread is processing',
+            'execution_provider_concurrency': 'specify the amount of concurrent runs per model for an execution provider like cuda=4 or directml=1',
+            'execution_session_count': 'specify the amount of session replicas per model the threads check out (split the cpu threads across them)',
+            'execution_session_families': 'limit the session options to these model families like face_enhancer or face_detector (default: all)',
+            'execution_session_family_options': 'override the session options of a model family like face_detector.intra_threads=2 or face_enhancer.optimization=basic',
+            'execution_session_inter_threads': 'specify the amount of threads running independent nodes of a session (0 uses the runtime default)',
+            'execution_session_intra_threads': 'specify the amount of threads parallelizing each node of a session (0 uses the runtime default)',
+            'execution_session_keep_optimized': 'keep the optimized models next to the models to speed up subsequent loads',
+            'execution_session_mode': 'run the nodes of a session sequential or in parallel',
+            'execution_session_optimization': 'specify the graph optimization level of the sessions',
+            'execution_session_skip_arena': 'skip the memory arena of the cpu allocator',
             'execution_thread_count': 'specify the amount of parallel threads while processing',
             'expression_restorer_factor': 'restore factor of expression from the target face',
             'expression_restorer_model': 'choose the model responsible for restoring the expression',
             'face_analyser_order': 'specify the order in which the face analyser detects faces.',
             'face_debugger_items': 'load a single or multiple processors (choices: {choices})',
+            'face_detector_angle_strategy': 'detect on every angle or stop once the confident faces are found starting with the last hit angle',
             'face_detector_angles': 'specify the angles to rotate the frame before detecting faces',
             'face_detector_model': 'choose the model responsible for detecting the faces',
             'face_detector_score': 'filter the detected faces base on the confidence score',
@@ -134,9 +153,14 @@ WORDING: Dict[str, Any] = \
             'face_selector_mode': 'use reference based tracking or simple matching',
             'face_selector_order': 'specify the order of the detected faces',
             'face_selector_race': 'filter the detected faces based on their race',
+            'face_store_fingerprint': 'fingerprint frames for the face store by hashing every pixel or from a faster but lossy strided sample',
+            'face_store_memory_limit': 'limit the MB of detected faces and tracker frames the face store keeps before evicting the least recent',
             'face_swapper_model': 'choose the model responsible for swapping the face',
             'face_swapper_pixel_boost': 'choose the pixel boost resolution for the face swapper',
             'face_swapper_weight': 'specify the weight for the face swapper',
+            'face_tracker_identity_interval': 'reuse the embedding and classification of a matched face for this amount of frames (0 = disabled)',
+            'face_tracker_interval': 'track the detected faces for this amount of frames before detecting again (0 = disabled)',
+            'face_tracker_score': 'detect the faces again once the share of tracked landmarks drops below the score',
             'force_download': 'force automate downloads and exit',
             'frame_colorizer_blend': 'blend the colorized into the previous frame',
             'frame_colorizer_model': 'choose the model responsible for colorizing the frame',
@@ -200,7 +224,8 @@ WORDING: Dict[str, Any] = \
             'ui_workflow': 'choose the ui workflow',
             'video_memory_strategy': 'balance fast processing and low VRAM usage',
             'skip_conda': 'skip the conda environment check',
-            'processors': 'load a single or multiple processors (choices: {choices}, ...)'
+            'processors': 'load a single or multiple processors (choices: {choices}, ...)',
+            'processor_pipeline': 'run the processors one after another, fused into a single pass per frame or streamed from decoder to encoder without temp frames'
         },
         'about': {
             'become_a_member': 'become a member',
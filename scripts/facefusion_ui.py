@@ -1,14 +1,11 @@
-import importlib
-import inspect
 import os
-import pkgutil
 
 import gradio as gr
 
 from facefusion.args import apply_args
 from facefusion.core import route
-from facefusion.download import conditional_download
 from facefusion.memory import tune_performance
+from facefusion.processors.core import list_processors
 from facefusion.program import create_program
 from facefusion.program_helper import validate_args
 from facefusion.uis.core import load_ui_layout_module
@@ -19,36 +16,6 @@ from modules.paths_internal import script_path
 os.environ['CUDA_MODULE_LOADING'] = 'LAZY'
 
 
-def run_pre_checks(package):
-    # Recursively find all submodules in a given package
-    def find_submodules(package):
-        if hasattr(package, '__path__'):
-            for importer, modname, ispkg in pkgutil.walk_packages(package.__path__, package.__name__ + '.'):
-                # Import the module
-                module = importlib.import_module(modname)
-
-                # Check if the module has a 'pre_check' function
-                if hasattr(module, 'pre_check') and inspect.isfunction(module.pre_check):
-                    # Run the 'pre_check' function
-                    module.pre_check()
-
-                if hasattr(module, "MODELS"):
-                    for model in module.MODELS:
-                        model_path = os.path.dirname(module.MODELS[model]["path"])
-                        if model_path.endswith("models"):
-                            # Remove the path and the trailing slash
-                            model_path = model_path[:-7]
-                        model_url = module.MODELS[model]["url"]
-                        if "inswapper" in model_url:
-                            continue
-                        conditional_download(model_path, [model_url])
-                # Recursively check for submodules
-                find_submodules(module)
-
-    # Start the recursive search from the initial package
-    find_submodules(package)
-
-
 def load_facefusion():
     from facefusion import logger, globals, state_manager
     from modules.paths_internal import default_output_dir
@@ -84,8 +51,11 @@ def load_facefusion():
                 globals_dict[key] = value
     apply_args(globals_dict, False)
     state_manager.init_item("config_path", ff_ini)
+    # the options of the unselected processors render from the ini, their modules are loaded once they are selected
+    for key, value in globals_dict.items():
+        if key.startswith(tuple(list_processors())) and state_manager.get_item(key) is None:
+            state_manager.init_item(key, value)
 
-    #run_pre_checks(facefusion)
     tune_performance()
 
     with gr.Blocks() as ff_ui:
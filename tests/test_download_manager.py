@@ -0,0 +1,180 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter, sleep
+
+import pytest
+
+from facefusion import state_manager
+from facefusion.download import conditional_download, conditional_download_sources, download_file, get_download_size
+from facefusion.hash_helper import create_file_hash
+
+DOWNLOAD_CONTENTS = \
+    {
+        '/model_' + str(index) + '.onnx': os.urandom(256 * 1024 + index) for index in range(6)
+    }
+DOWNLOAD_BROKEN_PATH = '/model_broken.onnx'
+DOWNLOAD_REQUESTS = []
+DOWNLOAD_LOCK = threading.Lock()
+DOWNLOAD_ACTIVE = \
+    {
+        'total': 0,
+        'peak': 0
+    }
+
+
+class DownloadRequestHandler(BaseHTTPRequestHandler):
+    accept_range = True
+    chunk_delay = 0.0
+
+    def do_HEAD(self) -> None:
+        content = DOWNLOAD_CONTENTS.get(self.path)
+
+        if self.path == DOWNLOAD_BROKEN_PATH:
+            content = bytes(1024)
+
+        if content is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        content = DOWNLOAD_CONTENTS.get(self.path)
+        range_header = self.headers.get('Range')
+        DOWNLOAD_REQUESTS.append((self.path, range_header))
+
+        # the broken download announces more bytes than it sends
+        if self.path == DOWNLOAD_BROKEN_PATH:
+            self.send_response(200)
+            self.send_header('Content-Length', '1024')
+            self.end_headers()
+            self.wfile.write(bytes(512))
+            return
+        if content is None:
+            self.send_error(404)
+            return
+        range_start = 0
+        if range_header and self.accept_range:
+            range_start = int(range_header.replace('bytes=', '').split('-')[0])
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(range_start, len(content) - 1, len(content)))
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(content) - range_start))
+        self.end_headers()
+        with DOWNLOAD_LOCK:
+            DOWNLOAD_ACTIVE['total'] += 1
+            DOWNLOAD_ACTIVE['peak'] = max(DOWNLOAD_ACTIVE.get('peak'), DOWNLOAD_ACTIVE.get('total'))
+
+        for chunk_start in range(range_start, len(content), 64 * 1024):
+            self.wfile.write(content[chunk_start:chunk_start + 64 * 1024])
+            sleep(self.chunk_delay)
+        with DOWNLOAD_LOCK:
+            DOWNLOAD_ACTIVE['total'] -= 1
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture(scope = 'module')
+def server_url() -> str:
+    http_server = ThreadingHTTPServer(('127.0.0.1', 0), DownloadRequestHandler)
+    server_thread = threading.Thread(target = http_server.serve_forever, daemon = True)
+    server_thread.start()
+    yield 'http://127.0.0.1:' + str(http_server.server_address[1])
+    http_server.shutdown()
+
+
+@pytest.fixture(scope = 'module', autouse = True)
+def before_all() -> None:
+    state_manager.init_item('log_level', 'error')
+    state_manager.init_item('skip_download', False)
+
+
+@pytest.fixture(autouse = True)
+def before_each() -> None:
+    DownloadRequestHandler.accept_range = True
+    DownloadRequestHandler.chunk_delay = 0.0
+    DOWNLOAD_REQUESTS.clear()
+    DOWNLOAD_ACTIVE['peak'] = 0
+    get_download_size.cache_clear()
+
+
+def test_conditional_download(server_url : str) -> None:
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        conditional_download(temp_directory_path, [ server_url + download_path for download_path in DOWNLOAD_CONTENTS.keys() ])
+
+        for download_path, content in DOWNLOAD_CONTENTS.items():
+            with open(os.path.join(temp_directory_path, download_path.lstrip('/')), 'rb') as download_file:
+                assert download_file.read() == content
+
+        DOWNLOAD_REQUESTS.clear()
+        conditional_download(temp_directory_path, [ server_url + download_path for download_path in DOWNLOAD_CONTENTS.keys() ])
+
+        assert DOWNLOAD_REQUESTS == []
+
+
+@pytest.mark.parametrize('accept_range', [ True, False ])
+def test_download_file_resume(server_url : str, accept_range : bool) -> None:
+    content = DOWNLOAD_CONTENTS.get('/model_0.onnx')
+    progress_sizes = []
+    DownloadRequestHandler.accept_range = accept_range
+
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        download_file_path = os.path.join(temp_directory_path, 'model_0.onnx')
+        with open(download_file_path, 'wb') as partial_file:
+            partial_file.write(content[:100000])
+
+        assert download_file(server_url + '/model_0.onnx', download_file_path, progress_sizes.append) is True
+        assert ('/model_0.onnx', 'bytes=100000-') in DOWNLOAD_REQUESTS
+        assert 100000 + sum(progress_sizes) == len(content)
+
+        with open(download_file_path, 'rb') as download_file_content:
+            assert download_file_content.read() == content
+
+
+def test_conditional_download_sources(server_url : str) -> None:
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        model_paths = [ os.path.join(temp_directory_path, download_path.lstrip('/')) for download_path in DOWNLOAD_CONTENTS.keys() ]
+        sources = {}
+
+        for model_path, (download_path, content) in zip(model_paths, DOWNLOAD_CONTENTS.items()):
+            with open(model_path, 'wb') as model_file:
+                model_file.write(content)
+            create_file_hash(model_path)
+            with open(model_path, 'wb') as model_file:
+                model_file.write(content[:1000])
+            sources[download_path] =\
+            {
+                'url': server_url + download_path,
+                'path': model_path
+            }
+
+        assert conditional_download_sources(temp_directory_path, sources) is True
+        assert sorted(DOWNLOAD_REQUESTS) == sorted((download_path, 'bytes=1000-') for download_path in DOWNLOAD_CONTENTS.keys())
+
+
+def test_conditional_download_with_failure(server_url : str) -> None:
+    download_urls = [ server_url + DOWNLOAD_BROKEN_PATH, server_url + '/model_0.onnx' ]
+
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        assert conditional_download(temp_directory_path, download_urls) == [ server_url + DOWNLOAD_BROKEN_PATH ]
+        assert os.path.getsize(os.path.join(temp_directory_path, 'model_0.onnx')) == len(DOWNLOAD_CONTENTS.get('/model_0.onnx'))
+
+    assert [ download_path for download_path, _ in DOWNLOAD_REQUESTS ].count(DOWNLOAD_BROKEN_PATH) == 3
+
+
+def test_conditional_download_concurrent(server_url : str) -> None:
+    DownloadRequestHandler.chunk_delay = 0.02
+
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        start_time = perf_counter()
+        assert conditional_download(temp_directory_path, [ server_url + download_path for download_path in DOWNLOAD_CONTENTS.keys() ]) == []
+        concurrent_time = perf_counter() - start_time
+
+    print('download 6 files concurrent: {:.0f} ms, {} in parallel'.format(concurrent_time * 1000, DOWNLOAD_ACTIVE.get('peak')))
+    assert len(DOWNLOAD_REQUESTS) == len(DOWNLOAD_CONTENTS)
+    assert DOWNLOAD_ACTIVE.get('peak') > 1
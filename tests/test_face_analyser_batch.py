@@ -0,0 +1,261 @@
+import tempfile
+from typing import List
+
+import numpy
+import onnx
+import onnxruntime
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+
+import facefusion.face_classifier as face_classifier
+import facefusion.face_landmarker as face_landmarker
+import facefusion.face_recognizer as face_recognizer
+from facefusion import state_manager
+from facefusion.face_analyser import create_faces
+from facefusion.face_classifier import classify_face
+from facefusion.face_helper import WARP_TEMPLATES, convert_to_face_landmark_5, estimate_face_angle
+from facefusion.face_landmarker import detect_face_landmarks, estimate_face_landmark_68_5
+from facefusion.face_recognizer import calc_embedding
+from facefusion.face_tracker import clear_face_tracker
+from facefusion.typing import Face
+
+
+def save_session(model_path : str, model_nodes : list, model_inputs : list, model_outputs : list, model_initializers : list) -> onnxruntime.InferenceSession:
+    model_graph = helper.make_graph(model_nodes, 'model', model_inputs, model_outputs, model_initializers)
+    onnx.save(helper.make_model(model_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), model_path)
+    return onnxruntime.InferenceSession(model_path, providers = [ 'CPUExecutionProvider' ])
+
+
+def create_fan_68_5_session(model_path : str) -> onnxruntime.InferenceSession:
+    return save_session(model_path,
+    [
+        helper.make_node('Reshape', [ 'input', 'input_shape' ], [ 'input_flat' ]),
+        helper.make_node('MatMul', [ 'input_flat', 'weight' ], [ 'output_flat' ]),
+        helper.make_node('Reshape', [ 'output_flat', 'output_shape' ], [ 'output' ])
+    ],
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 5, 2 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 'batch', 68, 2 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.array([ -1, 10 ], dtype = numpy.int64), 'input_shape'),
+        numpy_helper.from_array(numpy.array([ -1, 68, 2 ], dtype = numpy.int64), 'output_shape'),
+        numpy_helper.from_array(numpy.random.rand(10, 136).astype(numpy.float32) * 0.2, 'weight')
+    ])
+
+
+def create_2dfan4_session(model_path : str) -> onnxruntime.InferenceSession:
+    return save_session(model_path,
+    [
+        helper.make_node('AveragePool', [ 'input' ], [ 'input_pool' ], kernel_shape = [ 4, 4 ], strides = [ 4, 4 ]),
+        helper.make_node('Conv', [ 'input_pool', 'weight' ], [ 'input_conv' ]),
+        helper.make_node('Sigmoid', [ 'input_conv' ], [ 'heatmap' ]),
+        helper.make_node('ReduceMean', [ 'heatmap' ], [ 'heatmap_mean' ], axes = [ 3 ], keepdims = 0),
+        helper.make_node('MatMul', [ 'heatmap_mean', 'landmark_weight' ], [ 'landmark' ])
+    ],
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 3, 256, 256 ])
+    ],
+    [
+        helper.make_tensor_value_info('landmark', TensorProto.FLOAT, [ 'batch', 68, 3 ]),
+        helper.make_tensor_value_info('heatmap', TensorProto.FLOAT, [ 'batch', 68, 64, 64 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.randn(68, 3, 1, 1).astype(numpy.float32), 'weight'),
+        numpy_helper.from_array(numpy.random.rand(64, 3).astype(numpy.float32), 'landmark_weight')
+    ])
+
+
+def create_peppa_wutz_session(model_path : str) -> onnxruntime.InferenceSession:
+    return save_session(model_path,
+    [
+        helper.make_node('AveragePool', [ 'input' ], [ 'input_pool' ], kernel_shape = [ 32, 32 ], strides = [ 32, 32 ]),
+        helper.make_node('Flatten', [ 'input_pool' ], [ 'input_flat' ]),
+        helper.make_node('MatMul', [ 'input_flat', 'weight' ], [ 'output_matmul' ]),
+        helper.make_node('Sigmoid', [ 'output_matmul' ], [ 'output' ])
+    ],
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 3, 256, 256 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 'batch', 204 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.randn(192, 204).astype(numpy.float32), 'weight')
+    ])
+
+
+def create_face_recognizer_session(model_path : str) -> onnxruntime.InferenceSession:
+    return save_session(model_path,
+    [
+        helper.make_node('AveragePool', [ 'input' ], [ 'input_pool' ], kernel_shape = [ 8, 8 ], strides = [ 8, 8 ]),
+        helper.make_node('Flatten', [ 'input_pool' ], [ 'input_flat' ]),
+        helper.make_node('MatMul', [ 'input_flat', 'weight' ], [ 'output' ])
+    ],
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 3, 112, 112 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 'batch', 512 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.randn(588, 512).astype(numpy.float32), 'weight')
+    ])
+
+
+def create_face_classifier_session(model_path : str) -> onnxruntime.InferenceSession:
+    return save_session(model_path,
+    [
+        helper.make_node('AveragePool', [ 'input' ], [ 'input_pool' ], kernel_shape = [ 16, 16 ], strides = [ 16, 16 ]),
+        helper.make_node('Flatten', [ 'input_pool' ], [ 'input_flat' ]),
+        helper.make_node('MatMul', [ 'input_flat', 'race_weight' ], [ 'race_score' ]),
+        helper.make_node('MatMul', [ 'input_flat', 'gender_weight' ], [ 'gender_score' ]),
+        helper.make_node('MatMul', [ 'input_flat', 'age_weight' ], [ 'age_score' ]),
+        helper.make_node('ArgMax', [ 'race_score' ], [ 'race_id' ], axis = 1, keepdims = 0),
+        helper.make_node('ArgMax', [ 'gender_score' ], [ 'gender_id' ], axis = 1, keepdims = 0),
+        helper.make_node('ArgMax', [ 'age_score' ], [ 'age_id' ], axis = 1, keepdims = 0)
+    ],
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 3, 224, 224 ])
+    ],
+    [
+        helper.make_tensor_value_info('race_id', TensorProto.INT64, [ 'batch' ]),
+        helper.make_tensor_value_info('gender_id', TensorProto.INT64, [ 'batch' ]),
+        helper.make_tensor_value_info('age_id', TensorProto.INT64, [ 'batch' ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.randn(588, 7).astype(numpy.float32), 'race_weight'),
+        numpy_helper.from_array(numpy.random.randn(588, 2).astype(numpy.float32), 'gender_weight'),
+        numpy_helper.from_array(numpy.random.randn(588, 9).astype(numpy.float32), 'age_weight')
+    ])
+
+
+class CountingInferenceSession:
+    def __init__(self, inference_session : onnxruntime.InferenceSession) -> None:
+        self.inference_session = inference_session
+        self.batch_sizes = []
+
+    def get_inputs(self) -> list:
+        return self.inference_session.get_inputs()
+
+    def run(self, output_names : list, input_feed : dict, run_options : onnxruntime.RunOptions = None) -> list:
+        self.batch_sizes.append(len(next(iter(input_feed.values()))))
+        return self.inference_session.run(output_names, input_feed, run_options)
+
+
+@pytest.fixture(scope = 'module')
+def inference_sessions() -> dict:
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        yield\
+        {
+            'fan_68_5': create_fan_68_5_session(temp_directory_path + '/fan_68_5.onnx'),
+            '2dfan4': create_2dfan4_session(temp_directory_path + '/2dfan4.onnx'),
+            'peppa_wutz': create_peppa_wutz_session(temp_directory_path + '/peppa_wutz.onnx'),
+            'face_recognizer': create_face_recognizer_session(temp_directory_path + '/face_recognizer.onnx'),
+            'face_classifier': create_face_classifier_session(temp_directory_path + '/face_classifier.onnx')
+        }
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch, inference_sessions : dict) -> None:
+    state_manager.init_item('execution_providers', [ 'cuda' ])
+    state_manager.init_item('face_detector_model', 'yoloface')
+    state_manager.init_item('face_detector_angles', [ 0 ])
+    state_manager.init_item('face_detector_score', 0.5)
+    state_manager.init_item('face_landmarker_model', 'many')
+    state_manager.init_item('face_landmarker_score', 0.5)
+    state_manager.init_item('face_tracker_identity_interval', 0)
+    monkeypatch.setattr(face_landmarker, 'get_inference_pool', lambda: inference_sessions)
+    monkeypatch.setattr(face_recognizer, 'get_inference_pool', lambda: inference_sessions)
+    monkeypatch.setattr(face_recognizer, 'get_model_options', lambda:
+    {
+        'template': 'arcface_112_v2',
+        'size': (112, 112)
+    })
+    monkeypatch.setattr(face_classifier, 'get_inference_pool', lambda: inference_sessions)
+    monkeypatch.setattr(face_classifier, 'get_model_options', lambda:
+    {
+        'template': 'arcface_112_v2',
+        'size': (224, 224),
+        'mean': [ 0.485, 0.456, 0.406 ],
+        'standard_deviation': [ 0.229, 0.224, 0.225 ]
+    })
+    clear_face_tracker()
+
+
+def create_crowd(face_total : int) -> tuple:
+    bounding_boxes = []
+    face_landmarks_5 = []
+
+    for face_index in range(face_total):
+        face_position = numpy.array([ 120 + face_index % 8 * 240, 120 + face_index // 8 * 240 ])
+        bounding_boxes.append(numpy.concatenate([ face_position - 80, face_position + 80 ]))
+        face_landmarks_5.append(WARP_TEMPLATES.get('arcface_112_v2') * 160 + face_position - 80)
+    return numpy.array(bounding_boxes, dtype = numpy.float64), numpy.linspace(0.9, 0.6, face_total), numpy.array(face_landmarks_5)
+
+
+def create_faces_sequential(vision_frame : numpy.ndarray, bounding_boxes : numpy.ndarray, face_landmarks_5 : numpy.ndarray) -> List[Face]:
+    faces = []
+
+    for bounding_box, face_landmark_5 in zip(bounding_boxes, face_landmarks_5):
+        face_landmark_5_68 = face_landmark_5
+        face_landmark_68_5 = estimate_face_landmark_68_5(face_landmark_5)
+        face_angle = estimate_face_angle(face_landmark_68_5)
+        face_landmark_68, face_landmark_score_68 = detect_face_landmarks(vision_frame, bounding_box, face_angle)
+        if face_landmark_score_68 > 0.5:
+            face_landmark_5_68 = convert_to_face_landmark_5(face_landmark_68)
+        embedding, normed_embedding = calc_embedding(vision_frame, face_landmark_5_68)
+        gender, age, race = classify_face(vision_frame, face_landmark_5_68)
+        faces.append(Face(
+            bounding_box = bounding_box,
+            score_set = { 'detector': None, 'landmarker': face_landmark_score_68 },
+            landmark_set = { '5': face_landmark_5, '5/68': face_landmark_5_68, '68': face_landmark_68, '68/5': face_landmark_68_5 },
+            angle = face_angle,
+            embedding = embedding,
+            normed_embedding = normed_embedding,
+            gender = gender,
+            age = age,
+            race = race
+        ))
+    return faces
+
+
+@pytest.mark.parametrize('face_landmarker_model', [ 'many', '2dfan4', 'peppa_wutz' ])
+def test_create_faces(face_landmarker_model : str) -> None:
+    state_manager.set_item('face_landmarker_model', face_landmarker_model)
+    vision_frame = numpy.random.randint(0, 255, (1080, 1920, 3), dtype = numpy.uint8)
+    bounding_boxes, face_scores, face_landmarks_5 = create_crowd(12)
+
+    sequential_faces = create_faces_sequential(vision_frame, bounding_boxes, face_landmarks_5)
+    batch_faces = create_faces(vision_frame, bounding_boxes, face_scores, face_landmarks_5)
+
+    assert len(batch_faces) == len(sequential_faces)
+    for batch_face, sequential_face in zip(batch_faces, sequential_faces):
+        assert numpy.allclose(batch_face.landmark_set.get('68'), sequential_face.landmark_set.get('68'), atol = 1e-3)
+        assert numpy.allclose(batch_face.landmark_set.get('68/5'), sequential_face.landmark_set.get('68/5'), atol = 1e-3)
+        assert numpy.isclose(batch_face.score_set.get('landmarker'), sequential_face.score_set.get('landmarker'), atol = 1e-4)
+        assert numpy.allclose(batch_face.normed_embedding, sequential_face.normed_embedding, atol = 1e-4)
+        assert (batch_face.gender, batch_face.age, batch_face.race) == (sequential_face.gender, sequential_face.age, sequential_face.race)
+
+
+@pytest.mark.parametrize('face_total', [ 1, 8, 24 ])
+def test_create_faces_batch_sizes(monkeypatch : pytest.MonkeyPatch, inference_sessions : dict, face_total : int) -> None:
+    vision_frame = numpy.random.randint(0, 255, (1080, 1920, 3), dtype = numpy.uint8)
+    bounding_boxes, face_scores, face_landmarks_5 = create_crowd(face_total)
+    counting_sessions = { model_name: CountingInferenceSession(inference_session) for model_name, inference_session in inference_sessions.items() }
+    monkeypatch.setattr(face_landmarker, 'get_inference_pool', lambda: counting_sessions)
+    monkeypatch.setattr(face_recognizer, 'get_inference_pool', lambda: counting_sessions)
+    monkeypatch.setattr(face_classifier, 'get_inference_pool', lambda: counting_sessions)
+
+    create_faces_sequential(vision_frame, bounding_boxes, face_landmarks_5)
+
+    for counting_session in counting_sessions.values():
+        assert counting_session.batch_sizes == [ 1 ] * face_total
+        counting_session.batch_sizes.clear()
+
+    create_faces(vision_frame, bounding_boxes, face_scores, face_landmarks_5)
+
+    for counting_session in counting_sessions.values():
+        assert counting_session.batch_sizes == [ face_total ]
@@ -0,0 +1,259 @@
+from time import perf_counter
+from typing import List, Tuple
+
+import cv2
+import numpy
+import pytest
+
+import facefusion.face_detector as face_detector
+from facefusion import state_manager
+from facefusion.face_detector import clear_face_detector_angle_memory, detect_faces, detect_faces_by_angles, detect_rotated_faces, detect_with_scrfd, detect_with_yoloface, get_face_detector_statistics
+from facefusion.face_helper import apply_nms, create_static_anchors, get_nms_threshold, transform_bounding_box, transform_points
+
+
+def create_anchor_detection(random_state : numpy.random.RandomState) -> List[numpy.ndarray]:
+    anchor_totals = [ (640 // feature_stride) ** 2 * 2 for feature_stride in [ 8, 16, 32 ] ]
+    detection = []
+    detection.extend(random_state.rand(anchor_total, 1).astype(numpy.float32) for anchor_total in anchor_totals)
+    detection.extend(random_state.rand(anchor_total, 4).astype(numpy.float32) * 4 for anchor_total in anchor_totals)
+    detection.extend(random_state.randn(anchor_total, 10).astype(numpy.float32) for anchor_total in anchor_totals)
+    return detection
+
+
+def create_yoloface_detection(random_state : numpy.random.RandomState) -> numpy.ndarray:
+    detection = random_state.rand(1, 20, 8400).astype(numpy.float32) * 640
+    detection[:, 4] = random_state.rand(8400)
+    return detection
+
+
+@pytest.fixture(scope = 'module')
+def detections() -> dict:
+    random_state = numpy.random.RandomState(0)
+    return\
+    {
+        'retinaface': create_anchor_detection(random_state),
+        'scrfd': create_anchor_detection(random_state),
+        'yoloface': create_yoloface_detection(random_state)
+    }
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch, detections : dict) -> None:
+    state_manager.init_item('face_detector_model', 'many')
+    state_manager.init_item('face_detector_size', '640x640')
+    state_manager.init_item('face_detector_score', 0.5)
+    state_manager.init_item('face_detector_angles', [ 0 ])
+    state_manager.init_item('face_detector_angle_strategy', 'all')
+    monkeypatch.setattr(face_detector, 'FACE_DETECTOR_ANGLE_MEMORIES', {})
+    monkeypatch.setattr(face_detector, 'forward_with_retinaface', lambda detect_vision_frame: detections.get('retinaface'))
+    monkeypatch.setattr(face_detector, 'forward_with_scrfd', lambda detect_vision_frame: detections.get('scrfd'))
+    monkeypatch.setattr(face_detector, 'forward_with_yoloface', lambda detect_vision_frame: detections.get('yoloface'))
+
+
+def decode_anchor_detection_sequential(detection : List[numpy.ndarray], ratio : float) -> Tuple[list, list, list]:
+    bounding_boxes = []
+    face_scores = []
+    face_landmarks_5 = []
+
+    for index, feature_stride in enumerate([ 8, 16, 32 ]):
+        anchors = create_static_anchors(feature_stride, 2, 640 // feature_stride, 640 // feature_stride)
+
+        for anchor, score, bounding_box_raw, face_landmark_5_raw in zip(anchors, detection[index], detection[index + 3], detection[index + 6]):
+            if score[0] >= 0.5:
+                bounding_box_raw = bounding_box_raw * feature_stride
+                face_landmark_5_raw = face_landmark_5_raw * feature_stride
+                bounding_boxes.append(numpy.array([ anchor[0] - bounding_box_raw[0], anchor[1] - bounding_box_raw[1], anchor[0] + bounding_box_raw[2], anchor[1] + bounding_box_raw[3] ]) * ratio)
+                face_scores.append(score[0])
+                face_landmarks_5.append((anchor + face_landmark_5_raw.reshape(5, 2)) * ratio)
+    return bounding_boxes, face_scores, face_landmarks_5
+
+
+def detect_faces_sequential(detections : dict, ratio : float) -> Tuple[list, list, list]:
+    bounding_boxes = []
+    face_scores = []
+    face_landmarks_5 = []
+
+    for face_detector_model in [ 'retinaface', 'scrfd' ]:
+        anchor_bounding_boxes, anchor_face_scores, anchor_face_landmarks_5 = decode_anchor_detection_sequential(detections.get(face_detector_model), ratio)
+        bounding_boxes.extend(anchor_bounding_boxes)
+        face_scores.extend(anchor_face_scores)
+        face_landmarks_5.extend(anchor_face_landmarks_5)
+
+    for detection in numpy.squeeze(detections.get('yoloface')).T:
+        if detection[4] > 0.5:
+            bounding_boxes.append(numpy.array([ detection[0] - detection[2] / 2, detection[1] - detection[3] / 2, detection[0] + detection[2] / 2, detection[1] + detection[3] / 2 ]) * ratio)
+            face_scores.append(detection[4])
+            face_landmarks_5.append(detection[5:].reshape(5, 3)[:, :2] * ratio)
+    return [ numpy.array([ min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2) ]) for x1, y1, x2, y2 in bounding_boxes ], face_scores, face_landmarks_5
+
+
+def test_detect_faces(detections : dict) -> None:
+    vision_frame = numpy.zeros((1280, 1280, 3), dtype = numpy.uint8)
+    bounding_boxes, face_scores, face_landmarks_5 = detect_faces(vision_frame)
+    sequential_bounding_boxes, sequential_face_scores, sequential_face_landmarks_5 = detect_faces_sequential(detections, 2)
+
+    assert bounding_boxes.shape == (len(sequential_bounding_boxes), 4)
+    assert numpy.allclose(bounding_boxes, sequential_bounding_boxes, atol = 1e-3)
+    assert numpy.allclose(face_scores, sequential_face_scores)
+    assert numpy.allclose(face_landmarks_5, sequential_face_landmarks_5, atol = 1e-3)
+    assert numpy.all(bounding_boxes[:, :2] <= bounding_boxes[:, 2:])
+
+
+def test_detect_rotated_faces() -> None:
+    vision_frame = numpy.zeros((640, 640, 3), dtype = numpy.uint8)
+    bounding_boxes, face_scores, face_landmarks_5 = detect_faces(vision_frame)
+    rotated_bounding_boxes, rotated_face_scores, rotated_face_landmarks_5 = detect_rotated_faces(vision_frame, 90)
+    rotated_matrix = cv2.invertAffineTransform(cv2.getRotationMatrix2D((320, 320), 90, 1))
+
+    assert numpy.allclose(rotated_bounding_boxes, [ transform_bounding_box(bounding_box, rotated_matrix) for bounding_box in bounding_boxes ], atol = 1e-3)
+    assert numpy.allclose(rotated_face_landmarks_5, [ transform_points(face_landmark_5, rotated_matrix) for face_landmark_5 in face_landmarks_5 ], atol = 1e-3)
+    assert numpy.array_equal(rotated_face_scores, face_scores)
+
+
+def test_detect_without_faces() -> None:
+    state_manager.set_item('face_detector_score', 1.0)
+    vision_frame = numpy.zeros((640, 640, 3), dtype = numpy.uint8)
+
+    for bounding_boxes, face_scores, face_landmarks_5 in [ detect_with_scrfd(vision_frame, '640x640'), detect_with_yoloface(vision_frame, '640x640'), detect_faces(vision_frame) ]:
+        assert bounding_boxes.shape == (0, 4)
+        assert face_scores.shape == (0,)
+        assert face_landmarks_5.shape == (0, 5, 2)
+
+
+def test_detect_faces_benchmark(detections : dict) -> None:
+    vision_frame = numpy.zeros((1280, 1280, 3), dtype = numpy.uint8)
+    frame_total = 3
+
+    start_time = perf_counter()
+    for _ in range(frame_total):
+        sequential_bounding_boxes, sequential_face_scores, _ = detect_faces_sequential(detections, 2)
+        normed_bounding_boxes = [ (x1, y1, x2 - x1, y2 - y1) for (x1, y1, x2, y2) in sequential_bounding_boxes ]
+        sequential_keep_indices = cv2.dnn.NMSBoxes(normed_bounding_boxes, sequential_face_scores, score_threshold = 0.5, nms_threshold = 0.1)
+    sequential_time = perf_counter() - start_time
+
+    start_time = perf_counter()
+    for _ in range(frame_total):
+        bounding_boxes, face_scores, _ = detect_faces(vision_frame)
+        keep_indices = apply_nms(bounding_boxes, face_scores, 0.5, 0.1)
+    vectorised_time = perf_counter() - start_time
+
+    print('{} detections sequential: {:.1f} ms, vectorised: {:.1f} ms per frame'.format(len(face_scores), sequential_time * 1000 / frame_total, vectorised_time * 1000 / frame_total))
+    assert len(face_scores) == len(sequential_face_scores)
+    assert sorted(numpy.ravel(keep_indices)) == sorted(numpy.ravel(sequential_keep_indices))
+
+
+def test_detect_faces_by_angles() -> None:
+    state_manager.set_item('face_detector_angles', [ 0, 90, 180, 270 ])
+    vision_frame = numpy.zeros((640, 640, 3), dtype = numpy.uint8)
+    bounding_boxes, face_scores, face_landmarks_5 = detect_faces(vision_frame)
+    angle_passes = dict(get_face_detector_statistics().get('face_detector_angle_passes'))
+
+    all_bounding_boxes, all_face_scores, all_face_landmarks_5 = detect_faces_by_angles(vision_frame)
+
+    assert all_face_scores.shape == (len(face_scores) * 4,)
+    assert get_face_detector_statistics().get('face_detector_angle_passes').get(270) == angle_passes.get(270, 0) + 1
+
+    state_manager.set_item('face_detector_angle_strategy', 'adaptive')
+    angle_skips = get_face_detector_statistics().get('face_detector_angle_skips')
+
+    for _ in range(3):
+        adaptive_bounding_boxes, adaptive_face_scores, adaptive_face_landmarks_5 = detect_faces_by_angles(vision_frame, 'target.mp4')
+
+        assert numpy.array_equal(adaptive_bounding_boxes, bounding_boxes)
+        assert numpy.array_equal(adaptive_face_scores, face_scores)
+
+    keep_indices = apply_nms(bounding_boxes, face_scores, 0.7, get_nms_threshold('many', [ 0, 90, 180, 270 ]))
+    assert face_detector.FACE_DETECTOR_ANGLE_MEMORIES.get('target.mp4').get('face_total') == len(numpy.ravel(keep_indices))
+    assert get_face_detector_statistics().get('face_detector_angle_skips') - angle_skips == 9
+
+
+def test_detect_faces_by_angles_memory(monkeypatch : pytest.MonkeyPatch) -> None:
+    state_manager.set_item('face_detector_angles', [ 0, 90, 180, 270 ])
+    state_manager.set_item('face_detector_angle_strategy', 'adaptive')
+    vision_frame = numpy.zeros((640, 640, 3), dtype = numpy.uint8)
+    detected_angles = []
+
+    def detect_faces_upright(detect_vision_frame : numpy.ndarray, face_detector_angle : int = 0) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        detected_angles.append(face_detector_angle)
+        if face_detector_angle == 180:
+            return numpy.array([ [ 10, 10, 50, 50 ] ]), numpy.array([ 0.9 ]), numpy.zeros((1, 5, 2))
+        return numpy.empty((0, 4)), numpy.empty(0), numpy.empty((0, 5, 2))
+
+    monkeypatch.setattr(face_detector, 'detect_faces', detect_faces_upright)
+    monkeypatch.setattr(face_detector, 'detect_rotated_faces', detect_faces_upright)
+    angle_hits = dict(get_face_detector_statistics().get('face_detector_angle_hits'))
+
+    _, face_scores, _ = detect_faces_by_angles(vision_frame, 'target.mp4')
+    assert detected_angles == [ 0, 90, 180 ]
+    assert len(face_scores) == 1
+
+    detected_angles.clear()
+    _, face_scores, _ = detect_faces_by_angles(vision_frame, 'target.mp4')
+    assert detected_angles == [ 180 ]
+    assert len(face_scores) == 1
+    assert get_face_detector_statistics().get('face_detector_angle_hits').get(180) == angle_hits.get(180, 0) + 2
+    assert get_face_detector_statistics().get('face_detector_angle_hits').get(90) == angle_hits.get(90)
+
+    detected_angles.clear()
+    detect_faces_by_angles(vision_frame, 'other.mp4')
+    assert detected_angles == [ 0, 90, 180 ]
+
+    detected_angles.clear()
+    detect_faces_by_angles(vision_frame)
+    assert detected_angles == [ 0, 90, 180 ]
+    assert 'other.mp4' in face_detector.FACE_DETECTOR_ANGLE_MEMORIES
+    assert None not in face_detector.FACE_DETECTOR_ANGLE_MEMORIES
+
+
+def test_detect_faces_by_angles_after_nms(monkeypatch : pytest.MonkeyPatch) -> None:
+    state_manager.set_item('face_detector_angles', [ 0, 90, 180, 270 ])
+    state_manager.set_item('face_detector_angle_strategy', 'adaptive')
+    face_detector.FACE_DETECTOR_ANGLE_MEMORIES['target.mp4'] = { 'angle': 0, 'face_total': 2 }
+    vision_frame = numpy.zeros((640, 640, 3), dtype = numpy.uint8)
+
+    def detect_faces_twice(detect_vision_frame : numpy.ndarray, face_detector_angle : int = 0) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        if face_detector_angle in [ 0, 90 ]:
+            return numpy.array([ [ 10, 10, 50, 50 ] ]), numpy.array([ 0.8 + face_detector_angle / 1000 ]), numpy.zeros((1, 5, 2))
+        return numpy.empty((0, 4)), numpy.empty(0), numpy.empty((0, 5, 2))
+
+    monkeypatch.setattr(face_detector, 'detect_faces', detect_faces_twice)
+    monkeypatch.setattr(face_detector, 'detect_rotated_faces', detect_faces_twice)
+    angle_hits = dict(get_face_detector_statistics().get('face_detector_angle_hits'))
+
+    _, face_scores, _ = detect_faces_by_angles(vision_frame, 'target.mp4')
+
+    assert len(face_scores) == 2
+    assert face_detector.FACE_DETECTOR_ANGLE_MEMORIES.get('target.mp4') == { 'angle': 90, 'face_total': 1 }
+
+    _, face_scores, _ = detect_faces_by_angles(vision_frame, 'target.mp4')
+
+    assert len(face_scores) == 1
+    assert get_face_detector_statistics().get('face_detector_angle_hits').get(90) == angle_hits.get(90, 0) + 2
+    assert get_face_detector_statistics().get('face_detector_angle_hits').get(0) == angle_hits.get(0)
+
+
+def test_clear_face_detector_angle_memory() -> None:
+    face_detector.FACE_DETECTOR_ANGLE_MEMORIES['target.mp4'] = { 'angle': 180, 'face_total': 3 }
+    clear_face_detector_angle_memory()
+
+    assert face_detector.FACE_DETECTOR_ANGLE_MEMORIES == {}
+    assert face_detector.FACE_DETECTOR_ANGLE_MEMORY == { 'angle': 0, 'face_total': 1 }
+
+
+def test_detect_faces_by_angles_benchmark() -> None:
+    state_manager.set_item('face_detector_angles', [ 0, 90, 180, 270 ])
+    vision_frame = numpy.zeros((640, 640, 3), dtype = numpy.uint8)
+    frame_total = 3
+    angle_passes = {}
+
+    for face_detector_angle_strategy in [ 'all', 'adaptive' ]:
+        state_manager.set_item('face_detector_angle_strategy', face_detector_angle_strategy)
+        clear_face_detector_angle_memory()
+        angle_total = sum(get_face_detector_statistics().get('face_detector_angle_passes').values())
+        for _ in range(frame_total):
+            detect_faces_by_angles(vision_frame, 'target.mp4')
+        angle_passes[face_detector_angle_strategy] = sum(get_face_detector_statistics().get('face_detector_angle_passes').values()) - angle_total
+
+    print('4 angles all: {} passes, adaptive: {} passes for {} frames'.format(angle_passes.get('all'), angle_passes.get('adaptive'), frame_total))
+    assert angle_passes.get('all') == frame_total * 4
+    assert angle_passes.get('adaptive') == frame_total
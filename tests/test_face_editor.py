@@ -0,0 +1,84 @@
+from typing import List
+
+import cv2
+import numpy
+import pytest
+
+import facefusion.processors.modules.face_editor as face_editor
+from facefusion import state_manager
+from facefusion.face_helper import WARP_TEMPLATES
+from facefusion.typing import Face
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch) -> None:
+    state_manager.init_item('face_mask_blur', 0.3)
+    state_manager.init_item('face_selector_mode', 'many')
+    monkeypatch.setattr(face_editor, 'get_model_options', lambda:
+    {
+        'template': 'ffhq_512',
+        'size': (512, 512)
+    })
+    monkeypatch.setattr(face_editor, 'sort_and_filter_faces', lambda faces: faces)
+    monkeypatch.setattr(face_editor, 'apply_edit', lambda crop_vision_frame, face_landmark_68: cv2.resize((1 - crop_vision_frame[0]).transpose(1, 2, 0), (512, 512)).transpose(2, 0, 1))
+
+
+def create_faces(face_total : int) -> List[Face]:
+    faces = []
+
+    for face_index in range(face_total):
+        face_position = numpy.array([ 240 + face_index * 480, 360 ])
+        face_landmark_5 = WARP_TEMPLATES.get('ffhq_512') * 160 + face_position - 80
+        faces.append(Face(
+            bounding_box = numpy.concatenate([ face_position - 80, face_position + 80 ]),
+            score_set = None,
+            landmark_set = { '5/68': face_landmark_5, '68': None },
+            angle = 0,
+            embedding = None,
+            normed_embedding = None,
+            gender = None,
+            age = None,
+            race = None
+        ))
+    return faces
+
+
+def test_process_frame_copies_once(monkeypatch : pytest.MonkeyPatch) -> None:
+    target_vision_frame = numpy.random.randint(0, 255, (720, 1280, 3), dtype = numpy.uint8)
+    faces = create_faces(2)
+    monkeypatch.setattr(face_editor, 'get_frame_faces', lambda vision_frame, frame_number: faces)
+    paste_vision_frames = []
+    paste_back_area = face_editor.paste_back_area
+
+    def record_paste_back_area(paste_vision_frame : numpy.ndarray, crop_vision_frame : numpy.ndarray, crop_mask : numpy.ndarray, affine_matrix : numpy.ndarray) -> None:
+        paste_vision_frames.append(paste_vision_frame)
+        paste_back_area(paste_vision_frame, crop_vision_frame, crop_mask, affine_matrix)
+
+    monkeypatch.setattr(face_editor, 'paste_back_area', record_paste_back_area)
+    target_vision_frame_raw = target_vision_frame.copy()
+    output_vision_frame = face_editor.process_frame(
+    {
+        'reference_faces': None,
+        'target_vision_frame': target_vision_frame,
+        'target_frame_number': 0
+    })
+
+    assert len(paste_vision_frames) == 2
+    assert all(paste_vision_frame is output_vision_frame for paste_vision_frame in paste_vision_frames)
+    assert not numpy.shares_memory(output_vision_frame, target_vision_frame)
+    assert numpy.array_equal(target_vision_frame, target_vision_frame_raw)
+    assert not numpy.array_equal(output_vision_frame[200:500, 100:400], target_vision_frame[200:500, 100:400])
+    assert not numpy.array_equal(output_vision_frame[200:500, 600:900], target_vision_frame[200:500, 600:900])
+
+
+def test_process_frame_without_faces(monkeypatch : pytest.MonkeyPatch) -> None:
+    target_vision_frame = numpy.random.randint(0, 255, (720, 1280, 3), dtype = numpy.uint8)
+    monkeypatch.setattr(face_editor, 'get_frame_faces', lambda vision_frame, frame_number: [])
+    output_vision_frame = face_editor.process_frame(
+    {
+        'reference_faces': None,
+        'target_vision_frame': target_vision_frame,
+        'target_frame_number': 0
+    })
+
+    assert output_vision_frame is target_vision_frame
@@ -0,0 +1,163 @@
+import tempfile
+from typing import List
+
+import numpy
+import onnx
+import onnxruntime
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+
+import facefusion.face_masker as face_masker
+import facefusion.processors.modules.face_enhancer as face_enhancer
+from facefusion import state_manager
+from facefusion.face_helper import WARP_TEMPLATES
+from facefusion.typing import Face
+
+
+def create_face_enhancer_session(model_path : str) -> onnxruntime.InferenceSession:
+    face_enhancer_nodes =\
+    [
+        helper.make_node('Conv', [ 'input', 'weight' ], [ 'input_conv' ], pads = [ 1, 1, 1, 1 ]),
+        helper.make_node('Tanh', [ 'input_conv' ], [ 'output' ])
+    ]
+    face_enhancer_graph = helper.make_graph(face_enhancer_nodes, 'face_enhancer',
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 3, 512, 512 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 'batch', 3, 512, 512 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.rand(3, 3, 3, 3).astype(numpy.float32) * 0.1, 'weight')
+    ])
+    onnx.save(helper.make_model(face_enhancer_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), model_path)
+    return onnxruntime.InferenceSession(model_path, providers = [ 'CPUExecutionProvider' ])
+
+
+def create_face_occluder_session(model_path : str) -> onnxruntime.InferenceSession:
+    face_occluder_nodes =\
+    [
+        helper.make_node('ReduceMean', [ 'input' ], [ 'input_mean' ], axes = [ 3 ], keepdims = 1),
+        helper.make_node('Sigmoid', [ 'input_mean' ], [ 'output' ])
+    ]
+    face_occluder_graph = helper.make_graph(face_occluder_nodes, 'face_occluder',
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 256, 256, 3 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 'batch', 256, 256, 1 ])
+    ])
+    onnx.save(helper.make_model(face_occluder_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), model_path)
+    return onnxruntime.InferenceSession(model_path, providers = [ 'CPUExecutionProvider' ])
+
+
+class CountingInferenceSession:
+    def __init__(self, inference_session : onnxruntime.InferenceSession) -> None:
+        self.inference_session = inference_session
+        self.batch_sizes = []
+
+    def get_inputs(self) -> list:
+        return self.inference_session.get_inputs()
+
+    def run(self, output_names : list, input_feed : dict, run_options : onnxruntime.RunOptions = None) -> list:
+        self.batch_sizes.append(len(next(iter(input_feed.values()))))
+        return self.inference_session.run(output_names, input_feed, run_options)
+
+
+@pytest.fixture(scope = 'module')
+def inference_sessions() -> dict:
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        yield\
+        {
+            'face_enhancer': create_face_enhancer_session(temp_directory_path + '/face_enhancer.onnx'),
+            'face_occluder': create_face_occluder_session(temp_directory_path + '/face_occluder.onnx')
+        }
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch, inference_sessions : dict) -> None:
+    state_manager.init_item('execution_providers', [ 'cuda' ])
+    state_manager.init_item('face_mask_blur', 0.3)
+    state_manager.init_item('face_mask_types', [ 'box', 'occlusion' ])
+    state_manager.init_item('face_enhancer_blend', 80)
+    monkeypatch.setattr(face_enhancer, 'get_model_options', lambda:
+    {
+        'template': 'ffhq_512',
+        'size': (512, 512)
+    })
+    monkeypatch.setattr(face_enhancer, 'get_inference_pool', lambda: { 'face_enhancer': inference_sessions.get('face_enhancer') })
+    monkeypatch.setattr(face_masker, 'get_inference_pool', lambda: { 'face_occluder': inference_sessions.get('face_occluder') })
+
+
+def create_faces(face_total : int) -> List[Face]:
+    faces = []
+
+    for face_index in range(face_total):
+        face_position = numpy.array([ 240 + face_index % 4 * 480, 180 + face_index // 4 * 360 ])
+        face_landmark_5 = WARP_TEMPLATES.get('ffhq_512') * 160 + face_position - 80
+        faces.append(Face(
+            bounding_box = numpy.concatenate([ face_position - 80, face_position + 80 ]),
+            score_set = None,
+            landmark_set = { '5/68': face_landmark_5 },
+            angle = 0,
+            embedding = None,
+            normed_embedding = None,
+            gender = None,
+            age = None,
+            race = None
+        ))
+    return faces
+
+
+def enhance_faces_sequential(target_faces : List[Face], temp_vision_frame : numpy.ndarray) -> numpy.ndarray:
+    for target_face in target_faces:
+        temp_vision_frame = face_enhancer.enhance_face(target_face, temp_vision_frame)
+    return temp_vision_frame
+
+
+@pytest.mark.parametrize('execution_providers', [ [ 'cuda' ], [ 'cpu' ] ])
+def test_enhance_faces(execution_providers : list) -> None:
+    state_manager.set_item('execution_providers', execution_providers)
+    temp_vision_frame = numpy.random.randint(0, 255, (1080, 1920, 3), dtype = numpy.uint8)
+    target_faces = create_faces(8)
+
+    sequential_vision_frame = enhance_faces_sequential(target_faces, temp_vision_frame)
+    batch_vision_frame = face_enhancer.enhance_faces(target_faces, temp_vision_frame)
+
+    assert numpy.abs(sequential_vision_frame.astype(numpy.int16) - batch_vision_frame).max() <= 1
+    assert not numpy.array_equal(batch_vision_frame, temp_vision_frame)
+
+
+@pytest.mark.parametrize('face_total', [ 1, 8, 12 ])
+def test_enhance_faces_batch_sizes(monkeypatch : pytest.MonkeyPatch, inference_sessions : dict, face_total : int) -> None:
+    temp_vision_frame = numpy.random.randint(0, 255, (1080, 1920, 3), dtype = numpy.uint8)
+    target_faces = create_faces(face_total)
+    counting_sessions =\
+    {
+        'face_enhancer': CountingInferenceSession(inference_sessions.get('face_enhancer')),
+        'face_occluder': CountingInferenceSession(inference_sessions.get('face_occluder'))
+    }
+    blend_frame_calls = []
+
+    def blend_frame(temp_vision_frame : numpy.ndarray, paste_vision_frame : numpy.ndarray) -> numpy.ndarray:
+        blend_frame_calls.append(paste_vision_frame.shape)
+        return paste_vision_frame
+
+    monkeypatch.setattr(face_enhancer, 'get_inference_pool', lambda: { 'face_enhancer': counting_sessions.get('face_enhancer') })
+    monkeypatch.setattr(face_masker, 'get_inference_pool', lambda: { 'face_occluder': counting_sessions.get('face_occluder') })
+    monkeypatch.setattr(face_enhancer, 'blend_frame', blend_frame)
+
+    enhance_faces_sequential(target_faces, temp_vision_frame)
+
+    assert counting_sessions.get('face_enhancer').batch_sizes == [ 1 ] * face_total
+    assert counting_sessions.get('face_occluder').batch_sizes == [ 1 ] * face_total
+    assert len(blend_frame_calls) == face_total
+
+    for counting_session in counting_sessions.values():
+        counting_session.batch_sizes.clear()
+    blend_frame_calls.clear()
+    face_enhancer.enhance_faces(target_faces, temp_vision_frame)
+
+    assert counting_sessions.get('face_enhancer').batch_sizes == [ face_total ]
+    assert counting_sessions.get('face_occluder').batch_sizes == [ face_total ]
+    assert len(blend_frame_calls) == 1
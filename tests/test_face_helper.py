@@ -0,0 +1,102 @@
+from time import perf_counter
+
+import cv2
+import numpy
+import pytest
+
+from facefusion.face_helper import calc_bounding_box_iou, calc_paste_area, paste_back, paste_back_many, warp_face_by_face_landmark_5
+
+
+def paste_back_full_frame(temp_vision_frame : numpy.ndarray, crop_vision_frame : numpy.ndarray, crop_mask : numpy.ndarray, affine_matrix : numpy.ndarray) -> numpy.ndarray:
+    inverse_matrix = cv2.invertAffineTransform(affine_matrix)
+    temp_size = temp_vision_frame.shape[:2][::-1]
+    inverse_mask = cv2.warpAffine(crop_mask, inverse_matrix, temp_size).clip(0, 1)
+    inverse_vision_frame = cv2.warpAffine(crop_vision_frame, inverse_matrix, temp_size, borderMode = cv2.BORDER_REPLICATE)
+    paste_vision_frame = temp_vision_frame.copy()
+    for channel in range(3):
+        paste_vision_frame[:, :, channel] = inverse_mask * inverse_vision_frame[:, :, channel] + (1 - inverse_mask) * temp_vision_frame[:, :, channel]
+    return paste_vision_frame
+
+
+def create_face_landmark_5(center : tuple, size : float) -> numpy.ndarray:
+    return numpy.array(
+    [
+        [ center[0] - size * 0.3, center[1] - size * 0.1 ],
+        [ center[0] + size * 0.3, center[1] - size * 0.1 ],
+        [ center[0], center[1] + size * 0.1 ],
+        [ center[0] - size * 0.2, center[1] + size * 0.35 ],
+        [ center[0] + size * 0.2, center[1] + size * 0.3 ]
+    ], dtype = numpy.float32)
+
+
+def paste_faces(paste_method : callable, temp_vision_frame : numpy.ndarray, face_landmarks_5 : list) -> numpy.ndarray:
+    for face_landmark_5 in face_landmarks_5:
+        crop_vision_frame, affine_matrix = warp_face_by_face_landmark_5(temp_vision_frame, face_landmark_5, 'arcface_128_v2', (512, 512))
+        crop_mask = numpy.ones((512, 512), dtype = numpy.float32)
+        crop_mask[:32] = 0
+        crop_mask = cv2.GaussianBlur(crop_mask, (0, 0), 8)
+        temp_vision_frame = paste_method(temp_vision_frame, 255 - crop_vision_frame, crop_mask, affine_matrix)
+    return temp_vision_frame
+
+
+@pytest.mark.parametrize('face_center', [ (320, 180), (20, 20), (630, 350) ])
+def test_paste_back(face_center : tuple) -> None:
+    temp_vision_frame = numpy.random.randint(0, 255, (360, 640, 3), dtype = numpy.uint8)
+    face_landmarks_5 = [ create_face_landmark_5(face_center, 120) ]
+    paste_vision_frame = paste_faces(paste_back, temp_vision_frame, face_landmarks_5)
+
+    assert numpy.abs(paste_vision_frame.astype(int) - paste_faces(paste_back_full_frame, temp_vision_frame, face_landmarks_5)).max() <= 1
+    assert not numpy.shares_memory(paste_vision_frame, temp_vision_frame)
+
+
+def test_paste_back_many() -> None:
+    temp_vision_frame = numpy.random.randint(0, 255, (360, 640, 3), dtype = numpy.uint8)
+    crop_vision_frames = []
+    crop_masks = []
+    affine_matrices = []
+
+    for face_center in [ (120, 120), (180, 160), (500, 250) ]:
+        crop_vision_frame, affine_matrix = warp_face_by_face_landmark_5(temp_vision_frame, create_face_landmark_5(face_center, 120), 'arcface_128_v2', (512, 512))
+        crop_vision_frames.append(255 - crop_vision_frame)
+        crop_masks.append(cv2.GaussianBlur(numpy.ones((512, 512), dtype = numpy.float32), (0, 0), 8))
+        affine_matrices.append(affine_matrix)
+    paste_vision_frame = temp_vision_frame
+
+    for crop_vision_frame, crop_mask, affine_matrix in zip(crop_vision_frames, crop_masks, affine_matrices):
+        paste_vision_frame = paste_back(paste_vision_frame, crop_vision_frame, crop_mask, affine_matrix)
+
+    assert numpy.array_equal(paste_back_many(temp_vision_frame, crop_vision_frames, crop_masks, affine_matrices), paste_vision_frame)
+    assert not numpy.array_equal(paste_vision_frame, temp_vision_frame)
+
+
+def test_calc_paste_area() -> None:
+    temp_vision_frame = numpy.zeros((360, 640, 3), dtype = numpy.uint8)
+    crop_vision_frame = numpy.zeros((100, 100, 3), dtype = numpy.uint8)
+
+    assert calc_paste_area(temp_vision_frame, crop_vision_frame, numpy.array([ [ 1, 0, 50 ], [ 0, 1, 60 ] ], dtype = numpy.float64)) == (49, 59, 151, 161)
+    assert calc_paste_area(temp_vision_frame, crop_vision_frame, numpy.array([ [ 1, 0, -50 ], [ 0, 1, 300 ] ], dtype = numpy.float64)) == (0, 299, 51, 360)
+    assert calc_paste_area(temp_vision_frame, crop_vision_frame, numpy.array([ [ 1, 0, 700 ], [ 0, 1, 0 ] ], dtype = numpy.float64))[0] >= 640
+
+
+def test_calc_bounding_box_iou() -> None:
+    assert calc_bounding_box_iou(numpy.array([ 0, 0, 100, 100 ]), numpy.array([ 0, 0, 100, 100 ])) == 1.0
+    assert calc_bounding_box_iou(numpy.array([ 0, 0, 100, 100 ]), numpy.array([ 50, 0, 150, 100 ])) == 1 / 3
+    assert calc_bounding_box_iou(numpy.array([ 0, 0, 100, 100 ]), numpy.array([ 200, 200, 300, 300 ])) == 0.0
+
+
+@pytest.mark.parametrize('frame_size, face_total', [ ((1080, 1920), 1), ((1080, 1920), 10), ((2160, 3840), 1), ((2160, 3840), 10) ])
+def test_paste_back_benchmark(frame_size : tuple, face_total : int) -> None:
+    temp_vision_frame = numpy.random.randint(0, 255, frame_size + (3,), dtype = numpy.uint8)
+    face_size = frame_size[0] // 8
+    face_landmarks_5 = [ create_face_landmark_5((face_size * (index + 1) * 1.5, frame_size[0] / 2), face_size) for index in range(face_total) ]
+
+    start_time = perf_counter()
+    full_frame_vision_frame = paste_faces(paste_back_full_frame, temp_vision_frame, face_landmarks_5)
+    full_frame_time = perf_counter() - start_time
+
+    start_time = perf_counter()
+    paste_area_vision_frame = paste_faces(paste_back, temp_vision_frame, face_landmarks_5)
+    paste_area_time = perf_counter() - start_time
+
+    print('{}x{} with {} faces full frame: {:.1f} ms, paste area: {:.1f} ms'.format(frame_size[1], frame_size[0], face_total, full_frame_time * 1000, paste_area_time * 1000))
+    assert numpy.abs(paste_area_vision_frame.astype(int) - full_frame_vision_frame).max() <= 1
@@ -0,0 +1,151 @@
+from time import perf_counter
+
+import numpy
+import pytest
+
+from facefusion import state_manager
+from facefusion.face_store import FRAME_HASH_SAMPLE_SIZE, clear_static_faces, clear_static_frame_faces, create_frame_hash, \
+    create_sha1_frame_hash, create_strided_frame_hash, get_face_store, get_face_store_statistics, get_static_faces, \
+    get_static_frame_faces, set_static_faces, set_static_frame_faces
+from facefusion.typing import Face
+
+
+@pytest.fixture(scope = 'module', autouse = True)
+def before_all() -> None:
+    state_manager.init_item('face_store_fingerprint', 'sha1')
+    state_manager.init_item('face_store_memory_limit', 2)
+    clear_static_faces()
+    clear_static_frame_faces()
+
+
+def create_face(embedding_size : int = 0) -> Face:
+    return Face(
+        bounding_box = numpy.array([ 10, 20, 110, 140 ]),
+        score_set = None,
+        landmark_set = None,
+        angle = 0,
+        embedding = numpy.zeros(embedding_size, dtype = numpy.uint8),
+        normed_embedding = None,
+        gender = None,
+        age = None,
+        race = None
+    )
+
+
+def test_set_static_frame_faces() -> None:
+    vision_frame = numpy.zeros((360, 640, 3), dtype = numpy.uint8)
+    face = create_face()
+    set_static_frame_faces(10, vision_frame, [ face ])
+
+    assert get_static_frame_faces(10).get('frame_size') == (360, 640)
+    assert get_static_frame_faces(10).get('faces') == [ face ]
+    assert get_static_frame_faces(11) is None
+
+
+def test_set_static_frame_faces_without_faces() -> None:
+    vision_frame = numpy.zeros((360, 640, 3), dtype = numpy.uint8)
+    set_static_frame_faces(20, vision_frame, [])
+
+    assert get_static_frame_faces(20).get('faces') == []
+
+
+def test_clear_static_frame_faces() -> None:
+    vision_frame = numpy.zeros((360, 640, 3), dtype = numpy.uint8)
+    set_static_frame_faces(30, vision_frame, [ create_face() ])
+    clear_static_frame_faces()
+
+    assert get_static_frame_faces(30) is None
+
+    set_static_frame_faces(30, vision_frame, [ create_face() ])
+    clear_static_faces()
+
+    assert get_static_frame_faces(30) is None
+
+
+def test_static_frame_faces_eviction() -> None:
+    clear_static_faces()
+    vision_frame = numpy.zeros((360, 640, 3), dtype = numpy.uint8)
+    face_store_statistics = get_face_store_statistics().copy()
+
+    for frame_number in range(2000):
+        set_static_frame_faces(frame_number, vision_frame, [ create_face(4096) ])
+
+    assert get_static_frame_faces(0) is None
+    assert get_static_frame_faces(1999)
+    assert len(get_face_store().get('frame_faces')) < 2000
+    assert get_face_store_statistics().get('frame_faces_bytes') <= 2 * 1024 ** 2
+    assert get_face_store_statistics().get('frame_faces_evictions') - face_store_statistics.get('frame_faces_evictions') == 2000 - len(get_face_store().get('frame_faces'))
+
+    clear_static_frame_faces()
+
+    assert get_face_store_statistics().get('frame_faces_bytes') == 0
+
+
+def test_static_faces_eviction() -> None:
+    clear_static_faces()
+    vision_frames = [ numpy.full((360, 640, 3), index + 1, dtype = numpy.uint8) for index in range(3) ]
+    face_store_statistics = get_face_store_statistics().copy()
+
+    for vision_frame in vision_frames:
+        set_static_faces(vision_frame, [ create_face(1024 ** 2 - 32) ])
+
+    assert get_static_faces(vision_frames[0]) is None
+    assert get_static_faces(vision_frames[1])
+    assert get_static_faces(vision_frames[2])
+    assert get_face_store_statistics().get('static_faces_hits') - face_store_statistics.get('static_faces_hits') == 2
+    assert get_face_store_statistics().get('static_faces_misses') - face_store_statistics.get('static_faces_misses') == 1
+    assert get_face_store_statistics().get('static_faces_evictions') - face_store_statistics.get('static_faces_evictions') == 1
+    assert get_face_store_statistics().get('static_faces_bytes') <= 2 * 1024 ** 2
+
+    set_static_faces(vision_frames[0], [ create_face(1024 ** 2 - 32) ])
+
+    assert get_static_faces(vision_frames[1]) is None
+    assert get_static_faces(vision_frames[2])
+
+    clear_static_faces()
+
+    assert get_face_store_statistics().get('static_faces_bytes') == 0
+
+
+def test_create_frame_hash() -> None:
+    vision_frame = numpy.random.randint(0, 255, (720, 1280, 3), dtype = numpy.uint8)
+
+    assert create_frame_hash(vision_frame) == create_sha1_frame_hash(vision_frame)
+    assert create_frame_hash(vision_frame) == create_frame_hash(vision_frame.copy())
+    assert create_frame_hash(vision_frame) != create_frame_hash(numpy.flip(vision_frame))
+    assert create_frame_hash(vision_frame) != create_frame_hash(vision_frame[:360])
+    assert create_frame_hash(numpy.zeros((720, 1280, 3), dtype = numpy.uint8)) is None
+
+    state_manager.set_item('face_store_fingerprint', 'strided')
+
+    assert create_frame_hash(vision_frame) == create_strided_frame_hash(vision_frame)
+
+    state_manager.set_item('face_store_fingerprint', None)
+
+    assert create_frame_hash(vision_frame) == create_sha1_frame_hash(vision_frame)
+
+    state_manager.set_item('face_store_fingerprint', 'sha1')
+
+
+@pytest.mark.parametrize('frame_size', [ (720, 1280), (1080, 1920), (2160, 3840) ])
+def test_create_frame_hash_benchmark(frame_size : tuple) -> None:
+    vision_frame = numpy.random.randint(0, 255, frame_size + (3,), dtype = numpy.uint8)
+    hash_total = 20
+
+    start_time = perf_counter()
+    for _ in range(hash_total):
+        create_sha1_frame_hash(vision_frame)
+    sha1_time = (perf_counter() - start_time) / hash_total
+
+    start_time = perf_counter()
+    for _ in range(hash_total):
+        create_strided_frame_hash(vision_frame)
+    strided_time = (perf_counter() - start_time) / hash_total
+
+    print('{}x{} sha1: {:.3f} ms, strided: {:.3f} ms'.format(frame_size[1], frame_size[0], sha1_time * 1000, strided_time * 1000))
+    frame_stride = max(frame_size) // FRAME_HASH_SAMPLE_SIZE
+    sampled_vision_frame = vision_frame.copy()
+    sampled_vision_frame[numpy.arange(frame_size[0]) % frame_stride > 0] = 0
+
+    assert create_strided_frame_hash(sampled_vision_frame) == create_strided_frame_hash(vision_frame)
+    assert create_sha1_frame_hash(sampled_vision_frame) != create_sha1_frame_hash(vision_frame)
@@ -0,0 +1,259 @@
+import tempfile
+from typing import List
+
+import numpy
+import onnx
+import onnxruntime
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+
+import facefusion.face_masker as face_masker
+import facefusion.processors.modules.face_swapper as face_swapper
+from facefusion import state_manager
+from facefusion.face_helper import WARP_TEMPLATES
+from facefusion.processors.pixel_boost import explode_pixel_boost, implode_pixel_boost
+from facefusion.typing import Face
+
+
+def create_face_swapper_session(model_path : str, batch_size : str) -> onnxruntime.InferenceSession:
+    face_swapper_nodes =\
+    [
+        helper.make_node('Conv', [ 'target', 'weight' ], [ 'target_conv' ], pads = [ 1, 1, 1, 1 ]),
+        helper.make_node('ReduceMean', [ 'source' ], [ 'source_mean' ], axes = [ 1 ], keepdims = 1),
+        helper.make_node('Unsqueeze', [ 'source_mean', 'axes' ], [ 'source_bias' ]),
+        helper.make_node('Add', [ 'target_conv', 'source_bias' ], [ 'output' ])
+    ]
+    face_swapper_graph = helper.make_graph(face_swapper_nodes, 'face_swapper',
+    [
+        helper.make_tensor_value_info('target', TensorProto.FLOAT, [ batch_size, 3, 128, 128 ]),
+        helper.make_tensor_value_info('source', TensorProto.FLOAT, [ batch_size, 512 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ batch_size, 3, 128, 128 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.rand(3, 3, 3, 3).astype(numpy.float32) * 0.1, 'weight'),
+        numpy_helper.from_array(numpy.array([ 2, 3 ], dtype = numpy.int64), 'axes')
+    ])
+    onnx.save(helper.make_model(face_swapper_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), model_path)
+    return onnxruntime.InferenceSession(model_path, providers = [ 'CPUExecutionProvider' ])
+
+
+def create_face_occluder_session(model_path : str) -> onnxruntime.InferenceSession:
+    face_occluder_nodes =\
+    [
+        helper.make_node('ReduceMean', [ 'input' ], [ 'input_mean' ], axes = [ 3 ], keepdims = 1),
+        helper.make_node('Sigmoid', [ 'input_mean' ], [ 'output' ])
+    ]
+    face_occluder_graph = helper.make_graph(face_occluder_nodes, 'face_occluder',
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 256, 256, 3 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 'batch', 256, 256, 1 ])
+    ])
+    onnx.save(helper.make_model(face_occluder_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), model_path)
+    return onnxruntime.InferenceSession(model_path, providers = [ 'CPUExecutionProvider' ])
+
+
+def create_face_parser_session(model_path : str) -> onnxruntime.InferenceSession:
+    face_parser_nodes =\
+    [
+        helper.make_node('Conv', [ 'input', 'weight', 'bias' ], [ 'output' ])
+    ]
+    face_parser_graph = helper.make_graph(face_parser_nodes, 'face_parser',
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 3, 512, 512 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 'batch', 19, 512, 512 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.rand(19, 3, 1, 1).astype(numpy.float32), 'weight'),
+        numpy_helper.from_array(numpy.eye(19, dtype = numpy.float32)[1] * 10, 'bias')
+    ])
+    onnx.save(helper.make_model(face_parser_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), model_path)
+    return onnxruntime.InferenceSession(model_path, providers = [ 'CPUExecutionProvider' ])
+
+
+class CountingInferenceSession:
+    def __init__(self, inference_session : onnxruntime.InferenceSession) -> None:
+        self.inference_session = inference_session
+        self.batch_sizes = []
+
+    def get_inputs(self) -> list:
+        return self.inference_session.get_inputs()
+
+    def run(self, output_names : list, input_feed : dict, run_options : onnxruntime.RunOptions = None) -> list:
+        self.batch_sizes.append(len(next(iter(input_feed.values()))))
+        return self.inference_session.run(output_names, input_feed, run_options)
+
+
+@pytest.fixture(scope = 'module')
+def face_swapper_sessions() -> dict:
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        yield\
+        {
+            'dynamic': create_face_swapper_session(temp_directory_path + '/dynamic.onnx', 'batch'),
+            'fixed': create_face_swapper_session(temp_directory_path + '/fixed.onnx', 1),
+            'face_occluder': create_face_occluder_session(temp_directory_path + '/face_occluder.onnx'),
+            'face_parser': create_face_parser_session(temp_directory_path + '/face_parser.onnx')
+        }
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch) -> None:
+    state_manager.init_item('execution_providers', [ 'cuda' ])
+    state_manager.init_item('face_mask_types', [ 'box', 'occlusion', 'region' ])
+    state_manager.init_item('face_mask_blur', 0.3)
+    state_manager.init_item('face_mask_padding', (0, 0, 0, 0))
+    state_manager.init_item('face_mask_regions', [ 'skin', 'nose' ])
+    state_manager.init_item('face_swapper_pixel_boost', '256x256')
+    state_manager.init_item('output_video_fps', 25.0)
+    monkeypatch.setattr(face_swapper, 'get_model_options', lambda:
+    {
+        'type': 'simswap',
+        'template': 'arcface_128_v2',
+        'size': (128, 128),
+        'mean': [ 0.485, 0.456, 0.406 ],
+        'standard_deviation': [ 0.229, 0.224, 0.225 ]
+    })
+    monkeypatch.setattr(face_swapper, 'prepare_source_embedding', lambda source_face: numpy.ones((1, 512), dtype = numpy.float32))
+
+
+def swap_pixel_boost_tiles(crop_vision_frame : numpy.ndarray, pixel_boost_total : int) -> numpy.ndarray:
+    temp_vision_frames = []
+
+    for pixel_boost_vision_frame in implode_pixel_boost(crop_vision_frame, pixel_boost_total, (128, 128)):
+        pixel_boost_vision_frame = face_swapper.prepare_crop_frame(pixel_boost_vision_frame)
+        pixel_boost_vision_frame = face_swapper.forward_swap_face(None, pixel_boost_vision_frame)
+        pixel_boost_vision_frame = face_swapper.normalize_crop_frame(pixel_boost_vision_frame)
+        temp_vision_frames.append(pixel_boost_vision_frame)
+    return explode_pixel_boost(temp_vision_frames, pixel_boost_total, (128, 128), crop_vision_frame.shape[:2])
+
+
+def swap_pixel_boost_batch(crop_vision_frame : numpy.ndarray, pixel_boost_total : int) -> numpy.ndarray:
+    pixel_boost_vision_frames = implode_pixel_boost(crop_vision_frame, pixel_boost_total, (128, 128))
+    pixel_boost_vision_frames = face_swapper.prepare_crop_frames(pixel_boost_vision_frames)
+    pixel_boost_vision_frames = face_swapper.forward_swap_faces(None, pixel_boost_vision_frames)
+    temp_vision_frames = face_swapper.normalize_crop_frames(pixel_boost_vision_frames)
+    return explode_pixel_boost(temp_vision_frames, pixel_boost_total, (128, 128), crop_vision_frame.shape[:2])
+
+
+@pytest.mark.parametrize('batch_type, execution_providers', [ ('dynamic', [ 'cuda' ]), ('dynamic', [ 'cpu' ]), ('fixed', [ 'cuda' ]) ])
+def test_forward_swap_faces(monkeypatch : pytest.MonkeyPatch, face_swapper_sessions : dict, batch_type : str, execution_providers : list) -> None:
+    monkeypatch.setattr(face_swapper, 'get_inference_pool', lambda: { 'face_swapper': face_swapper_sessions.get(batch_type) })
+    state_manager.set_item('execution_providers', execution_providers)
+    crop_vision_frame = numpy.random.randint(0, 255, (384, 384, 3), dtype = numpy.uint8)
+
+    assert numpy.allclose(swap_pixel_boost_tiles(crop_vision_frame, 3), swap_pixel_boost_batch(crop_vision_frame, 3), atol = 1e-3)
+
+
+@pytest.mark.parametrize('pixel_boost_size', [ 256, 384, 512 ])
+def test_forward_swap_faces_batch_sizes(monkeypatch : pytest.MonkeyPatch, face_swapper_sessions : dict, pixel_boost_size : int) -> None:
+    crop_vision_frame = numpy.random.randint(0, 255, (pixel_boost_size, pixel_boost_size, 3), dtype = numpy.uint8)
+    pixel_boost_total = pixel_boost_size // 128
+    batch_sizes = {}
+
+    for swap_type, batch_type, execution_providers in [ ('tiles', 'dynamic', [ 'cuda' ]), ('batch', 'dynamic', [ 'cuda' ]), ('cpu', 'dynamic', [ 'cpu' ]), ('fixed', 'fixed', [ 'cuda' ]) ]:
+        counting_session = CountingInferenceSession(face_swapper_sessions.get(batch_type))
+        monkeypatch.setattr(face_swapper, 'get_inference_pool', lambda: { 'face_swapper': counting_session })
+        state_manager.set_item('execution_providers', execution_providers)
+        if swap_type == 'tiles':
+            swap_pixel_boost_tiles(crop_vision_frame, pixel_boost_total)
+        else:
+            swap_pixel_boost_batch(crop_vision_frame, pixel_boost_total)
+        batch_sizes[swap_type] = counting_session.batch_sizes
+
+    assert batch_sizes.get('tiles') == [ 1 ] * pixel_boost_total ** 2
+    assert batch_sizes.get('batch') == [ pixel_boost_total ** 2 ]
+    assert batch_sizes.get('cpu') == [ 1 ] * pixel_boost_total ** 2
+    assert batch_sizes.get('fixed') == [ 1 ] * pixel_boost_total ** 2
+
+
+def create_faces(face_total : int) -> List[Face]:
+    faces = []
+
+    for face_index in range(face_total):
+        face_position = numpy.array([ 240 + face_index % 4 * 480, 180 + face_index // 4 * 360 ])
+        face_landmark_5 = WARP_TEMPLATES.get('arcface_128_v2') * 160 + face_position - 80
+        faces.append(Face(
+            bounding_box = numpy.concatenate([ face_position - 80, face_position + 80 ]),
+            score_set = None,
+            landmark_set = { '5/68': face_landmark_5 },
+            angle = 0,
+            embedding = None,
+            normed_embedding = None,
+            gender = None,
+            age = None,
+            race = None
+        ))
+    return faces
+
+
+def swap_faces_sequential(target_faces : List[Face], temp_vision_frame : numpy.ndarray) -> numpy.ndarray:
+    for target_face in target_faces:
+        temp_vision_frame = face_swapper.swap_face(None, target_face, temp_vision_frame)
+    return temp_vision_frame
+
+
+@pytest.fixture
+def face_swapper_pools(monkeypatch : pytest.MonkeyPatch, face_swapper_sessions : dict) -> dict:
+    counting_sessions =\
+    {
+        'face_swapper': CountingInferenceSession(face_swapper_sessions.get('dynamic')),
+        'face_occluder': CountingInferenceSession(face_swapper_sessions.get('face_occluder')),
+        'face_parser': CountingInferenceSession(face_swapper_sessions.get('face_parser'))
+    }
+    monkeypatch.setattr(face_swapper, 'get_inference_pool', lambda: { 'face_swapper': counting_sessions.get('face_swapper') })
+    monkeypatch.setattr(face_masker, 'get_inference_pool', lambda:
+    {
+        'face_occluder': counting_sessions.get('face_occluder'),
+        'face_parser': counting_sessions.get('face_parser')
+    })
+    return counting_sessions
+
+
+def collect_batch_sizes(counting_sessions : dict) -> dict:
+    batch_sizes = { model_name: list(counting_session.batch_sizes) for model_name, counting_session in counting_sessions.items() }
+
+    for counting_session in counting_sessions.values():
+        counting_session.batch_sizes.clear()
+    return batch_sizes
+
+
+@pytest.mark.parametrize('execution_providers', [ [ 'cuda' ], [ 'cpu' ] ])
+def test_swap_faces(face_swapper_pools : dict, execution_providers : list) -> None:
+    state_manager.set_item('execution_providers', execution_providers)
+    temp_vision_frame = numpy.random.randint(0, 255, (1080, 1920, 3), dtype = numpy.uint8)
+    target_faces = create_faces(8)
+
+    sequential_vision_frame = swap_faces_sequential(target_faces, temp_vision_frame)
+    batch_vision_frame = face_swapper.swap_faces(None, target_faces, temp_vision_frame)
+
+    assert numpy.abs(sequential_vision_frame.astype(numpy.int16) - batch_vision_frame).max() <= 1
+    assert not numpy.array_equal(batch_vision_frame, temp_vision_frame)
+
+
+@pytest.mark.parametrize('face_total', [ 1, 8, 12 ])
+def test_swap_faces_batch_sizes(face_swapper_pools : dict, face_total : int) -> None:
+    temp_vision_frame = numpy.random.randint(0, 255, (1080, 1920, 3), dtype = numpy.uint8)
+    target_faces = create_faces(face_total)
+
+    swap_faces_sequential(target_faces, temp_vision_frame)
+    sequential_batch_sizes = collect_batch_sizes(face_swapper_pools)
+    face_swapper.swap_faces(None, target_faces, temp_vision_frame)
+    batch_batch_sizes = collect_batch_sizes(face_swapper_pools)
+    state_manager.set_item('execution_providers', [ 'cpu' ])
+    face_swapper.swap_faces(None, target_faces, temp_vision_frame)
+    cpu_batch_sizes = collect_batch_sizes(face_swapper_pools)
+
+    assert sequential_batch_sizes.get('face_swapper') == [ 4 ] * face_total
+    assert sequential_batch_sizes.get('face_occluder') == [ 1 ] * face_total
+    assert sequential_batch_sizes.get('face_parser') == [ 1 ] * face_total
+    assert batch_batch_sizes.get('face_swapper') == [ 4 * face_total ]
+    assert batch_batch_sizes.get('face_occluder') == [ face_total ]
+    assert batch_batch_sizes.get('face_parser') == [ face_total ]
+    assert cpu_batch_sizes.get('face_swapper') == [ 1 ] * 4 * face_total
+    assert cpu_batch_sizes.get('face_occluder') == [ 1 ] * face_total
+    assert cpu_batch_sizes.get('face_parser') == [ 1 ] * face_total
@@ -0,0 +1,305 @@
+from time import perf_counter, sleep
+from typing import List, Optional
+
+import cv2
+import numpy
+import pytest
+
+import facefusion.face_analyser as face_analyser
+import facefusion.face_tracker as face_tracker
+from facefusion import state_manager
+from facefusion.face_analyser import create_faces, get_frame_faces
+from facefusion.face_helper import WARP_TEMPLATES
+from facefusion.face_store import clear_static_faces, clear_static_frame_faces
+from facefusion.face_tracker import clear_face_tracker, find_face_tracker_identities, get_face_tracker_statistics, scope_face_tracker, set_face_tracker_identity
+from facefusion.typing import Face
+
+DETECTOR_COUNTS = \
+    {
+        'get_many_faces': 0,
+        'calc_embedding': 0,
+        'classify_face': 0
+    }
+
+
+@pytest.fixture(scope = 'module')
+def talking_head_clip() -> dict:
+    random_state = numpy.random.RandomState(0)
+    face_texture = cv2.GaussianBlur(random_state.randint(0, 255, (240, 240, 3)).astype(numpy.uint8), (0, 0), 2)
+    background_frame = cv2.GaussianBlur(random_state.randint(0, 255, (720, 1280, 3)).astype(numpy.uint8), (0, 0), 8)
+    face_landmark_68 = random_state.uniform(40, 200, (68, 2))
+    vision_frames = []
+    face_landmarks_68 = []
+
+    for frame_number in range(60):
+        face_matrix = cv2.getRotationMatrix2D((120, 120), numpy.sin(frame_number / 8) * 4, 1)
+        face_matrix[:, 2] += [ 520 + numpy.sin(frame_number / 10) * 30, 240 + numpy.cos(frame_number / 12) * 15 ]
+        vision_frame = background_frame.copy()
+        face_mask = cv2.warpAffine(numpy.ones((240, 240), dtype = numpy.uint8), face_matrix, (1280, 720))
+        face_frame = cv2.warpAffine(face_texture, face_matrix, (1280, 720))
+        vision_frame[face_mask > 0] = face_frame[face_mask > 0]
+        vision_frames.append(vision_frame)
+        face_landmarks_68.append(cv2.transform(face_landmark_68.reshape(-1, 1, 2), face_matrix).reshape(-1, 2))
+    return\
+    {
+        'vision_frames': vision_frames,
+        'face_landmarks_68': face_landmarks_68
+    }
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch, talking_head_clip : dict) -> None:
+    def detect_many_faces(vision_frames : List[numpy.ndarray], frame_number : Optional[int] = None) -> List[Face]:
+        DETECTOR_COUNTS['get_many_faces'] += 1
+        sleep(0.02)
+        for vision_frame, face_landmark_68 in zip(talking_head_clip.get('vision_frames'), talking_head_clip.get('face_landmarks_68')):
+            if vision_frame is vision_frames[0]:
+                return [ create_face(face_landmark_68) ]
+        return []
+
+    def calc_embeddings(vision_frame : numpy.ndarray, face_landmarks_5 : List[numpy.ndarray]) -> tuple:
+        DETECTOR_COUNTS['calc_embedding'] += len(face_landmarks_5)
+        sleep(0.005 * len(face_landmarks_5))
+        return [ numpy.full(512, face_landmark_5[0][0]) for face_landmark_5 in face_landmarks_5 ], [ numpy.full(512, face_landmark_5[0][0]) for face_landmark_5 in face_landmarks_5 ]
+
+    def classify_faces(vision_frame : numpy.ndarray, face_landmarks_5 : List[numpy.ndarray]) -> list:
+        DETECTOR_COUNTS['classify_face'] += len(face_landmarks_5)
+        sleep(0.005 * len(face_landmarks_5))
+        return [ ('female', range(20, 30), 'white') for _ in face_landmarks_5 ]
+
+    DETECTOR_COUNTS['get_many_faces'] = 0
+    DETECTOR_COUNTS['calc_embedding'] = 0
+    DETECTOR_COUNTS['classify_face'] = 0
+    state_manager.init_item('face_detector_model', 'yoloface')
+    state_manager.init_item('face_detector_angles', [ 0 ])
+    state_manager.init_item('face_detector_score', 0.5)
+    state_manager.init_item('face_landmarker_score', 0)
+    state_manager.init_item('face_tracker_interval', 0)
+    state_manager.init_item('face_tracker_score', 0.8)
+    state_manager.init_item('face_tracker_identity_interval', 0)
+    state_manager.init_item('face_store_memory_limit', 0)
+    monkeypatch.setattr(face_analyser, 'get_many_faces', detect_many_faces)
+    monkeypatch.setattr(face_analyser, 'estimate_many_face_landmarks_68_5', lambda face_landmarks_5: [ numpy.resize(face_landmark_5, (68, 2)) for face_landmark_5 in face_landmarks_5 ])
+    monkeypatch.setattr(face_analyser, 'calc_embeddings', calc_embeddings)
+    monkeypatch.setattr(face_analyser, 'classify_faces', classify_faces)
+    clear_static_frame_faces()
+    clear_face_tracker()
+
+
+def create_face(face_landmark_68 : numpy.ndarray) -> Face:
+    face_landmark_5 = face_landmark_68[:5]
+    return Face(
+        bounding_box = numpy.concatenate([ face_landmark_68.min(axis = 0), face_landmark_68.max(axis = 0) ]),
+        score_set = { 'detector': 0.9, 'landmarker': 0.9 },
+        landmark_set =
+        {
+            '5': face_landmark_5,
+            '5/68': face_landmark_5,
+            '68': face_landmark_68,
+            '68/5': face_landmark_68
+        },
+        angle = 0,
+        embedding = numpy.ones(512),
+        normed_embedding = numpy.ones(512),
+        gender = 'female',
+        age = range(20, 30),
+        race = 'white'
+    )
+
+
+def create_face_landmark_5(face_position : numpy.ndarray, face_turn : float = 0) -> numpy.ndarray:
+    face_landmark_5 = WARP_TEMPLATES.get('arcface_112_v2') * 160 + face_position - 80
+    face_landmark_5[2][0] += face_turn * 160
+    return face_landmark_5
+
+
+def create_identity_face(face_position : numpy.ndarray, embedding_value : float) -> Face:
+    return Face(
+        bounding_box = numpy.concatenate([ face_position - 80, face_position + 80 ]),
+        score_set = { 'detector': 0.9, 'landmarker': 0.9 },
+        landmark_set = { '5/68': create_face_landmark_5(face_position) },
+        angle = 0,
+        embedding = numpy.full(512, embedding_value),
+        normed_embedding = numpy.full(512, embedding_value),
+        gender = 'female',
+        age = range(20, 30),
+        race = 'white'
+    )
+
+
+def create_identity_faces(frame_number : int, face_turn : float = 0) -> List[Face]:
+    face_positions = [ numpy.array([ 300 + frame_number * 2, 300 ]), numpy.array([ 900 - frame_number * 2, 300 + frame_number ]) ]
+    bounding_boxes = [ numpy.concatenate([ face_position - 80, face_position + 80 ]) for face_position in face_positions ]
+    face_landmarks_5 = [ create_face_landmark_5(face_position, face_turn) for face_position in face_positions ]
+    return create_faces(numpy.zeros((720, 1280, 3), dtype = numpy.uint8), numpy.array(bounding_boxes), numpy.array([ 0.9, 0.9 ]), numpy.array(face_landmarks_5), frame_number)
+
+
+def test_create_faces_with_identity() -> None:
+    state_manager.set_item('face_tracker_identity_interval', 10)
+    embedded_faces = get_face_tracker_statistics().get('face_tracker_embedded_faces')
+    first_faces = create_identity_faces(0)
+
+    for frame_number in range(1, 30):
+        faces = create_identity_faces(frame_number)
+
+        assert len(faces) == 2
+        assert faces[0].gender == 'female'
+        assert numpy.array_equal(faces[0].embedding, first_faces[0].embedding) == (frame_number < 10)
+        assert numpy.array_equal(faces[1].embedding, first_faces[1].embedding) == (frame_number < 10)
+
+    assert DETECTOR_COUNTS.get('calc_embedding') == 6
+    assert DETECTOR_COUNTS.get('classify_face') == 6
+    assert get_face_tracker_statistics().get('face_tracker_embedded_faces') - embedded_faces == 6
+
+
+def test_create_faces_with_identity_pose_change() -> None:
+    state_manager.set_item('face_tracker_identity_interval', 10)
+
+    create_identity_faces(0)
+    create_identity_faces(1)
+    create_identity_faces(2, 0.05)
+
+    assert DETECTOR_COUNTS.get('calc_embedding') == 4
+
+
+def test_find_face_tracker_identities_crossing() -> None:
+    face_positions = [ numpy.array([ 300, 300 ]), numpy.array([ 340, 300 ]) ]
+    set_face_tracker_identity(0, create_identity_face(face_positions[0], 0))
+    set_face_tracker_identity(0, create_identity_face(face_positions[1], 1))
+    face_positions.reverse()
+    bounding_boxes = [ numpy.concatenate([ face_position - 80, face_position + 80 ]) for face_position in face_positions ]
+    face_landmarks_5 = [ create_face_landmark_5(face_position) for face_position in face_positions ]
+    face_tracker_identities = find_face_tracker_identities(1, bounding_boxes, face_landmarks_5, 10)
+
+    assert [ face_tracker_identity.get('embedding')[0] for face_tracker_identity in face_tracker_identities ] == [ 1, 0 ]
+
+    face_tracker_identities = find_face_tracker_identities(2, bounding_boxes[:1] * 2, face_landmarks_5[:1] * 2, 10)
+
+    assert [ face_tracker_identity.get('embedding')[0] for face_tracker_identity in face_tracker_identities ] == [ 1, 0 ]
+
+
+def test_clear_face_tracker() -> None:
+    create_identity_faces(0)
+    create_identity_faces(1)
+    clear_face_tracker()
+
+    assert set(get_face_tracker_statistics().values()) == { 0 }
+
+
+def test_scope_face_tracker() -> None:
+    face_position = numpy.array([ 300, 300 ])
+    bounding_boxes = [ numpy.concatenate([ face_position - 80, face_position + 80 ]) ]
+    face_landmarks_5 = [ create_face_landmark_5(face_position) ]
+    scope_face_tracker('target-1.mp4')
+    set_face_tracker_identity(0, create_identity_face(face_position, 1))
+    scope_face_tracker('target-1.mp4')
+
+    assert find_face_tracker_identities(1, bounding_boxes, face_landmarks_5, 10)[0].get('embedding')[0] == 1
+
+    scope_face_tracker('target-2.mp4')
+
+    assert find_face_tracker_identities(2, bounding_boxes, face_landmarks_5, 10) == [ None ]
+
+    set_face_tracker_identity(2, create_identity_face(face_position, 2))
+    clear_static_faces()
+
+    assert find_face_tracker_identities(3, bounding_boxes, face_landmarks_5, 10) == [ None ]
+
+
+def test_track_faces_scope(talking_head_clip : dict) -> None:
+    state_manager.set_item('face_tracker_interval', 10)
+    vision_frames = talking_head_clip.get('vision_frames')
+
+    state_manager.set_item('target_path', 'target-1.mp4')
+    get_frame_faces(vision_frames[0], 0)
+    clear_static_frame_faces()
+    state_manager.set_item('target_path', 'target-2.mp4')
+    get_frame_faces(vision_frames[1], 1)
+    state_manager.set_item('target_path', None)
+
+    assert DETECTOR_COUNTS.get('get_many_faces') == 2
+
+
+def test_create_faces_with_identity_benchmark() -> None:
+    execution_times = {}
+    embedding_calls = {}
+
+    for face_tracker_identity_interval in [ 0, 10 ]:
+        state_manager.set_item('face_tracker_identity_interval', face_tracker_identity_interval)
+        DETECTOR_COUNTS['calc_embedding'] = 0
+        clear_face_tracker()
+        start_time = perf_counter()
+        for frame_number in range(60):
+            create_identity_faces(frame_number)
+        execution_times[face_tracker_identity_interval] = perf_counter() - start_time
+        embedding_calls[face_tracker_identity_interval] = DETECTOR_COUNTS.get('calc_embedding')
+
+    for face_tracker_identity_interval in [ 0, 10 ]:
+        print('identity interval {}: {} embedding calls, {:.1f} fps'.format(face_tracker_identity_interval, embedding_calls.get(face_tracker_identity_interval), 60 / execution_times.get(face_tracker_identity_interval)))
+    assert embedding_calls.get(10) * 10 == embedding_calls.get(0)
+
+
+def test_track_faces(talking_head_clip : dict) -> None:
+    state_manager.set_item('face_tracker_interval', 10)
+    detected_frames = get_face_tracker_statistics().get('face_tracker_detected_frames')
+
+    for frame_number, vision_frame in enumerate(talking_head_clip.get('vision_frames')):
+        faces = get_frame_faces(vision_frame, frame_number)
+
+        assert len(faces) == 1
+        assert numpy.abs(faces[0].landmark_set.get('68') - talking_head_clip.get('face_landmarks_68')[frame_number]).max() < 1.5
+        assert faces[0].embedding is not None
+
+    assert DETECTOR_COUNTS.get('get_many_faces') == 6
+    assert get_face_tracker_statistics().get('face_tracker_detected_frames') - detected_frames == 6
+
+
+def test_track_faces_anchor_memory(talking_head_clip : dict) -> None:
+    state_manager.set_item('face_tracker_interval', 10)
+    state_manager.set_item('face_store_memory_limit', 1)
+
+    for frame_number, vision_frame in enumerate(talking_head_clip.get('vision_frames')):
+        get_frame_faces(vision_frame, frame_number)
+
+    assert DETECTOR_COUNTS.get('get_many_faces') == 6
+    assert len(face_tracker.FACE_TRACKER_ANCHORS) == 1
+    assert get_face_tracker_statistics().get('face_tracker_anchor_bytes') == 720 * 1280
+    assert get_face_tracker_statistics().get('face_tracker_anchor_evictions') == 5
+
+    clear_static_faces()
+
+    assert get_face_tracker_statistics().get('face_tracker_anchor_bytes') == 0
+    assert len(face_tracker.FACE_TRACKER_ANCHORS) == 0
+
+
+def test_track_faces_lost(talking_head_clip : dict) -> None:
+    state_manager.set_item('face_tracker_interval', 10)
+    vision_frames = talking_head_clip.get('vision_frames')
+
+    get_frame_faces(vision_frames[0], 0)
+    get_frame_faces(vision_frames[1], 1)
+    get_frame_faces(numpy.flip(vision_frames[2], axis = 0).copy(), 2)
+
+    assert DETECTOR_COUNTS.get('get_many_faces') == 2
+
+
+def test_track_faces_benchmark(talking_head_clip : dict) -> None:
+    vision_frames = talking_head_clip.get('vision_frames')
+    execution_times = {}
+    detector_calls = {}
+
+    for face_tracker_interval in [ 0, 5, 10 ]:
+        state_manager.set_item('face_tracker_interval', face_tracker_interval)
+        DETECTOR_COUNTS['get_many_faces'] = 0
+        clear_static_frame_faces()
+        clear_face_tracker()
+        start_time = perf_counter()
+        for frame_number, vision_frame in enumerate(vision_frames):
+            get_frame_faces(vision_frame, frame_number)
+        execution_times[face_tracker_interval] = perf_counter() - start_time
+        detector_calls[face_tracker_interval] = DETECTOR_COUNTS.get('get_many_faces')
+
+    for face_tracker_interval in [ 0, 5, 10 ]:
+        print('interval {}: {} detector calls, {:.1f} fps'.format(face_tracker_interval, detector_calls.get(face_tracker_interval), len(vision_frames) / execution_times.get(face_tracker_interval)))
+    assert detector_calls.get(0) == len(vision_frames)
+    assert detector_calls.get(10) < detector_calls.get(5) < detector_calls.get(0)
@@ -0,0 +1,77 @@
+import io
+import tracemalloc
+from time import perf_counter
+
+import numpy
+import pytest
+
+from facefusion.frame_buffer import FrameRingBuffer
+
+
+def test_frame_ring_buffer() -> None:
+    frame_ring_buffer = FrameRingBuffer((640, 360), 4)
+    slot_indices = [ frame_ring_buffer.acquire_slot() for _ in range(4) ]
+
+    assert sorted(slot_indices) == [ 0, 1, 2, 3 ]
+    assert frame_ring_buffer.free_slots.empty()
+
+    frame_ring_buffer.get_vision_frame(slot_indices[0])[:] = 255
+    frame_ring_buffer.release_slot(slot_indices[0])
+
+    assert frame_ring_buffer.get_vision_frame(slot_indices[0]).shape == (360, 640, 3)
+    assert numpy.all(frame_ring_buffer.get_vision_frame(frame_ring_buffer.acquire_slot()) == 255)
+    assert numpy.all(frame_ring_buffer.get_vision_frame(slot_indices[1]) == 0)
+
+    frame_ring_buffer.close()
+
+
+def test_frame_ring_buffer_readinto() -> None:
+    frame_ring_buffer = FrameRingBuffer((64, 32), 2)
+    vision_frames = [ numpy.random.randint(0, 255, (32, 64, 3), dtype = numpy.uint8) for _ in range(3) ]
+    frame_reader = io.BufferedReader(io.BytesIO(b''.join(vision_frame.tobytes() for vision_frame in vision_frames)))
+
+    for vision_frame in vision_frames:
+        slot_index = frame_ring_buffer.acquire_slot()
+
+        assert frame_reader.readinto(frame_ring_buffer.get_vision_frame(slot_index)) == frame_ring_buffer.slot_size
+        assert numpy.array_equal(frame_ring_buffer.get_vision_frame(slot_index), vision_frame)
+
+        frame_ring_buffer.release_slot(slot_index)
+
+    frame_ring_buffer.close()
+
+
+@pytest.mark.parametrize('frame_resolution', [ (1920, 1080), (3840, 2160) ])
+def test_frame_ring_buffer_benchmark(frame_resolution : tuple) -> None:
+    frame_width, frame_height = frame_resolution
+    frame_size = frame_width * frame_height * 3
+    frame_total = 30
+    frame_bytes = numpy.random.randint(0, 255, frame_size, dtype = numpy.uint8).tobytes() * frame_total
+
+    frame_reader = io.BufferedReader(io.BytesIO(frame_bytes))
+    tracemalloc.start()
+    start_time = perf_counter()
+    for _ in range(frame_total):
+        frame_buffer = bytearray(frame_size)
+        frame_reader.readinto(frame_buffer)
+        numpy.frombuffer(frame_buffer, dtype = numpy.uint8).reshape((frame_height, frame_width, 3)).sum(dtype = numpy.uint64)
+    allocate_time = perf_counter() - start_time
+    allocate_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    frame_reader = io.BufferedReader(io.BytesIO(frame_bytes))
+    frame_ring_buffer = FrameRingBuffer(frame_resolution, 4)
+    tracemalloc.start()
+    start_time = perf_counter()
+    for _ in range(frame_total):
+        slot_index = frame_ring_buffer.acquire_slot()
+        frame_reader.readinto(frame_ring_buffer.get_vision_frame(slot_index))
+        frame_ring_buffer.get_vision_frame(slot_index).sum(dtype = numpy.uint64)
+        frame_ring_buffer.release_slot(slot_index)
+    ring_time = perf_counter() - start_time
+    ring_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    frame_ring_buffer.close()
+
+    print('{}x{} allocate: {:.1f} fps {:.1f} MB, ring buffer: {:.1f} fps {:.1f} MB'.format(frame_width, frame_height, frame_total / allocate_time, allocate_memory / 1024 ** 2, frame_total / ring_time, ring_memory / 1024 ** 2))
+    assert ring_memory < allocate_memory
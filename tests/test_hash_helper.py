@@ -0,0 +1,103 @@
+import os
+import tempfile
+import zlib
+from time import perf_counter
+
+import pytest
+
+import facefusion.hash_helper
+from facefusion.download import validate_source_paths
+from facefusion.hash_helper import create_file_content_hash, create_file_hash, get_hash_record_path, validate_hash
+from facefusion.json import read_json
+
+HASH_COUNTS = \
+    {
+        'create_file_content_hash': 0
+    }
+
+
+@pytest.fixture(scope = 'module')
+def temp_directory_path() -> str:
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        yield temp_directory_path
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch) -> None:
+    def count_create_file_content_hash(file_path : str) -> str:
+        HASH_COUNTS['create_file_content_hash'] += 1
+        return create_file_content_hash(file_path)
+
+    HASH_COUNTS['create_file_content_hash'] = 0
+    monkeypatch.setattr(facefusion.hash_helper, 'create_file_content_hash', count_create_file_content_hash)
+
+
+def create_model_file(model_path : str, model_size : int) -> None:
+    with open(model_path, 'wb') as model_file:
+        model_file.write(os.urandom(model_size))
+
+
+def test_create_file_content_hash(temp_directory_path : str) -> None:
+    model_path = os.path.join(temp_directory_path, 'chunked.onnx')
+    create_model_file(model_path, facefusion.hash_helper.HASH_CHUNK_SIZE * 2 + 123)
+
+    with open(model_path, 'rb') as model_file:
+        assert create_file_content_hash(model_path) == format(zlib.crc32(model_file.read()), '08x')
+
+
+def test_validate_hash_with_record(temp_directory_path : str) -> None:
+    model_path = os.path.join(temp_directory_path, 'record.onnx')
+    create_model_file(model_path, 1024)
+    model_hash = create_file_hash(model_path)
+    HASH_COUNTS['create_file_content_hash'] = 0
+
+    assert read_json(get_hash_record_path(model_path)).get('hash') == model_hash
+    assert validate_hash(model_path) is True
+    assert validate_hash(model_path) is True
+    assert HASH_COUNTS.get('create_file_content_hash') == 0
+
+    os.remove(get_hash_record_path(model_path))
+
+    assert validate_hash(model_path) is True
+    assert validate_hash(model_path) is True
+    assert HASH_COUNTS.get('create_file_content_hash') == 1
+
+    create_model_file(model_path, 2048)
+
+    assert validate_hash(model_path) is False
+    assert HASH_COUNTS.get('create_file_content_hash') == 2
+
+
+def test_validate_source_paths(temp_directory_path : str) -> None:
+    model_paths = [ os.path.join(temp_directory_path, 'source_' + str(index) + '.onnx') for index in range(4) ]
+
+    for model_path in model_paths:
+        create_model_file(model_path, 1024)
+        create_file_hash(model_path)
+    create_model_file(model_paths[-1], 1024)
+
+    assert validate_source_paths(model_paths) == (model_paths[:-1], model_paths[-1:])
+    assert validate_source_paths([ os.path.join(temp_directory_path, 'invalid.onnx') ]) == ([], [ os.path.join(temp_directory_path, 'invalid.onnx') ])
+
+
+def test_validate_hash_benchmark(temp_directory_path : str) -> None:
+    model_paths = [ os.path.join(temp_directory_path, 'benchmark_' + str(index) + '.onnx') for index in range(4) ]
+
+    for model_path in model_paths:
+        create_model_file(model_path, 64 * 1024 ** 2)
+        create_file_hash(model_path)
+        os.remove(get_hash_record_path(model_path))
+
+    HASH_COUNTS['create_file_content_hash'] = 0
+    start_time = perf_counter()
+    cold_validation = validate_source_paths(model_paths)
+    cold_time = perf_counter() - start_time
+    cold_hash_total = HASH_COUNTS.get('create_file_content_hash')
+    start_time = perf_counter()
+    record_validation = validate_source_paths(model_paths)
+    record_time = perf_counter() - start_time
+
+    print('validate 4 x 64 MB cold: {:.1f} ms, record: {:.1f} ms'.format(cold_time * 1000, record_time * 1000))
+    assert cold_validation == record_validation == (model_paths, [])
+    assert cold_hash_total == len(model_paths)
+    assert HASH_COUNTS.get('create_file_content_hash') == cold_hash_total
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+def run_python(python_code : str) -> subprocess.CompletedProcess:
+    environment = os.environ.copy()
+    environment['PYTHONPATH'] = os.pathsep.join(sys.path)
+    commands = [ sys.executable, '-c', python_code ]
+    return subprocess.run(commands, env = environment, capture_output = True, text = True)
+
+
+@pytest.mark.parametrize('module_name', [ 'facefusion.core', 'facefusion.memory', 'facefusion.download' ])
+def test_lazy_imports(module_name : str) -> None:
+    import_result = run_python('import sys, ' + module_name + '; print(\',\'.join(sys.modules))')
+    module_names = import_result.stdout.strip().split(',')
+
+    assert import_result.returncode == 0, import_result.stderr
+    assert 'torch' not in module_names
+    assert 'yt_dlp' not in module_names
+    assert 'PIL' not in module_names
+    assert 'facefusion.processors.modules.style_changer' not in module_names
+
+
+def test_lazy_processors() -> None:
+    python_code = '\n'.join(
+    [
+        'import sys',
+        'from facefusion import state_manager',
+        'from facefusion.args import apply_args',
+        'from facefusion.program import collect_step_program',
+        'sys.argv = [ \'facefusion\', \'--processors\', \'face_enhancer\' ]',
+        'apply_args(vars(collect_step_program().parse_args(sys.argv[1:])), state_manager.init_item)',
+        'print(state_manager.get_item(\'face_enhancer_model\'))',
+        'print(\',\'.join(sys.modules))'
+    ])
+    import_result = run_python(python_code)
+
+    assert import_result.returncode == 0, import_result.stderr
+    face_enhancer_model, module_names = import_result.stdout.strip().splitlines()[-2:]
+    module_names = module_names.split(',')
+
+    assert face_enhancer_model == 'gfpgan_1.4'
+    assert 'facefusion.processors.modules.face_enhancer' in module_names
+    assert not [ module_name for module_name in module_names if module_name.startswith('facefusion.processors.modules.') and module_name != 'facefusion.processors.modules.face_enhancer' ]
+
+
+def test_lazy_processors_args() -> None:
+    python_code = '\n'.join(
+    [
+        'from facefusion import state_manager',
+        'from facefusion.args import apply_args',
+        'from facefusion.processors.core import load_processor_module',
+        'state_manager.init_item(\'config_path\', \'facefusion.ini\')',
+        'apply_args({ \'processors\': [ \'face_enhancer\' ], \'frame_enhancer_model\': \'span_kendata_x4\' }, state_manager.init_item)',
+        'print(state_manager.get_item(\'frame_enhancer_model\'))',
+        'load_processor_module(\'frame_enhancer\')',
+        'print(state_manager.get_item(\'frame_enhancer_model\'))'
+    ])
+    import_result = run_python(python_code)
+
+    assert import_result.returncode == 0, import_result.stderr
+    assert import_result.stdout.strip().splitlines()[-2:] == [ 'None', 'span_kendata_x4' ]
+
+
+def test_lazy_processors_program() -> None:
+    python_code = '\n'.join(
+    [
+        'import sys',
+        'from facefusion import state_manager',
+        'from facefusion.program import create_processors_program',
+        'state_manager.init_item(\'config_path\', \'facefusion.ini\')',
+        'sys.argv = [ \'webui\', \'--processors\', \'frame_enhancer\', \'--xformers\' ]',
+        'print(\',\'.join(action.dest for action in create_processors_program()._actions))',
+        'state_manager.init_item(\'processors\', [ \'face_enhancer\' ])',
+        'print(\',\'.join(action.dest for action in create_processors_program()._actions))',
+        'print(\',\'.join(sys.modules))'
+    ])
+    import_result = run_python(python_code)
+
+    assert import_result.returncode == 0, import_result.stderr
+    program_dests, processors_program_dests, module_names = import_result.stdout.strip().splitlines()[-3:]
+    module_names = module_names.split(',')
+
+    assert program_dests.split(',') == [ 'processors', 'processor_pipeline' ]
+    assert 'face_enhancer_model' in processors_program_dests.split(',')
+    assert 'facefusion.processors.modules.frame_enhancer' not in module_names
@@ -0,0 +1,135 @@
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+import onnx
+import onnxruntime
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+
+from facefusion.inference_batcher import BatchedInferenceSession, detect_batch_size, has_dynamic_batch
+
+
+def create_inference_session(model_path : str, batch_size : str) -> onnxruntime.InferenceSession:
+    inference_nodes =\
+    [
+        helper.make_node('Conv', [ 'input', 'weight' ], [ 'input_conv' ], pads = [ 1, 1, 1, 1 ]),
+        helper.make_node('Relu', [ 'input_conv' ], [ 'output' ])
+    ]
+    inference_graph = helper.make_graph(inference_nodes, 'inference_batcher',
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ batch_size, 3, 128, 128 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ batch_size, 8, 128, 128 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.rand(8, 3, 3, 3).astype(numpy.float32), 'weight')
+    ])
+    onnx.save(helper.make_model(inference_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), model_path)
+    return onnxruntime.InferenceSession(model_path, providers = [ 'CPUExecutionProvider' ])
+
+
+def create_anchor_inference_session(model_path : str) -> onnxruntime.InferenceSession:
+    inference_nodes =\
+    [
+        helper.make_node('Reshape', [ 'input', 'shape' ], [ 'output' ])
+    ]
+    inference_graph = helper.make_graph(inference_nodes, 'inference_batcher',
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 'batch', 3, 'height', 'width' ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 'anchors', 1 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.array([ -1, 1 ], dtype = numpy.int64), 'shape')
+    ])
+    onnx.save(helper.make_model(inference_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), model_path)
+    return onnxruntime.InferenceSession(model_path, providers = [ 'CPUExecutionProvider' ])
+
+
+@pytest.fixture(scope = 'module')
+def inference_sessions() -> dict:
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        yield\
+        {
+            'dynamic': create_inference_session(temp_directory_path + '/dynamic.onnx', 'batch'),
+            'fixed': create_inference_session(temp_directory_path + '/fixed.onnx', 1),
+            'anchor': create_anchor_inference_session(temp_directory_path + '/anchor.onnx')
+        }
+
+
+class CountingInferenceSession:
+    def __init__(self, inference_session : onnxruntime.InferenceSession) -> None:
+        self.inference_session = inference_session
+        self.run_total = 0
+        self.batch_sizes = []
+
+    def run(self, output_names : list, input_feed : dict, run_options : onnxruntime.RunOptions = None) -> list:
+        self.run_total += 1
+        self.batch_sizes.append(len(next(iter(input_feed.values()))))
+        return self.inference_session.run(output_names, input_feed, run_options)
+
+
+def test_has_dynamic_batch(inference_sessions : dict) -> None:
+    assert has_dynamic_batch(inference_sessions.get('dynamic')) is True
+    assert has_dynamic_batch(inference_sessions.get('fixed')) is False
+
+
+def test_detect_batch_size(inference_sessions : dict) -> None:
+    assert detect_batch_size(inference_sessions.get('fixed'), [ 'cuda' ]) == 1
+    assert detect_batch_size(inference_sessions.get('fixed'), [ 'cuda' ], 'input') == 1
+    assert detect_batch_size(inference_sessions.get('dynamic'), [ 'cuda' ], 'input') is None
+    assert detect_batch_size(inference_sessions.get('dynamic'), [ 'cpu' ]) == 1
+
+
+def test_batched_inference_session(inference_sessions : dict) -> None:
+    counting_session = CountingInferenceSession(inference_sessions.get('dynamic'))
+    batched_session = BatchedInferenceSession(counting_session, 8, 0.05)
+    input_frames = [ numpy.random.rand(1, 3, 128, 128).astype(numpy.float32) for _ in range(16) ]
+
+    with ThreadPoolExecutor(max_workers = 8) as executor:
+        batched_outputs = list(executor.map(lambda input_frame: batched_session.run(None, { 'input': input_frame })[0], input_frames))
+
+    for input_frame, batched_output in zip(input_frames, batched_outputs):
+        assert numpy.allclose(inference_sessions.get('dynamic').run(None, { 'input': input_frame })[0], batched_output, atol = 1e-4)
+    assert counting_session.run_total < len(input_frames)
+
+
+def test_batched_inference_session_with_anchor_outputs(inference_sessions : dict) -> None:
+    inference_session = inference_sessions.get('anchor')
+    counting_session = CountingInferenceSession(inference_session)
+    batched_session = BatchedInferenceSession(counting_session, 4, 0.05)
+    input_frames = [ numpy.random.rand(1, 3, 4, 4).astype(numpy.float32) for _ in range(8) ]
+
+    assert has_dynamic_batch(inference_session) is True
+    assert batched_session.run(None, { 'input': input_frames[0] })[0].shape == (48, 1)
+
+    with ThreadPoolExecutor(max_workers = 4) as executor:
+        batched_outputs = list(executor.map(lambda input_frame: batched_session.run(None, { 'input': input_frame })[0], input_frames))
+
+    for input_frame, batched_output in zip(input_frames, batched_outputs):
+        assert numpy.array_equal(inference_session.run(None, { 'input': input_frame })[0], batched_output)
+    assert batched_session.can_batch is False
+    assert counting_session.run_total == len(input_frames) + 1
+
+
+def test_batched_inference_session_with_error(inference_sessions : dict) -> None:
+    batched_session = BatchedInferenceSession(inference_sessions.get('dynamic'), 4, 0.01)
+
+    with pytest.raises(Exception):
+        batched_session.run(None, { 'input': numpy.zeros((1, 4, 128, 128), dtype = numpy.float32) })
+    assert batched_session.run(None, { 'input': numpy.zeros((1, 3, 128, 128), dtype = numpy.float32) })[0].shape == (1, 8, 128, 128)
+
+
+@pytest.mark.parametrize('batch_size', [ 2, 4, 8 ])
+def test_batched_inference_session_batch_sizes(inference_sessions : dict, batch_size : int) -> None:
+    counting_session = CountingInferenceSession(inference_sessions.get('dynamic'))
+    batched_session = BatchedInferenceSession(counting_session, batch_size, 1.0)
+    input_frames = [ numpy.random.rand(1, 3, 128, 128).astype(numpy.float32) for _ in range(64) ]
+
+    with ThreadPoolExecutor(max_workers = batch_size) as executor:
+        list(executor.map(lambda input_frame: batched_session.run(None, { 'input': input_frame }), input_frames))
+
+    assert counting_session.batch_sizes == [ batch_size ] * (len(input_frames) // batch_size)
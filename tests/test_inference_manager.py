@@ -0,0 +1,268 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+import onnx
+import onnxruntime
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+
+import facefusion.inference_manager
+import facefusion.model_cache
+from facefusion import process_manager, state_manager
+from facefusion.inference_manager import GRAPH_OPTIMIZATION_LEVELS, clear_inference_pool, create_inference_pool, create_inference_session, \
+    create_session_options, get_inference_pool, get_model_family
+from facefusion.inference_replicas import ReplicatedInferenceSession
+from facefusion.model_cache import resolve_model_cache_path
+
+
+@pytest.fixture(scope = 'module')
+def model_path() -> str:
+    inference_nodes =\
+    [
+        helper.make_node('Conv', [ 'input', 'weight' ], [ 'input_conv' ], pads = [ 1, 1, 1, 1 ]),
+        helper.make_node('Relu', [ 'input_conv' ], [ 'output' ])
+    ]
+    inference_graph = helper.make_graph(inference_nodes, 'inference_manager',
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 1, 3, 256, 256 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 1, 8, 256, 256 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.rand(8, 3, 3, 3).astype(numpy.float32), 'weight')
+    ])
+
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        onnx.save(helper.make_model(inference_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), temp_directory_path + '/model.onnx')
+        yield temp_directory_path + '/model.onnx'
+
+
+@pytest.fixture(scope = 'module', autouse = True)
+def before_all() -> None:
+    state_manager.init_item('execution_device_id', '0')
+    state_manager.init_item('execution_providers', [ 'cpu' ])
+    state_manager.init_item('execution_batch_size', 1)
+    state_manager.init_item('execution_session_count', 1)
+    state_manager.init_item('execution_session_families', None)
+    state_manager.init_item('execution_session_family_options', None)
+    state_manager.init_item('execution_session_intra_threads', 0)
+    state_manager.init_item('execution_session_inter_threads', 0)
+    state_manager.init_item('execution_session_optimization', 'all')
+    state_manager.init_item('execution_session_mode', 'sequential')
+    state_manager.init_item('execution_session_skip_arena', False)
+    state_manager.init_item('execution_session_keep_optimized', False)
+
+
+def test_replicated_inference_session(model_path : str) -> None:
+    session_lock = threading.Lock()
+    session_ids = set()
+
+    def create_session() -> onnxruntime.InferenceSession:
+        return onnxruntime.InferenceSession(model_path, providers = [ 'CPUExecutionProvider' ])
+
+    def run_session(input_frame : numpy.ndarray) -> numpy.ndarray:
+        inference_session = replicated_session.checkout()
+        with session_lock:
+            session_ids.add(id(inference_session))
+        output_frame = inference_session.run(None, { 'input': input_frame })[0]
+        replicated_session.checkin(inference_session)
+        return output_frame
+
+    replicated_session = ReplicatedInferenceSession(create_session, 2)
+
+    assert len(replicated_session.inference_sessions) == 1
+    assert replicated_session.get_inputs()[0].name == 'input'
+
+    input_frames = [ numpy.random.rand(1, 3, 256, 256).astype(numpy.float32) for _ in range(16) ]
+    with ThreadPoolExecutor(max_workers = 4) as executor:
+        output_frames = list(executor.map(run_session, input_frames))
+
+    assert len(replicated_session.inference_sessions) <= 2
+    assert len(session_ids) == len(replicated_session.inference_sessions)
+    for input_frame, output_frame in zip(input_frames, output_frames):
+        assert numpy.allclose(replicated_session.run(None, { 'input': input_frame })[0], output_frame, atol = 1e-4)
+
+
+def test_create_inference_pool(model_path : str) -> None:
+    model_sources =\
+    {
+        'model':
+        {
+            'url': None,
+            'path': model_path
+        }
+    }
+
+    assert isinstance(create_inference_pool(model_sources, '0', [ 'cpu' ]).get('model'), onnxruntime.InferenceSession)
+
+    state_manager.set_item('execution_session_count', 4)
+
+    assert isinstance(create_inference_pool(model_sources, '0', [ 'cpu' ]).get('model'), ReplicatedInferenceSession)
+    assert create_inference_pool(model_sources, '0', [ 'cpu' ]).get('model').get_session_options().intra_op_num_threads >= 1
+
+    state_manager.set_item('execution_session_count', 1)
+
+
+def test_get_inference_pool_without_lock(monkeypatch : pytest.MonkeyPatch, model_path : str) -> None:
+    model_sources =\
+    {
+        'model':
+        {
+            'url': None,
+            'path': model_path
+        }
+    }
+    process_manager.end()
+    inference_pool = get_inference_pool('tests.test_inference_manager', model_sources)
+    monkeypatch.setattr(facefusion.inference_manager, 'thread_lock', lambda: pytest.fail('lock taken on cache hit'))
+
+    assert get_inference_pool('tests.test_inference_manager', model_sources) is inference_pool
+
+    clear_inference_pool('tests.test_inference_manager')
+
+
+class BarrierInferenceSession:
+    def __init__(self, run_barrier : threading.Barrier, run_lock : threading.Lock, run_counts : dict) -> None:
+        self.run_barrier = run_barrier
+        self.run_lock = run_lock
+        self.run_counts = run_counts
+        self.run_total = 0
+
+    def run(self, output_names : list, input_feed : dict, run_options : onnxruntime.RunOptions = None) -> list:
+        with self.run_lock:
+            self.run_counts['current'] += 1
+            self.run_counts['maximum'] = max(self.run_counts.get('maximum'), self.run_counts.get('current'))
+            self.run_total += 1
+        # every replica has to run at the same time to pass the barrier
+        self.run_barrier.wait()
+        with self.run_lock:
+            self.run_counts['current'] -= 1
+        return [ input_feed.get('input') ]
+
+
+@pytest.mark.parametrize('execution_session_count', [ 1, 2, 4 ])
+def test_replicated_inference_session_runs(execution_session_count : int) -> None:
+    run_barrier = threading.Barrier(execution_session_count, timeout = 10)
+    run_lock = threading.Lock()
+    run_counts =\
+    {
+        'current': 0,
+        'maximum': 0
+    }
+    inference_session = ReplicatedInferenceSession(lambda: BarrierInferenceSession(run_barrier, run_lock, run_counts), execution_session_count)
+
+    with ThreadPoolExecutor(max_workers = 4) as executor:
+        list(executor.map(lambda frame_number: inference_session.run(None, { 'input': numpy.array([ frame_number ]) }), range(32)))
+
+    assert run_counts.get('maximum') == execution_session_count
+    assert [ replica_session.run_total for replica_session in inference_session.inference_sessions ] == [ 32 // execution_session_count ] * execution_session_count
+
+
+def test_get_model_family() -> None:
+    assert get_model_family('facefusion.processors.modules.face_enhancer.gfpgan_1.4') == 'face_enhancer'
+    assert get_model_family('facefusion.face_detector.yoloface') == 'face_detector'
+    assert get_model_family('tests.test_inference_manager') == 'tests'
+
+
+def test_create_session_options() -> None:
+    state_manager.set_item('execution_session_intra_threads', 2)
+    state_manager.set_item('execution_session_optimization', 'basic')
+    state_manager.set_item('execution_session_mode', 'parallel')
+    state_manager.set_item('execution_session_skip_arena', True)
+    session_options = create_session_options('face_enhancer', [ 'cpu' ], 1)
+
+    assert session_options.intra_op_num_threads == 2
+    assert session_options.graph_optimization_level == onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC
+    assert session_options.execution_mode == onnxruntime.ExecutionMode.ORT_PARALLEL
+    assert session_options.enable_cpu_mem_arena is False
+
+    state_manager.set_item('execution_session_families', [ 'face_detector' ])
+
+    assert create_session_options('face_enhancer', [ 'cpu' ], 1).intra_op_num_threads == 0
+    assert create_session_options('face_detector', [ 'cpu' ], 1).intra_op_num_threads == 2
+
+    state_manager.set_item('execution_session_family_options', [ 'face_detector.intra_threads=4', 'face_detector.skip_arena=False', 'face_swapper.optimization=disable', 'face_swapper.mode=parallel' ])
+    face_detector_session_options = create_session_options('face_detector', [ 'cpu' ], 1)
+    face_swapper_session_options = create_session_options('face_swapper', [ 'cpu' ], 1)
+
+    assert face_detector_session_options.intra_op_num_threads == 4
+    assert face_detector_session_options.graph_optimization_level == onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC
+    assert face_detector_session_options.enable_cpu_mem_arena is True
+    assert face_swapper_session_options.intra_op_num_threads == 0
+    assert face_swapper_session_options.graph_optimization_level == onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+    assert face_swapper_session_options.execution_mode == onnxruntime.ExecutionMode.ORT_PARALLEL
+
+    state_manager.set_item('execution_session_families', None)
+    state_manager.set_item('execution_session_family_options', None)
+    state_manager.set_item('execution_session_intra_threads', 0)
+    state_manager.set_item('execution_session_optimization', 'all')
+    state_manager.set_item('execution_session_mode', 'sequential')
+    state_manager.set_item('execution_session_skip_arena', False)
+
+
+def test_create_inference_session_with_keep_optimized(monkeypatch : pytest.MonkeyPatch, model_path : str) -> None:
+    monkeypatch.setattr(facefusion.model_cache, 'get_model_cache_directory_path', lambda: os.path.join(os.path.dirname(model_path), 'cache'))
+    optimized_model_path = resolve_model_cache_path(model_path, [ 'cpu', 'all' ], '.onnx')
+    input_frame = numpy.random.rand(1, 3, 256, 256).astype(numpy.float32)
+    state_manager.set_item('execution_session_keep_optimized', True)
+    inference_session = create_inference_session(model_path, '0', [ 'cpu' ], 'face_enhancer')
+
+    assert os.path.isfile(optimized_model_path)
+
+    optimized_inference_session = create_inference_session(model_path, '0', [ 'cpu' ], 'face_enhancer')
+
+    assert optimized_inference_session.get_session_options().graph_optimization_level == onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+    assert numpy.allclose(inference_session.run(None, { 'input': input_frame })[0], optimized_inference_session.run(None, { 'input': input_frame })[0], atol = 1e-4)
+
+    state_manager.set_item('execution_session_keep_optimized', False)
+    os.remove(optimized_model_path)
+
+
+def test_create_inference_session_with_broken_optimized(monkeypatch : pytest.MonkeyPatch, model_path : str) -> None:
+    monkeypatch.setattr(facefusion.model_cache, 'get_model_cache_directory_path', lambda: os.path.join(os.path.dirname(model_path), 'cache'))
+    optimized_model_path = resolve_model_cache_path(model_path, [ 'cpu', 'all' ], '.onnx')
+    state_manager.set_item('execution_session_keep_optimized', True)
+    create_inference_session(model_path, '0', [ 'cpu' ], 'face_enhancer')
+    optimized_model_size = os.path.getsize(optimized_model_path)
+
+    with open(optimized_model_path, 'r+b') as optimized_model_file:
+        optimized_model_file.truncate(optimized_model_size // 2)
+    inference_session = create_inference_session(model_path, '0', [ 'cpu' ], 'face_enhancer')
+
+    assert inference_session.get_session_options().graph_optimization_level == onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    assert os.path.getsize(optimized_model_path) == optimized_model_size
+    assert os.listdir(os.path.dirname(optimized_model_path)) == [ os.path.basename(optimized_model_path) ]
+
+    state_manager.set_item('execution_session_keep_optimized', False)
+    os.remove(optimized_model_path)
+
+
+@pytest.mark.parametrize('execution_session_optimization, execution_session_intra_threads, execution_session_skip_arena',
+[
+    ('disable', 0, False),
+    ('basic', 0, False),
+    ('all', 0, False),
+    ('all', 1, False),
+    ('all', 2, False),
+    ('all', 0, True)
+])
+def test_create_inference_session_with_session_options(model_path : str, execution_session_optimization : str, execution_session_intra_threads : int, execution_session_skip_arena : bool) -> None:
+    input_frame = numpy.random.rand(1, 3, 256, 256).astype(numpy.float32)
+    output_frame = create_inference_session(model_path, '0', [ 'cpu' ], 'face_enhancer').run(None, { 'input': input_frame })[0]
+    state_manager.set_item('execution_session_optimization', execution_session_optimization)
+    state_manager.set_item('execution_session_intra_threads', execution_session_intra_threads)
+    state_manager.set_item('execution_session_skip_arena', execution_session_skip_arena)
+    inference_session = create_inference_session(model_path, '0', [ 'cpu' ], 'face_enhancer')
+    session_options = inference_session.get_session_options()
+
+    state_manager.set_item('execution_session_optimization', 'all')
+    state_manager.set_item('execution_session_intra_threads', 0)
+    state_manager.set_item('execution_session_skip_arena', False)
+    assert session_options.graph_optimization_level == GRAPH_OPTIMIZATION_LEVELS.get(execution_session_optimization)
+    assert session_options.intra_op_num_threads == execution_session_intra_threads
+    assert session_options.enable_cpu_mem_arena is not execution_session_skip_arena
+    assert numpy.allclose(inference_session.run(None, { 'input': input_frame })[0], output_frame, atol = 1e-4)
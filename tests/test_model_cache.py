@@ -0,0 +1,101 @@
+import os
+import tempfile
+
+import numpy
+import onnx
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+
+import facefusion.model_cache
+from facefusion.hash_helper import create_file_hash
+from facefusion.model_cache import get_model_hash, get_static_model_initializer, resolve_model_cache_path
+
+
+@pytest.fixture(scope = 'module')
+def temp_directory_path() -> str:
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        yield temp_directory_path
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch, temp_directory_path : str) -> None:
+    monkeypatch.setattr(facefusion.model_cache, 'get_model_cache_directory_path', lambda: os.path.join(temp_directory_path, 'cache'))
+    get_model_hash.cache_clear()
+    get_static_model_initializer.cache_clear()
+
+
+def create_model(model_path : str, weight_size : int) -> None:
+    model_nodes =\
+    [
+        helper.make_node('Add', [ 'input', 'weight' ], [ 'weight_add' ]),
+        helper.make_node('MatMul', [ 'weight_add', 'initializer' ], [ 'output' ])
+    ]
+    model_graph = helper.make_graph(model_nodes, 'model_cache',
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ weight_size, 512 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ weight_size, 512 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.rand(weight_size, 512).astype(numpy.float32), 'weight'),
+        numpy_helper.from_array(numpy.random.rand(512, 512).astype(numpy.float32), 'initializer')
+    ])
+    onnx.save(helper.make_model(model_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), model_path)
+
+
+def test_resolve_model_cache_path(temp_directory_path : str) -> None:
+    model_path = os.path.join(temp_directory_path, 'model.onnx')
+    create_model(model_path, 4)
+    model_hash = get_model_hash(model_path)
+
+    assert resolve_model_cache_path(model_path, [ 'cpu', 'all' ], '.onnx') == os.path.join(temp_directory_path, 'cache', 'model.' + model_hash + '.cpu.all.onnx')
+    assert os.path.isdir(os.path.join(temp_directory_path, 'cache'))
+    assert resolve_model_cache_path(os.path.join(temp_directory_path, 'invalid.onnx'), [ 'cpu' ], '.onnx') is None
+
+    get_model_hash.cache_clear()
+    create_file_hash(model_path)
+
+    assert get_model_hash(model_path) == model_hash
+
+
+def test_get_static_model_initializer(temp_directory_path : str) -> None:
+    model_path = os.path.join(temp_directory_path, 'model.onnx')
+    create_model(model_path, 4)
+    model_initializer = get_static_model_initializer(model_path)
+    initializer_path = resolve_model_cache_path(model_path, [ 'initializer' ], '.npy')
+
+    assert os.path.isfile(initializer_path)
+
+    get_static_model_initializer.cache_clear()
+
+    assert isinstance(get_static_model_initializer(model_path), numpy.memmap)
+    assert numpy.array_equal(get_static_model_initializer(model_path), model_initializer)
+
+
+def test_get_static_model_initializer_with_broken_cache(temp_directory_path : str) -> None:
+    model_path = os.path.join(temp_directory_path, 'model_broken.onnx')
+    create_model(model_path, 4)
+    model_initializer = get_static_model_initializer(model_path)
+    initializer_path = resolve_model_cache_path(model_path, [ 'initializer' ], '.npy')
+    initializer_size = os.path.getsize(initializer_path)
+
+    with open(initializer_path, 'r+b') as initializer_file:
+        initializer_file.truncate(initializer_size // 2)
+    get_static_model_initializer.cache_clear()
+
+    assert numpy.array_equal(get_static_model_initializer(model_path), model_initializer)
+    assert os.path.getsize(initializer_path) == initializer_size
+    assert not [ cache_file_name for cache_file_name in os.listdir(os.path.dirname(initializer_path)) if cache_file_name.endswith('.tmp') or cache_file_name.count('.npy') > 1 ]
+
+
+def test_get_static_model_initializer_without_parse(monkeypatch : pytest.MonkeyPatch, temp_directory_path : str) -> None:
+    model_path = os.path.join(temp_directory_path, 'model_large.onnx')
+    create_model(model_path, 4096)
+    create_file_hash(model_path)
+    model_initializer = get_static_model_initializer(model_path)
+
+    get_static_model_initializer.cache_clear()
+    monkeypatch.setattr(onnx, 'load', lambda model_path: pytest.fail('model parsed on cache hit'))
+
+    assert numpy.array_equal(get_static_model_initializer(model_path), model_initializer)
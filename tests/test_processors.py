@@ -0,0 +1,202 @@
+import os
+import tempfile
+from time import perf_counter
+from types import ModuleType
+from typing import List
+
+import numpy
+import pytest
+
+import facefusion.processors.core
+from facefusion import process_manager, state_manager
+from facefusion.processors.core import create_fused_process_frames, create_queue_chunks, multi_process_frames
+from facefusion.typing import QueuePayload
+from facefusion.vision import read_image, write_image
+
+IO_COUNTS = \
+    {
+        'read_image': 0,
+        'write_image': 0
+    }
+
+
+@pytest.fixture(scope = 'module', autouse = True)
+def before_all() -> None:
+    state_manager.init_item('source_paths', None)
+    state_manager.init_item('source_paths_2', None)
+    state_manager.init_item('target_path', None)
+    state_manager.init_item('output_video_fps', 25.0)
+    state_manager.init_item('log_level', 'error')
+    state_manager.init_item('execution_providers', [ 'cpu' ])
+    state_manager.init_item('execution_backend', 'thread')
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch) -> None:
+    def count_read_image(image_path : str) -> numpy.ndarray:
+        IO_COUNTS['read_image'] += 1
+        return read_image(image_path)
+
+    def count_write_image(image_path : str, vision_frame : numpy.ndarray) -> bool:
+        IO_COUNTS['write_image'] += 1
+        return write_image(image_path, vision_frame)
+
+    IO_COUNTS['read_image'] = 0
+    IO_COUNTS['write_image'] = 0
+    monkeypatch.setattr(facefusion.processors.core, 'read_image', count_read_image)
+    monkeypatch.setattr(facefusion.processors.core, 'write_image', count_write_image)
+    process_manager.start()
+    yield
+    process_manager.end()
+
+
+def process_worker_test_frames(queue_payloads : List[QueuePayload]) -> list:
+    output_frames = []
+
+    for queue_payload in queue_payloads:
+        frame_path = queue_payload.get('frame_path')
+        vision_frame = read_image(frame_path)
+        if queue_payload.get('source_face') == 'source':
+            for row_vision_frame in vision_frame:
+                row_vision_frame += 1
+            write_image(frame_path, vision_frame)
+        output_frames.append((queue_payload.get('frame_number'), frame_path))
+    return output_frames
+
+
+def create_processor_module(name : str) -> ModuleType:
+    processor_module = ModuleType('facefusion.processors.modules.' + name)
+    processor_module.process_frame = lambda inputs: numpy.add(inputs.get('target_vision_frame'), 1, dtype = numpy.uint8)
+    return processor_module
+
+
+def create_queue_payloads(temp_directory_path : str, frame_total : int) -> List[QueuePayload]:
+    queue_payloads = []
+
+    for frame_number in range(frame_total):
+        frame_path = os.path.join(temp_directory_path, str(frame_number).zfill(8) + '.bmp')
+        write_image(frame_path, numpy.zeros((360, 640, 3), dtype = numpy.uint8))
+        queue_payloads.append(
+        {
+            'frame_number': frame_number,
+            'frame_path': frame_path,
+            'source_face': None,
+            'source_face_2': None,
+            'reference_faces': None,
+            'reference_faces_2': None
+        })
+    return queue_payloads
+
+
+def test_fused_process_frames() -> None:
+    processor_modules = [ create_processor_module(name) for name in [ 'face_swapper', 'face_enhancer', 'frame_enhancer' ] ]
+
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        queue_payloads = create_queue_payloads(temp_directory_path, 10)
+        output_frames = create_fused_process_frames(processor_modules)(queue_payloads)
+
+        assert output_frames == [ (queue_payload.get('frame_number'), queue_payload.get('frame_path')) for queue_payload in queue_payloads ]
+        assert IO_COUNTS.get('read_image') == 10
+        assert IO_COUNTS.get('write_image') == 10
+        assert numpy.all(read_image(queue_payloads[0].get('frame_path')) == 3)
+
+
+def test_fused_process_frames_benchmark() -> None:
+    processor_modules = [ create_processor_module(name) for name in [ 'face_swapper', 'face_enhancer', 'frame_enhancer' ] ]
+    frame_total = 240
+
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        queue_payloads = create_queue_payloads(temp_directory_path, frame_total)
+        start_time = perf_counter()
+        for processor_module in processor_modules:
+            create_fused_process_frames([ processor_module ])(queue_payloads)
+        sequential_time = perf_counter() - start_time
+        sequential_io_total = IO_COUNTS.get('read_image') + IO_COUNTS.get('write_image')
+        sequential_vision_frame = read_image(queue_payloads[-1].get('frame_path'))
+
+        IO_COUNTS['read_image'] = 0
+        IO_COUNTS['write_image'] = 0
+        start_time = perf_counter()
+        create_fused_process_frames(processor_modules)(queue_payloads)
+        fused_time = perf_counter() - start_time
+        fused_io_total = IO_COUNTS.get('read_image') + IO_COUNTS.get('write_image')
+        fused_vision_frame = read_image(queue_payloads[-1].get('frame_path'))
+
+    print('sequential: {:.2f} ms per frame, {} disk operations'.format(sequential_time / frame_total * 1000, sequential_io_total))
+    print('fused: {:.2f} ms per frame, {} disk operations'.format(fused_time / frame_total * 1000, fused_io_total))
+    assert sequential_io_total == frame_total * 2 * len(processor_modules)
+    assert fused_io_total == frame_total * 2
+    assert numpy.all(sequential_vision_frame == 3)
+    assert numpy.all(fused_vision_frame == 6)
+
+
+def test_create_queue_chunks() -> None:
+    queue_payloads = [ { 'frame_number': frame_number } for frame_number in range(10) ]
+
+    assert [ len(queue_chunk) for queue_chunk in create_queue_chunks(queue_payloads, 4) ] == [ 4, 4, 2 ]
+    assert [ queue_chunk[0].get('frame_number') for queue_chunk in create_queue_chunks(queue_payloads, 4) ] == [ 0, 4, 8 ]
+    assert len(list(create_queue_chunks(queue_payloads, 1))) == 10
+
+
+@pytest.mark.parametrize('execution_queue_count', [ 1, 2, 4 ])
+def test_multi_process_frames(monkeypatch : pytest.MonkeyPatch, execution_queue_count : int) -> None:
+    queue_payloads = [ { 'frame_number': frame_number, 'frame_path': None } for frame_number in range(100) ]
+    queue_chunks = []
+
+    def process_frames(queue_chunk : List[QueuePayload]) -> list:
+        queue_chunks.append([ queue_payload.get('frame_number') for queue_payload in queue_chunk ])
+        return [ (queue_payload.get('frame_number'), None) for queue_payload in queue_chunk ]
+
+    monkeypatch.setattr(facefusion.processors.core, 'create_queue_payloads', lambda temp_frame_paths: queue_payloads)
+    state_manager.set_item('execution_thread_count', 2)
+    state_manager.set_item('execution_queue_count', execution_queue_count)
+    multi_process_frames([], process_frames)
+
+    assert len(queue_chunks) == 100 // execution_queue_count
+    assert all(queue_chunk == list(range(queue_chunk[0], queue_chunk[0] + execution_queue_count)) for queue_chunk in queue_chunks)
+    assert sorted(frame_number for queue_chunk in queue_chunks for frame_number in queue_chunk) == list(range(100))
+
+
+def test_multi_process_frames_with_process_backend(monkeypatch : pytest.MonkeyPatch) -> None:
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        queue_payloads = create_queue_payloads(temp_directory_path, 20)
+        for queue_payload in queue_payloads:
+            queue_payload['source_face'] = 'source'
+
+        monkeypatch.setattr(facefusion.processors.core, 'create_queue_payloads', lambda temp_frame_paths: queue_payloads)
+        state_manager.set_item('execution_backend', 'process')
+        state_manager.set_item('execution_thread_count', 2)
+        state_manager.set_item('execution_queue_count', 4)
+        multi_process_frames([], process_worker_test_frames)
+        state_manager.set_item('execution_backend', 'thread')
+
+        assert all(numpy.all(read_image(queue_payload.get('frame_path')) == 1) for queue_payload in queue_payloads)
+
+
+@pytest.mark.parametrize('execution_thread_count', [ 1, 2, 4, 8 ])
+def test_multi_process_frames_benchmark(monkeypatch : pytest.MonkeyPatch, execution_thread_count : int) -> None:
+    frame_total = 64
+
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        queue_payloads = create_queue_payloads(temp_directory_path, frame_total)
+        for queue_payload in queue_payloads:
+            queue_payload['source_face'] = 'source'
+
+        monkeypatch.setattr(facefusion.processors.core, 'create_queue_payloads', lambda temp_frame_paths: queue_payloads)
+        state_manager.set_item('execution_thread_count', execution_thread_count)
+        state_manager.set_item('execution_queue_count', 4)
+        execution_times = {}
+
+        vision_frame_values = {}
+
+        for execution_backend in [ 'thread', 'process' ]:
+            state_manager.set_item('execution_backend', execution_backend)
+            start_time = perf_counter()
+            multi_process_frames([], process_worker_test_frames)
+            execution_times[execution_backend] = perf_counter() - start_time
+            vision_frame_values[execution_backend] = set(numpy.unique([ read_image(queue_payload.get('frame_path')) for queue_payload in queue_payloads ]).tolist())
+        state_manager.set_item('execution_backend', 'thread')
+
+    print('{} workers thread: {:.1f}, process: {:.1f} frames per second'.format(execution_thread_count, frame_total / execution_times.get('thread'), frame_total / execution_times.get('process')))
+    assert vision_frame_values.get('thread') == { 1 }
+    assert vision_frame_values.get('process') == { 2 }
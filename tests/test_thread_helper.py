@@ -0,0 +1,159 @@
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+import numpy
+import onnx
+import onnxruntime
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+
+import facefusion.processors.modules.face_enhancer as face_enhancer
+import facefusion.thread_helper
+from facefusion import state_manager
+from facefusion.inference_batcher import BatchedInferenceSession
+from facefusion.thread_helper import NULL_CONTEXT, get_model_semaphore_limit, inference_semaphore, model_semaphore, thread_semaphore
+
+
+@pytest.fixture(scope = 'module')
+def face_enhancer_session() -> onnxruntime.InferenceSession:
+    face_enhancer_nodes =\
+    [
+        helper.make_node('Conv', [ 'input', 'weight_conv' ], [ 'input_conv' ], pads = [ 1, 1, 1, 1 ]),
+        helper.make_node('Tanh', [ 'input_conv' ], [ 'output' ])
+    ]
+    face_enhancer_graph = helper.make_graph(face_enhancer_nodes, 'face_enhancer',
+    [
+        helper.make_tensor_value_info('input', TensorProto.FLOAT, [ 1, 3, 512, 512 ])
+    ],
+    [
+        helper.make_tensor_value_info('output', TensorProto.FLOAT, [ 1, 3, 512, 512 ])
+    ],
+    [
+        numpy_helper.from_array(numpy.random.rand(3, 3, 3, 3).astype(numpy.float32) * 0.1, 'weight_conv')
+    ])
+
+    with tempfile.TemporaryDirectory() as temp_directory_path:
+        onnx.save(helper.make_model(face_enhancer_graph, opset_imports = [ helper.make_opsetid('', 13) ], ir_version = 8), temp_directory_path + '/face_enhancer.onnx')
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = 1
+        yield onnxruntime.InferenceSession(temp_directory_path + '/face_enhancer.onnx', session_options, providers = [ 'CPUExecutionProvider' ])
+
+
+class ConcurrentInferenceSession:
+    def __init__(self, inference_session : onnxruntime.InferenceSession) -> None:
+        self.inference_session = inference_session
+        self.run_lock = threading.Lock()
+        self.run_counts =\
+        {
+            'current': 0,
+            'maximum': 0
+        }
+
+    def get_inputs(self) -> list:
+        return self.inference_session.get_inputs()
+
+    def run(self, output_names : list, input_feed : dict, run_options : onnxruntime.RunOptions = None) -> list:
+        with self.run_lock:
+            self.run_counts['current'] += 1
+            self.run_counts['maximum'] = max(self.run_counts.get('maximum'), self.run_counts.get('current'))
+        sleep(0.01)
+        outputs = self.inference_session.run(output_names, input_feed, run_options)
+        with self.run_lock:
+            self.run_counts['current'] -= 1
+        return outputs
+
+
+@pytest.fixture(autouse = True)
+def before_each(monkeypatch : pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(facefusion.thread_helper, 'has_execution_provider', lambda execution_provider_key: execution_provider_key == 'cuda')
+    state_manager.init_item('execution_model_concurrency', 0)
+    state_manager.init_item('execution_provider_concurrency', None)
+
+
+def test_get_model_semaphore_limit(monkeypatch : pytest.MonkeyPatch) -> None:
+    assert get_model_semaphore_limit() == 0
+
+    monkeypatch.setattr(facefusion.thread_helper, 'has_execution_provider', lambda execution_provider_key: execution_provider_key == 'directml')
+
+    assert get_model_semaphore_limit() == 1
+
+    state_manager.set_item('execution_provider_concurrency', [ 'directml=3', 'rocm=2' ])
+
+    assert get_model_semaphore_limit() == 3
+
+    state_manager.set_item('execution_provider_concurrency', [ 'directml=0' ])
+
+    assert get_model_semaphore_limit() == 0
+
+    state_manager.set_item('execution_provider_concurrency', [ 'directml=invalid' ])
+
+    assert get_model_semaphore_limit() == 1
+
+    monkeypatch.setattr(facefusion.thread_helper, 'has_execution_provider', lambda execution_provider_key: execution_provider_key == 'cuda')
+    state_manager.set_item('execution_provider_concurrency', [ 'cuda=4' ])
+
+    assert get_model_semaphore_limit() == 4
+
+    state_manager.set_item('execution_model_concurrency', 6)
+
+    assert get_model_semaphore_limit() == 6
+
+
+def test_model_semaphore() -> None:
+    assert model_semaphore('face_enhancer') is NULL_CONTEXT
+
+    state_manager.set_item('execution_model_concurrency', 2)
+
+    assert model_semaphore('face_enhancer') is model_semaphore('face_enhancer')
+    assert model_semaphore('face_enhancer') is not model_semaphore('age_modifier')
+    assert model_semaphore('face_enhancer') is not thread_semaphore()
+
+
+def test_inference_semaphore(face_enhancer_session : onnxruntime.InferenceSession) -> None:
+    assert inference_semaphore(face_enhancer_session) is thread_semaphore()
+    assert inference_semaphore(BatchedInferenceSession(face_enhancer_session, 4, 0.01)) is NULL_CONTEXT
+
+
+def test_model_semaphore_limit() -> None:
+    state_manager.set_item('execution_model_concurrency', 2)
+    run_lock = threading.Lock()
+    run_counts =\
+    {
+        'current': 0,
+        'maximum': 0
+    }
+
+    def run_model(_ : int) -> None:
+        with model_semaphore('face_enhancer'):
+            with run_lock:
+                run_counts['current'] += 1
+                run_counts['maximum'] = max(run_counts.get('maximum'), run_counts.get('current'))
+            sleep(0.01)
+            with run_lock:
+                run_counts['current'] -= 1
+
+    with ThreadPoolExecutor(max_workers = 8) as executor:
+        list(executor.map(run_model, range(32)))
+
+    assert run_counts.get('maximum') == 2
+
+
+@pytest.mark.parametrize('execution_thread_count', [ 1, 2, 4, 8 ])
+def test_face_enhancer_concurrency(monkeypatch : pytest.MonkeyPatch, face_enhancer_session : onnxruntime.InferenceSession, execution_thread_count : int) -> None:
+    state_manager.set_item('execution_model_concurrency', 2)
+    crop_vision_frames = [ numpy.random.rand(1, 3, 512, 512).astype(numpy.float32) for _ in range(16) ]
+    run_counts = {}
+
+    for semaphore_name, semaphore_method in [ ('global', lambda model_name: thread_semaphore()), ('model', model_semaphore) ]:
+        concurrent_session = ConcurrentInferenceSession(face_enhancer_session)
+        monkeypatch.setattr(face_enhancer, 'get_inference_pool', lambda: { 'face_enhancer': concurrent_session })
+        monkeypatch.setattr(face_enhancer, 'model_semaphore', semaphore_method)
+
+        with ThreadPoolExecutor(max_workers = execution_thread_count) as executor:
+            list(executor.map(face_enhancer.forward, crop_vision_frames))
+        run_counts[semaphore_name] = concurrent_session.run_counts.get('maximum')
+
+    assert run_counts.get('global') == 1
+    assert run_counts.get('model') == min(execution_thread_count, 2)